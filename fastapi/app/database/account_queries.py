@@ -0,0 +1,407 @@
+"""
+SQL builders and row formatters for the accounts endpoints.
+
+Shared by the sync (psycopg2) and async (psycopg 3) routers so both
+run exactly the same queries. All queries use %s placeholders, which
+both drivers accept. Transaction history is read from the unified
+ledger table (migration 002) rather than the per-type tables.
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+
+ACCOUNT_COLUMNS = "id, customer_id, type, nickname, balance, rewards"
+
+# ledger.entry_type values (see migration 002)
+TRANSACTION_TYPES = ["deposit", "withdrawal", "transfer_out", "transfer_in"]
+
+# Row shape consumed by format_transaction_row()
+LEDGER_COLUMNS = """
+    entry_type as type,
+    source_id as id,
+    account_id,
+    amount,
+    transaction_date,
+    description,
+    status,
+    counterparty as payee_id,
+    medium
+"""
+
+
+# === ACCOUNTS ===
+
+def build_accounts_filter(customer_id=None, account_type=None, min_balance=None, max_balance=None):
+    """Return the WHERE clause and params shared by the accounts list and count queries."""
+    where = "WHERE 1=1"
+    params = []
+
+    if customer_id:
+        where += " AND customer_id = %s"
+        params.append(customer_id)
+
+    if account_type:
+        where += " AND type = %s"
+        params.append(account_type)
+
+    if min_balance is not None:
+        where += " AND balance >= %s"
+        params.append(min_balance)
+
+    if max_balance is not None:
+        where += " AND balance <= %s"
+        params.append(max_balance)
+
+    return where, params
+
+
+def build_accounts_queries(customer_id=None, account_type=None, min_balance=None, max_balance=None,
+                           limit=100, offset=0):
+    """Return ((count_query, count_params), (page_query, page_params)) for GET /accounts."""
+    where, params = build_accounts_filter(customer_id, account_type, min_balance, max_balance)
+
+    count_query = f"SELECT COUNT(*) FROM accounts {where}"
+    page_query = f"SELECT {ACCOUNT_COLUMNS} FROM accounts {where} ORDER BY balance DESC LIMIT %s OFFSET %s"
+
+    return (count_query, list(params)), (page_query, params + [limit, offset])
+
+
+ACCOUNT_BY_ID_QUERY = f"SELECT {ACCOUNT_COLUMNS} FROM accounts WHERE id = %s"
+
+def format_account_row(row):
+    """Shape an accounts row for GET /accounts/{account_id}."""
+    return {
+        "id": row[0],
+        "customer_id": row[1],
+        "type": row[2],
+        "nickname": row[3],
+        "name": row[3] or f"{row[2]} Account",
+        "balance": float(row[4]) if row[4] else 0.0,
+        "rewards": float(row[5]) if row[5] else 0.0,
+        "currency": "USD",
+        "status": "active"
+    }
+
+
+def build_accounts_response(rows, total_count, limit, offset, filters):
+    """Assemble the GET /accounts payload from a page of rows."""
+    accounts = []
+    total_balance = 0
+    account_types_count = {}
+
+    for row in rows:
+        balance = float(row[4]) if row[4] else 0.0
+        account_type = row[2]
+
+        accounts.append({
+            "id": row[0],
+            "customer_id": row[1],
+            "type": account_type,
+            "name": row[3] or f"{account_type} Account",
+            "nickname": row[3],
+            "balance": balance,
+            "currency": "USD",
+            "status": "active",
+            "created_at": None,
+            "rewards": float(row[5]) if row[5] else 0.0
+        })
+
+        total_balance += balance
+        account_types_count[account_type] = account_types_count.get(account_type, 0) + 1
+
+    # Calculate pagination info
+    current_page = (offset // limit) + 1 if limit > 0 else 1
+    total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
+    has_next = offset + limit < total_count
+    has_previous = offset > 0
+    next_offset = offset + limit if has_next else None
+    previous_offset = max(0, offset - limit) if has_previous else None
+
+    return {
+        "accounts": accounts,
+        "pagination": {
+            "total_accounts": total_count,
+            "returned_accounts": len(accounts),
+            "limit": limit,
+            "offset": offset,
+            "current_page": current_page,
+            "total_pages": total_pages,
+            "has_next": has_next,
+            "has_previous": has_previous,
+            "next_offset": next_offset,
+            "previous_offset": previous_offset
+        },
+        "summary": {
+            "total_balance": total_balance,
+            "average_balance": total_balance / len(accounts) if accounts else 0,
+            "account_types": account_types_count
+        },
+        "filters": filters
+    }
+
+
+# === TRANSACTIONS ===
+
+def _transaction_filters(date_after, date_before, min_amount, max_amount, status):
+    clause = ""
+    params = []
+
+    if date_after:
+        clause += " AND transaction_date >= %s"
+        params.append(date_after)
+
+    if date_before:
+        clause += " AND transaction_date <= %s"
+        params.append(date_before)
+
+    if min_amount is not None:
+        clause += " AND amount >= %s"
+        params.append(min_amount)
+
+    if max_amount is not None:
+        clause += " AND amount <= %s"
+        params.append(max_amount)
+
+    if status:
+        clause += " AND status = %s"
+        params.append(status)
+
+    return clause, params
+
+
+def build_transaction_queries(account_id, date_after=None, date_before=None, min_amount=None,
+                              max_amount=None, transaction_type=None, status=None,
+                              limit=100, offset=0):
+    """
+    Return ((count_query, count_params), (page_query, page_params)) for
+    offset pagination of GET /accounts/{account_id}/transactions, or None
+    if the transaction type is unknown.
+    """
+    if transaction_type and transaction_type not in TRANSACTION_TYPES:
+        return None
+
+    filters, params = _transaction_filters(date_after, date_before, min_amount, max_amount, status)
+    if transaction_type:
+        filters += " AND entry_type = %s"
+        params.append(transaction_type)
+
+    where = "WHERE account_id = %s" + filters
+    params = [account_id] + params
+
+    count_query = f"SELECT COUNT(*) FROM ledger {where}"
+    page_query = f"SELECT {LEDGER_COLUMNS} FROM ledger {where} ORDER BY transaction_date DESC LIMIT %s OFFSET %s"
+
+    return (count_query, list(params)), (page_query, params + [limit, offset])
+
+
+# --- keyset (cursor) pagination ---
+#
+# Pages are ordered by (transaction_date DESC NULLS LAST, type DESC, id DESC),
+# which is idx_ledger_account_history read backwards. The cursor is the sort
+# key of the last row returned, so the next page is a single index range
+# seek that stops after limit + 1 rows, whatever the depth.
+
+def encode_cursor(transaction_date, type_label, transaction_id):
+    """Opaque, URL-safe cursor for the row (transaction_date, type, id)."""
+    key = [transaction_date.isoformat() if transaction_date else None, type_label, transaction_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(). Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, type_label, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        transaction_date = datetime.fromisoformat(date_str) if date_str else None
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if type_label not in TRANSACTION_TYPES or not isinstance(transaction_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return transaction_date, type_label, transaction_id
+
+
+def _seek_branches(after):
+    """
+    Return [(predicate, params)] selecting the rows that sort after the
+    cursor `after`. Dated rows and NULL-dated rows (which sort last) are
+    separate branches so each stays a single index range.
+    """
+    if after is None:
+        return [("", [])]
+
+    after_date, after_type, after_id = after
+
+    if after_date is None:
+        # Already inside the NULL-dated tail
+        return [(" AND transaction_date IS NULL AND (entry_type, source_id) < (%s, %s)", [after_type, after_id])]
+
+    return [
+        (" AND (transaction_date, entry_type, source_id) < (%s, %s, %s)", [after_date, after_type, after_id]),
+        (" AND transaction_date IS NULL", []),
+    ]
+
+
+def build_transaction_keyset_query(account_id, date_after=None, date_before=None, min_amount=None,
+                                   max_amount=None, transaction_type=None, status=None,
+                                   after=None, limit=100):
+    """
+    Return (page_query, page_params) for cursor pagination of
+    GET /accounts/{account_id}/transactions, or None if the transaction
+    type is unknown.
+
+    `after` is a decoded cursor. The query returns up to limit + 1 rows;
+    the extra row only signals that another page exists.
+    """
+    if transaction_type and transaction_type not in TRANSACTION_TYPES:
+        return None
+
+    filters, filter_params = _transaction_filters(date_after, date_before, min_amount, max_amount, status)
+    if transaction_type:
+        filters += " AND entry_type = %s"
+        filter_params.append(transaction_type)
+
+    order_by = "ORDER BY transaction_date DESC NULLS LAST, entry_type DESC, source_id DESC"
+
+    queries = []
+    params = []
+    for seek, seek_params in _seek_branches(after):
+        queries.append(
+            f"(SELECT {LEDGER_COLUMNS} FROM ledger WHERE account_id = %s{filters}{seek} {order_by} LIMIT %s)"
+        )
+        params.extend([account_id] + filter_params + seek_params + [limit + 1])
+
+    if len(queries) == 1:
+        return queries[0][1:-1], params
+
+    page_query = "SELECT * FROM (" + " UNION ALL ".join(queries) + ") page"
+    page_query += " ORDER BY transaction_date DESC NULLS LAST, type DESC, id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    return page_query, params
+
+
+def build_keyset_page(rows, limit):
+    """Split a limit + 1 keyset result into (transactions, next_cursor)."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[4], last[0], last[1])
+
+    return [format_transaction_row(row) for row in rows], next_cursor
+
+
+def format_transaction_row(row):
+    """Shape a (type, id, account_id, amount, date, description, status, payee_id, medium) row."""
+    return {
+        "type": row[0],
+        "id": row[1],
+        "account_id": row[2],
+        "amount": float(row[3]) if row[3] else 0.0,
+        "transaction_date": str(row[4]) if row[4] else None,
+        "description": row[5],
+        "status": row[6],
+        "payee_id": row[7],
+        "medium": row[8]
+    }
+
+
+def build_recent_activity_query(account_id, days):
+    """Return (query, params) for completed/executed activity in the last N days."""
+    query = f"""
+    SELECT {LEDGER_COLUMNS}
+    FROM ledger
+    WHERE account_id = %s
+        AND transaction_date >= NOW() - %s * INTERVAL '1 day'
+        AND status IN ('completed', 'executed')
+    ORDER BY transaction_date DESC
+    """
+    return query, [account_id, days]
+
+
+def build_transaction_summary_query(account_id):
+    """Return (query, params) for every completed/executed transaction of an account."""
+    query = """
+    SELECT
+        entry_type as type,
+        source_id as id,
+        account_id,
+        amount,
+        transaction_date as date,
+        description,
+        status
+    FROM ledger
+    WHERE account_id = %s
+        AND status IN ('completed', 'executed')
+    ORDER BY date DESC
+    """
+    return query, [account_id]
+
+
+# Stored balance plus the incrementally maintained totals (migration 003)
+ACCOUNT_TOTALS_QUERY = """
+    SELECT
+        a.balance,
+        t.total_deposits,
+        t.total_withdrawals,
+        t.total_transfers_in,
+        t.total_transfers_out,
+        t.calculated_balance,
+        t.transaction_count,
+        t.last_transaction_at
+    FROM accounts a
+    LEFT JOIN account_totals t ON t.account_id = a.id
+    WHERE a.id = %s
+"""
+
+
+def build_transaction_summary(totals_row, transaction_rows=None):
+    """
+    Build the transaction-summary payload from an ACCOUNT_TOTALS_QUERY row.
+    Transaction rows are only listed when they were fetched.
+    """
+    def as_float(value):
+        return float(value) if value else 0.0
+
+    actual_balance = as_float(totals_row[0])
+    calculated_balance = as_float(totals_row[5])
+
+    # Calculate discrepancy
+    discrepancy = actual_balance - calculated_balance
+    has_discrepancy = abs(discrepancy) > 0.01  # Allow for floating point precision
+
+    summary = {
+        "total_deposits": as_float(totals_row[1]),
+        "total_withdrawals": as_float(totals_row[2]),
+        "total_transfers_in": as_float(totals_row[3]),
+        "total_transfers_out": as_float(totals_row[4]),
+        "calculated_balance": calculated_balance,
+        "actual_balance": actual_balance,
+        "discrepancy": discrepancy,
+        "has_discrepancy": has_discrepancy,
+        "transaction_count": totals_row[6] or 0,
+        "last_transaction_at": str(totals_row[7]) if totals_row[7] else None
+    }
+
+    result = {"summary": summary}
+
+    if transaction_rows is not None:
+        result["transactions"] = [
+            {
+                "id": row[1],
+                "account_id": row[2],
+                "type": row[0],
+                "amount": as_float(row[3]),
+                "date": str(row[4]) if row[4] else None,
+                "description": row[5] or "",
+                "status": row[6]
+            }
+            for row in transaction_rows
+        ]
+
+    return result
@@ -0,0 +1,135 @@
+"""
+Maintenance for the account_totals table (migration 003).
+
+account_totals is kept current by triggers on ledger. These helpers
+rebuild it from scratch and verify it against a full recompute:
+
+    python3 -m app.database.account_totals --check
+    python3 -m app.database.account_totals --repair
+"""
+import sys
+import argparse
+
+# Full recompute from the ledger, same definition the triggers maintain
+RECOMPUTE_TOTALS_SELECT = """
+    SELECT account_id,
+           COALESCE(SUM(amount) FILTER (WHERE entry_type = 'deposit'), 0) AS total_deposits,
+           COALESCE(SUM(amount) FILTER (WHERE entry_type = 'withdrawal'), 0) AS total_withdrawals,
+           COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_in'), 0) AS total_transfers_in,
+           COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_out'), 0) AS total_transfers_out,
+           COALESCE(SUM(signed_amount), 0) AS calculated_balance,
+           COUNT(*) AS transaction_count,
+           MAX(transaction_date) AS last_transaction_at
+    FROM ledger
+    WHERE status IN ('completed', 'executed')
+    GROUP BY account_id
+"""
+
+TOTALS_COLUMNS = [
+    "total_deposits",
+    "total_withdrawals",
+    "total_transfers_in",
+    "total_transfers_out",
+    "calculated_balance",
+    "transaction_count",
+    "last_transaction_at",
+]
+
+
+def repair_account_totals(conn):
+    """Rebuild account_totals from the ledger in one transaction. Returns the row count."""
+    cur = conn.cursor()
+    # Keep ledger writes (and their trigger deltas) out while we rebuild
+    cur.execute("LOCK TABLE ledger IN SHARE MODE")
+    cur.execute("LOCK TABLE account_totals IN ACCESS EXCLUSIVE MODE")
+    cur.execute("DELETE FROM account_totals")
+    cur.execute(f"""
+        INSERT INTO account_totals (account_id, {", ".join(TOTALS_COLUMNS)})
+        {RECOMPUTE_TOTALS_SELECT}
+    """)
+    rebuilt = cur.rowcount
+    conn.commit()
+    return rebuilt
+
+
+def check_account_totals(conn, limit=100):
+    """
+    Compare account_totals against a full recompute.
+
+    Returns a list of (account_id, column, stored, expected) for up to
+    `limit` mismatching accounts. Accounts missing on either side count as
+    mismatches. last_transaction_at may only lag after deletes.
+    """
+    comparisons = " OR ".join(
+        f"s.{col} IS DISTINCT FROM e.{col}" for col in TOTALS_COLUMNS
+        if col != "last_transaction_at"
+    )
+    select_pairs = ", ".join(f"s.{col}, e.{col}" for col in TOTALS_COLUMNS)
+
+    cur = conn.cursor()
+    cur.execute(f"""
+        WITH expected AS ({RECOMPUTE_TOTALS_SELECT}),
+             stored AS (
+                 SELECT * FROM account_totals
+                 -- Accounts whose settled entries were all removed keep a zero row
+                 WHERE transaction_count <> 0
+             )
+        SELECT COALESCE(s.account_id, e.account_id), s.account_id IS NULL, e.account_id IS NULL,
+               {select_pairs}
+        FROM stored s
+        FULL OUTER JOIN expected e ON e.account_id = s.account_id
+        WHERE s.account_id IS NULL OR e.account_id IS NULL OR {comparisons}
+            OR s.last_transaction_at < e.last_transaction_at
+        ORDER BY 1
+        LIMIT %s
+    """, (limit,))
+
+    mismatches = []
+    for row in cur.fetchall():
+        account_id, missing_stored, missing_expected = row[0], row[1], row[2]
+        if missing_stored:
+            mismatches.append((account_id, "*", None, "missing from account_totals"))
+            continue
+        if missing_expected:
+            mismatches.append((account_id, "*", "present", "no settled ledger entries"))
+            continue
+
+        values = row[3:]
+        for i, col in enumerate(TOTALS_COLUMNS):
+            stored, expected = values[2 * i], values[2 * i + 1]
+            if col == "last_transaction_at":
+                if stored is not None and expected is not None and stored >= expected:
+                    continue
+            if stored != expected:
+                mismatches.append((account_id, col, stored, expected))
+
+    conn.rollback()
+    return mismatches
+
+
+if __name__ == "__main__":
+    import psycopg2
+    from app.database.db_init import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild account_totals")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--check", action="store_true", help="Compare against a full recompute")
+    group.add_argument("--repair", action="store_true", help="Rebuild from the ledger")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        if args.repair:
+            rebuilt = repair_account_totals(conn)
+            print(f"✅ Rebuilt account_totals for {rebuilt} accounts")
+        else:
+            mismatches = check_account_totals(conn)
+            if mismatches:
+                for account_id, col, stored, expected in mismatches:
+                    print(f"❌ {account_id} {col}: stored={stored} expected={expected}")
+                print(f"{len(mismatches)} mismatches (showing up to 100 accounts); "
+                      f"run with --repair to rebuild")
+                sys.exit(1)
+            print("✅ account_totals is consistent with the ledger")
+    finally:
+        conn.close()
@@ -0,0 +1,59 @@
+import logging
+from contextlib import asynccontextmanager
+
+from psycopg_pool import AsyncConnectionPool
+
+from app.database.db_init import DB_CONFIG, POOL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_async_pool = None
+
+
+def _connection_kwargs():
+    # psycopg 3 uses the libpq keyword "dbname"
+    kwargs = dict(DB_CONFIG)
+    kwargs["dbname"] = kwargs.pop("database")
+    return kwargs
+
+
+async def open_async_pool():
+    """Open the process-wide async connection pool (called at FastAPI startup)."""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncConnectionPool(
+            kwargs=_connection_kwargs(),
+            min_size=POOL_CONFIG["min_size"],
+            max_size=POOL_CONFIG["max_size"],
+            max_lifetime=POOL_CONFIG["max_lifetime"],
+            timeout=POOL_CONFIG["timeout"],
+            check=AsyncConnectionPool.check_connection,
+            name="divhacks-async",
+            open=False,
+        )
+        # Don't block startup on the database; the pool keeps reconnecting
+        await _async_pool.open(wait=False)
+        logger.info("Async connection pool opened")
+    return _async_pool
+
+
+async def close_async_pool():
+    """Close the process-wide async connection pool (called at FastAPI shutdown)."""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_async_pool():
+    """Return the open async pool, or None when running in sync mode."""
+    return _async_pool
+
+
+@asynccontextmanager
+async def get_async_db_connection():
+    """Async counterpart of get_db_connection(); requires open_async_pool()."""
+    if _async_pool is None:
+        raise RuntimeError("Async connection pool is not open (set DB_ACCESS_MODE=async)")
+    async with _async_pool.connection() as conn:
+        yield conn
@@ -0,0 +1,214 @@
+"""
+Bulk loading for the Nessie ingest.
+
+Records are validated and normalized in Python, streamed into a temporary
+staging table with COPY FROM STDIN, checked against their foreign keys
+there, and merged into the target with one INSERT ... SELECT ... ON
+CONFLICT: existing ids are left alone, or with update=True overwritten
+where any column differs. A record that fails any check goes to ingest_rejects
+(migration 007) with the reason, instead of aborting the load or throwing
+away the rows before it.
+
+The caller owns the transaction: nothing is committed here. The staging
+table is dropped once merged, or with the transaction if anything fails.
+"""
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from psycopg2.extras import execute_values
+
+COPY_CHUNK_BYTES = 1 << 20
+
+
+class Reject(ValueError):
+    """Raised by a row normalizer; the message is stored as the reject reason."""
+
+
+# === FIELD NORMALIZERS ===
+
+def record_id(record):
+    value = record.get("_id")
+    if value is None or value == "":
+        raise Reject("missing _id")
+    return str(value)
+
+
+def text(record, field):
+    value = record.get(field)
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        raise Reject(f"{field} is not a scalar")
+    return str(value)
+
+
+def number(record, field):
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise Reject(f"{field} is not a number: {value!r}")
+    try:
+        result = Decimal(str(value))
+    except InvalidOperation:
+        raise Reject(f"{field} is not a number: {value!r}")
+    if not result.is_finite():
+        raise Reject(f"{field} is not a number: {value!r}")
+    return result
+
+
+def timestamp(record, field, fix=None):
+    """ISO timestamp string or None; `fix` repairs known upstream quirks first."""
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    if fix is not None:
+        value = fix(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).isoformat()
+    except ValueError:
+        raise Reject(f"{field} is not a timestamp: {value!r}")
+
+
+# === COPY ===
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class _CopyStream(io.TextIOBase):
+    """File-like view of an iterable of rows in COPY text format, built as COPY reads it."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = COPY_CHUNK_BYTES
+        lines = [self._buffer]
+        length = len(self._buffer)
+        for row in self._rows:
+            line = "\t".join(_copy_value(v) for v in row) + "\n"
+            lines.append(line)
+            length += len(line)
+            if length >= size:
+                break
+        data = "".join(lines)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def _normalized(records, normalize, rejects):
+    """Rows from normalize(record), skipping rejects and repeated ids (first one wins)."""
+    seen = set()
+    for record in records:
+        if not isinstance(record, dict):
+            rejects.append((None, "not an object", record))
+            continue
+        try:
+            row = normalize(record)
+        except Reject as e:
+            rejects.append((record.get("_id"), str(e), record))
+            continue
+        if row[0] in seen:
+            rejects.append((row[0], "duplicate _id in payload", record))
+            continue
+        seen.add(row[0])
+        yield row
+
+
+def save_rejects(cur, entity, rejects):
+    if rejects:
+        execute_values(cur, """
+            INSERT INTO ingest_rejects (entity, record_id, reason, record) VALUES %s
+        """, [(entity, rid if rid is None else str(rid), reason, json.dumps(record, default=str))
+              for rid, reason, record in rejects])
+
+
+def bulk_load(conn, table, columns, records, normalize, foreign_keys=(), returning="id", update=False):
+    """
+    Load raw API `records` into `table` (primary key `id`, first of
+    `columns`). normalize(record) returns a tuple matching columns or
+    raises Reject. foreign_keys is [(column, parent table)], checked
+    against parent.id. Existing ids are left untouched, unless `update`:
+    then the ones whose columns changed are overwritten.
+
+    Returns {"loaded", "updated", "existing", "rejected", "orphans",
+    "rows"}, where existing counts rows already present and left as they
+    were, orphans is [(column, parent, rows, missing parent ids)] for the
+    foreign keys that rejected any, and rows are the `returning` columns
+    of the rows inserted or updated.
+    """
+    stage = f"stage_{table}"
+    column_list = ", ".join(columns)
+    cur = conn.cursor()
+    cur.execute(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA")
+
+    rejects = []
+    cur.copy_expert(f"COPY {stage} ({column_list}) FROM STDIN",
+                    _CopyStream(_normalized(records, normalize, rejects)), size=COPY_CHUNK_BYTES)
+    staged = cur.rowcount
+    save_rejects(cur, table, rejects)
+    rejected = len(rejects)
+
+    # Orphans are counted per foreign key, with the parent ids they miss,
+    # so a load can say which parents are absent rather than list each row
+    orphans = []
+    for column, parent in foreign_keys:
+        cur.execute(f"""
+            WITH orphans AS (
+                DELETE FROM {stage} s
+                WHERE s.{column} IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.id = s.{column})
+                RETURNING s.*
+            ), saved AS (
+                INSERT INTO ingest_rejects (entity, record_id, reason, record)
+                SELECT %s, o.id, %s, to_jsonb(o) FROM orphans o
+            )
+            SELECT COUNT(*), ARRAY_AGG(DISTINCT {column}) FROM orphans
+        """, (table, f"{column} not in {parent}"))
+        count, missing = cur.fetchone()
+        if count:
+            orphans.append((column, parent, count, missing))
+            rejected += count
+            staged -= count
+
+    if update:
+        cur.execute(f"SELECT COUNT(*) FROM {stage} s WHERE EXISTS (SELECT 1 FROM {table} t WHERE t.id = s.id)")
+        present = cur.fetchone()[0]
+        # Rewriting an unchanged row would still fire the triggers and bloat the table
+        values = ", ".join(columns[1:])
+        excluded = ", ".join(f"EXCLUDED.{c}" for c in columns[1:])
+        current = ", ".join(f"{table}.{c}" for c in columns[1:])
+        conflict = f"""DO UPDATE SET ({values}) = ROW({excluded})
+            WHERE ROW({current}) IS DISTINCT FROM ROW({excluded})"""
+    else:
+        present = None
+        conflict = "DO NOTHING"
+
+    cur.execute(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT {column_list} FROM {stage}
+        ON CONFLICT (id) {conflict}
+        RETURNING {returning}
+    """)
+    rows = cur.fetchall()
+    cur.execute(f"DROP TABLE {stage}")
+
+    if present is None:
+        loaded, updated, existing = len(rows), 0, staged - len(rows)
+    else:
+        loaded = staged - present
+        updated = len(rows) - loaded
+        existing = present - updated
+    return {"loaded": loaded, "updated": updated, "existing": existing, "rejected": rejected,
+            "orphans": orphans, "rows": rows}
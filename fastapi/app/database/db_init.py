@@ -2,6 +2,8 @@ import os
 import psycopg2
 from psycopg2.extras import execute_batch
 from contextlib import contextmanager
+from app.database.pool import ConnectionPool
+from app.database.migrations import apply_migrations
 
 # PostgreSQL connection configuration (from docker-compose.yaml)
 DB_CONFIG = {
@@ -12,10 +14,33 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "divhacks2025")
 }
 
+# Connection pool settings (used by the API process; CLI scripts connect directly)
+POOL_CONFIG = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    "check_idle": float(os.getenv("DB_POOL_CHECK_IDLE", "30")),
+}
+
+_pool = None
+
 def init_schema():
     conn = psycopg2.connect(**DB_CONFIG)
     cur = conn.cursor()
 
+    create_tables(cur)
+    conn.commit()
+
+    # Indexes and later schema changes are versioned migrations
+    apply_migrations(conn)
+
+    conn.close()
+    print("✅ PostgreSQL schema initialized")
+
+
+def create_tables(cur):
+    """Create the base tables (in the current search_path) if missing."""
     cur.execute("""
         CREATE TABLE IF NOT EXISTS customers (
             id TEXT PRIMARY KEY,
@@ -114,13 +139,42 @@ def init_schema():
         );
     """)
 
-    conn.commit()
-    conn.close()
-    print("✅ PostgreSQL schema initialized")
+
+def open_pool():
+    """Open the process-wide connection pool (called at FastAPI startup)."""
+    global _pool
+    if _pool is None or _pool.closed:
+        _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+        _pool.open()
+    return _pool
+
+
+def close_pool():
+    """Close the process-wide connection pool (called at FastAPI shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def get_pool():
+    """Return the open pool, or None when running without one."""
+    return _pool
+
 
 @contextmanager
 def get_db_connection():
-    """Context manager for safely opening and closing a DB connection."""
+    """
+    Context manager for safely obtaining a DB connection.
+
+    Borrows from the pool when it is open, otherwise opens and closes
+    a dedicated connection (scripts, one-off jobs).
+    """
+    if _pool is not None and not _pool.closed:
+        with _pool.connection() as conn:
+            yield conn
+        return
+
     conn = psycopg2.connect(**DB_CONFIG)
     try:
         yield conn
@@ -0,0 +1,201 @@
+"""
+EXPLAIN-based index regression check.
+
+Builds a throwaway schema with the production tables and migrations,
+fills it with a large synthetic dataset, then EXPLAINs every router query
+and fails if any of them plans a sequential scan on a transaction table.
+
+    python3 -m app.database.explain_check [--accounts 50000] [--rows 500000]
+
+Exits with status 1 when a query regresses to a Seq Scan.
+"""
+import sys
+import argparse
+import psycopg2
+from datetime import datetime, timezone
+
+from app.database.db_init import DB_CONFIG, create_tables
+from app.database.migrations import apply_migrations
+from app.database import account_queries as q
+from app.routers.forecasting import BALANCE_HISTORY_QUERY, AGGREGATE_DEPOSITS_QUERY
+from app.transfer_graph.store import CHANGED_QUERY
+from app.transfer_graph.incremental import PAYERS_QUERY, OUT_EDGES_QUERY, OUT_EDGES_INTO_QUERY
+
+CHECK_SCHEMA = "explain_check"
+
+# Tables large enough that a Seq Scan on them is always a regression
+CHECKED_TABLES = {"accounts", "deposits", "withdrawals", "transfers", "ledger", "account_totals"}
+
+
+def populate(cur, n_accounts, n_rows):
+    """Fill the check schema with synthetic customers, accounts and transactions."""
+    cur.execute("""
+        INSERT INTO customers (id, first_name, last_name)
+        SELECT 'cust_' || g, 'First' || g, 'Last' || g
+        FROM generate_series(1, %s) g
+    """, (n_accounts,))
+
+    cur.execute("""
+        INSERT INTO accounts (id, customer_id, type, nickname, balance, rewards)
+        SELECT 'acct_' || g, 'cust_' || g,
+               (ARRAY['Checking', 'Savings', 'Credit Card'])[1 + g %% 3],
+               'Account ' || g, round((random() * 100000)::numeric, 2), 0
+        FROM generate_series(1, %s) g
+    """, (n_accounts,))
+
+    # 1% undated, 90% settled, the rest pending/cancelled
+    random_account = "'acct_' || (1 + floor(random() * %(accounts)s))::int"
+    random_date = "CASE WHEN random() < 0.01 THEN NULL ELSE now() - random() * INTERVAL '730 days' END"
+    random_status = """(CASE WHEN r < 0.45 THEN 'completed' WHEN r < 0.90 THEN 'executed'
+                             WHEN r < 0.95 THEN 'pending' ELSE 'cancelled' END)"""
+    params = {"accounts": n_accounts, "rows": n_rows}
+
+    cur.execute(f"""
+        INSERT INTO deposits (id, account_id, type, amount, payee_id, description, medium, transaction_date, status)
+        SELECT 'dep_' || g, NULL, 'deposit', round((random() * 1000)::numeric, 2),
+               {random_account}, 'synthetic', 'balance', {random_date}, {random_status}
+        FROM (SELECT g, random() AS r FROM generate_series(1, %(rows)s) g) s
+    """, params)
+
+    cur.execute(f"""
+        INSERT INTO withdrawals (id, account_id, type, amount, payer_id, description, medium, transaction_date, status)
+        SELECT 'wd_' || g, a, 'withdrawal', round((random() * 1000)::numeric, 2),
+               a, 'synthetic', 'balance', {random_date}, {random_status}
+        FROM (SELECT g, random() AS r, {random_account} AS a FROM generate_series(1, %(rows)s) g) s
+    """, params)
+
+    cur.execute(f"""
+        INSERT INTO transfers (id, account_id, type, amount, payer_id, payee_id, description, medium,
+                               transaction_date, status)
+        SELECT 'tr_' || g, payer, 'p2p', round((random() * 1000)::numeric, 2),
+               payer, {random_account}, 'synthetic', 'balance', {random_date}, {random_status}
+        FROM (SELECT g, random() AS r, {random_account} AS payer FROM generate_series(1, %(rows)s) g) s
+    """, params)
+
+
+def router_queries(account_id, customer_id):
+    """(name, sql, params) for every query the routers issue against these tables."""
+    queries = []
+
+    (count_sql, count_params), (page_sql, page_params) = q.build_accounts_queries(customer_id=customer_id)
+    queries.append(("accounts: count by customer", count_sql, count_params))
+    queries.append(("accounts: page by customer", page_sql, page_params))
+    (_, _), (page_sql, page_params) = q.build_accounts_queries(limit=100, offset=0)
+    queries.append(("accounts: page by balance", page_sql, page_params))
+    queries.append(("accounts: by id", q.ACCOUNT_BY_ID_QUERY, [account_id]))
+
+    (count_sql, count_params), (page_sql, page_params) = q.build_transaction_queries(account_id)
+    queries.append(("transactions: count", count_sql, count_params))
+    queries.append(("transactions: offset page", page_sql, page_params))
+    (count_sql, count_params), (page_sql, page_params) = q.build_transaction_queries(account_id, status="completed")
+    queries.append(("transactions: count by status", count_sql, count_params))
+    queries.append(("transactions: offset page by status", page_sql, page_params))
+
+    page_sql, page_params = q.build_transaction_keyset_query(account_id)
+    queries.append(("transactions: cursor first page", page_sql, page_params))
+    page_sql, page_params = q.build_transaction_keyset_query(
+        account_id, after=(None, "transfer_in", "tr_1")
+    )
+    queries.append(("transactions: cursor undated tail", page_sql, page_params))
+
+    sql, params = q.build_recent_activity_query(account_id, 30)
+    queries.append(("recent activity", sql, params))
+    queries.append(("transaction summary: totals", q.ACCOUNT_TOTALS_QUERY, [account_id]))
+    sql, params = q.build_transaction_summary_query(account_id)
+    queries.append(("transaction summary: rows", sql, params))
+
+    queries.append(("forecast: account balance history", BALANCE_HISTORY_QUERY, [account_id]))
+    queries.append(("forecast: aggregate deposits", AGGREGATE_DEPOSITS_QUERY, []))
+
+    # Background refresh of the in-memory transfer graph
+    queries.append(("transfer graph: changed transfers", CHANGED_QUERY, [datetime.now(timezone.utc)]))
+
+    # Cycle detection during a bulk ingest, one query per neighbourhood level
+    accounts = [account_id, f"acct_{account_id[5:]}1", f"acct_{account_id[5:]}2"]
+    queries.append(("ingest cycle check: payers", PAYERS_QUERY, [accounts, 0.0]))
+    queries.append(("ingest cycle check: out edges", OUT_EDGES_QUERY, [accounts, 0.0]))
+    queries.append(("ingest cycle check: out edges into ball", OUT_EDGES_INTO_QUERY, [accounts, accounts, 0.0]))
+
+    return queries
+
+
+def seq_scans(plan):
+    """Yield relation names of Seq Scan nodes on checked tables in a JSON plan tree."""
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+def deep_cursor(cur, account_id):
+    """Cursor halfway down the account's history, for a deep-page EXPLAIN."""
+    sql, params = q.build_transaction_keyset_query(account_id, limit=1000)
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    if not rows:
+        return None
+    last = rows[len(rows) // 2]
+    return last[4], last[0], last[1]
+
+
+def run_check(n_accounts, n_rows, keep=False):
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+
+    failures = []
+    try:
+        print(f"→ building {CHECK_SCHEMA} schema ({n_accounts} accounts, {n_rows} rows per table)")
+        cur.execute(f"DROP SCHEMA IF EXISTS {CHECK_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {CHECK_SCHEMA}")
+        cur.execute(f"SET search_path TO {CHECK_SCHEMA}")
+
+        create_tables(cur)
+        conn.commit()
+        apply_migrations(conn)
+        populate(cur, n_accounts, n_rows)
+        conn.commit()
+
+        conn.autocommit = True  # VACUUM can't run inside a transaction
+        for table in ("customers", "accounts", "deposits", "withdrawals", "transfers", "ledger",
+                      "account_totals"):
+            cur.execute(f"VACUUM ANALYZE {table}")
+
+        account_id = f"acct_{n_accounts // 2}"
+        queries = router_queries(account_id, f"cust_{n_accounts // 2}")
+
+        after = deep_cursor(cur, account_id)
+        if after:
+            sql, params = q.build_transaction_keyset_query(account_id, after=after)
+            queries.append(("transactions: cursor deep page", sql, params))
+
+        for name, sql, params in queries:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cur.fetchone()[0][0]["Plan"]
+            scanned = sorted(set(seq_scans(plan)))
+            if scanned:
+                failures.append(name)
+                print(f"❌ {name}: Seq Scan on {', '.join(scanned)}")
+            else:
+                print(f"✅ {name}: {plan['Node Type']}, est. cost {plan['Total Cost']:.0f}")
+    finally:
+        if not keep:
+            conn.rollback()
+            conn.autocommit = True
+            cur.execute(f"DROP SCHEMA IF EXISTS {CHECK_SCHEMA} CASCADE")
+        conn.close()
+
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if any router query plans a Seq Scan")
+    parser.add_argument("--accounts", type=int, default=50000)
+    parser.add_argument("--rows", type=int, default=500000, help="Rows per transaction table")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {CHECK_SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    failures = run_check(args.accounts, args.rows, args.keep)
+    if failures:
+        print(f"{len(failures)} queries fell back to a sequential scan")
+        sys.exit(1)
+    print("All router queries use indexes")
@@ -0,0 +1,153 @@
+"""
+Incremental parser for Nessie response bodies.
+
+A body is either a bare array of records or an object with the records
+under "results" (plus "paging" and the like). RecordParser takes the body
+as text in chunks of any size and hands back each record as soon as its
+closing brace has arrived. It never holds more than one unfinished record
+and the current chunk, however long the array is.
+
+Records and other values are decoded by json's C scanner (raw_decode); only
+the punctuation between them is walked here.
+"""
+import json
+
+# One record this size still incomplete means a broken body, not a slow one
+MAX_PENDING_CHARS = 16 << 20
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_AFTER_NUMBER = _WHITESPACE + ",]}"
+_MORE = object()
+
+
+class RecordParser:
+    """feed() text as it arrives and get back the records it completed; close() at the end."""
+
+    def __init__(self, records_key="results"):
+        self.records_key = records_key
+        self.fields = {}  # every top-level value other than the records
+        self._buffer = ""
+        self._pos = 0
+        self._offset = 0  # of _buffer[0] in the whole body
+        self._state = "start"
+        self._key = None
+        self._top_level_array = False
+        self._records = []
+
+    @property
+    def next_page(self):
+        return (self.fields.get("paging") or {}).get("next")
+
+    def feed(self, text):
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        self._parse(final=False)
+        records, self._records = self._records, []
+        return records
+
+    def close(self):
+        """Records still pending at the end of the body; raises ValueError if it was cut short."""
+        self._parse(final=True)
+        if self._state != "end":
+            raise ValueError("Nessie response body ended early")
+        records, self._records = self._records, []
+        return records
+
+    def _skip_whitespace(self):
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return pos
+
+    def _value(self, pos, final):
+        try:
+            value, end = _decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final or len(self._buffer) - pos > MAX_PENDING_CHARS:
+                raise
+            return _MORE
+        # A number cut by the end of the chunk ("12", "1.", "1e") parses short;
+        # only trust it once the character after it has arrived
+        if (isinstance(value, (int, float)) and not final
+                and (end == len(self._buffer) or self._buffer[end] not in _AFTER_NUMBER)):
+            return _MORE
+        self._pos = end
+        return value
+
+    def _end_of_records(self):
+        return "end" if self._top_level_array else "after_value"
+
+    def _parse(self, final):
+        while self._state != "end":
+            pos = self._skip_whitespace()
+            if pos == len(self._buffer):
+                return
+            c, state = self._buffer[pos], self._state
+
+            if state == "start":
+                if c == "[":
+                    self._top_level_array = True
+                    self._state = "records"
+                elif c == "{":
+                    self._state = "key"
+                else:
+                    raise ValueError(f"Nessie response body starts with {c!r}")
+                self._pos = pos + 1
+
+            elif state == "key":
+                if c == "}":
+                    self._pos, self._state = pos + 1, "end"
+                    continue
+                key = self._value(pos, final)
+                if key is _MORE:
+                    return
+                if not isinstance(key, str):
+                    raise ValueError(f"expected an object key at offset {self._offset + pos}")
+                self._key, self._state = key, "colon"
+
+            elif state == "colon":
+                if c != ":":
+                    raise ValueError(f"expected ':' at offset {self._offset + pos}")
+                self._pos = pos + 1
+                self._state = "records_open" if self._key == self.records_key else "value"
+
+            elif state == "records_open" and c == "[":
+                self._pos, self._state = pos + 1, "records"
+
+            elif state in ("value", "records_open"):
+                value = self._value(pos, final)
+                if value is _MORE:
+                    return
+                self.fields[self._key] = value
+                self._state = "after_value"
+
+            elif state == "after_value":
+                if c == ",":
+                    self._state = "key"
+                elif c == "}":
+                    self._state = "end"
+                else:
+                    raise ValueError(f"expected ',' or '}}' at offset {self._offset + pos}")
+                self._pos = pos + 1
+
+            elif state == "records":
+                if c == "]":
+                    self._pos, self._state = pos + 1, self._end_of_records()
+                    continue
+                record = self._value(pos, final)
+                if record is _MORE:
+                    return
+                self._records.append(record)
+                self._state = "after_record"
+
+            elif state == "after_record":
+                if c == ",":
+                    self._state = "records"
+                elif c == "]":
+                    self._state = self._end_of_records()
+                else:
+                    raise ValueError(f"expected ',' or ']' at offset {self._offset + pos}")
+                self._pos = pos + 1
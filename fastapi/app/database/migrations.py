@@ -0,0 +1,588 @@
+"""
+Versioned schema migrations.
+
+Each migration is (version, name, [statements]) and runs at most once per
+database, recorded in schema_migrations. init_schema() applies pending
+migrations after creating the base tables; they can also be applied on
+their own with:
+
+    python3 -m app.database.migrations
+"""
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent starters don't race
+MIGRATION_LOCK_ID = 872031
+
+MIGRATIONS = [
+    (1, "transaction_access_indexes", [
+        # --- accounts ---
+        "CREATE INDEX IF NOT EXISTS idx_accounts_customer_id ON accounts (customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_balance ON accounts (balance DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_bills_account_id ON bills (account_id)",
+
+        # --- per-account history (transactions page, keyset seek, counts) ---
+        # ASC NULLS FIRST scanned backwards yields transaction_date DESC NULLS LAST, id DESC
+        """CREATE INDEX IF NOT EXISTS idx_deposits_account_date
+           ON deposits (account_id, transaction_date NULLS FIRST, id)""",
+        """CREATE INDEX IF NOT EXISTS idx_withdrawals_account_date
+           ON withdrawals (account_id, transaction_date NULLS FIRST, id)""",
+        """CREATE INDEX IF NOT EXISTS idx_withdrawals_payer_date
+           ON withdrawals (payer_id, transaction_date NULLS FIRST, id)""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_payer_date
+           ON transfers (payer_id, transaction_date NULLS FIRST, id)""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_payee_date
+           ON transfers (payee_id, transaction_date NULLS FIRST, id)""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_account_date
+           ON transfers (account_id, transaction_date NULLS FIRST, id)""",
+
+        # --- settled history (recent activity, summary, forecasts) ---
+        """CREATE INDEX IF NOT EXISTS idx_deposits_account_date_settled
+           ON deposits (account_id, transaction_date DESC) INCLUDE (amount)
+           WHERE status IN ('completed', 'executed')""",
+        """CREATE INDEX IF NOT EXISTS idx_withdrawals_account_date_settled
+           ON withdrawals (account_id, transaction_date DESC) INCLUDE (amount)
+           WHERE status IN ('completed', 'executed')""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_payer_date_settled
+           ON transfers (payer_id, transaction_date DESC) INCLUDE (amount)
+           WHERE status IN ('completed', 'executed')""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_payee_date_settled
+           ON transfers (payee_id, transaction_date DESC) INCLUDE (amount)
+           WHERE status IN ('completed', 'executed')""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_account_date_settled
+           ON transfers (account_id, transaction_date DESC) INCLUDE (amount)
+           WHERE status IN ('completed', 'executed')""",
+
+        # --- bank-wide daily deposits (aggregate forecast) ---
+        """CREATE INDEX IF NOT EXISTS idx_deposits_executed_date
+           ON deposits (transaction_date) INCLUDE (amount)
+           WHERE status = 'executed'""",
+
+        # --- fraud chains follow completed transfers by account ---
+        """CREATE INDEX IF NOT EXISTS idx_transfers_completed_account
+           ON transfers (account_id) INCLUDE (payer_id, amount)
+           WHERE status = 'completed'""",
+    ]),
+
+    (2, "transaction_ledger", [
+        # One row per account-side of every deposit, withdrawal and transfer
+        # (a transfer yields a transfer_out and a transfer_in entry)
+        """CREATE TABLE IF NOT EXISTS ledger (
+            source_table TEXT NOT NULL,
+            source_id TEXT NOT NULL,
+            entry_type TEXT COLLATE "C" NOT NULL,
+            account_id TEXT NOT NULL,
+            direction TEXT NOT NULL CHECK (direction IN ('credit', 'debit')),
+            amount NUMERIC,
+            signed_amount NUMERIC,
+            counterparty TEXT,
+            transaction_date TIMESTAMP,
+            status TEXT,
+            description TEXT,
+            medium TEXT,
+            PRIMARY KEY (source_table, source_id, entry_type)
+        )""",
+
+        # Triggers keep the ledger in step with every insert/update/delete
+        """CREATE OR REPLACE FUNCTION ledger_sync_deposit() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger WHERE source_table = 'deposits' AND source_id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.account_id IS NOT NULL THEN
+                INSERT INTO ledger VALUES ('deposits', NEW.id, 'deposit', NEW.account_id, 'credit',
+                    NEW.amount, NEW.amount, NEW.payee_id, NEW.transaction_date, NEW.status,
+                    NEW.description, NEW.medium);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION ledger_sync_withdrawal() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger WHERE source_table = 'withdrawals' AND source_id = OLD.id;
+            END IF;
+            -- Nessie withdrawals only carry payer_id
+            IF TG_OP IN ('INSERT', 'UPDATE') AND COALESCE(NEW.account_id, NEW.payer_id) IS NOT NULL THEN
+                INSERT INTO ledger VALUES ('withdrawals', NEW.id, 'withdrawal',
+                    COALESCE(NEW.account_id, NEW.payer_id), 'debit',
+                    NEW.amount, -NEW.amount, NEW.payer_id, NEW.transaction_date, NEW.status,
+                    NEW.description, NEW.medium);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION ledger_sync_transfer() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger WHERE source_table = 'transfers' AND source_id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                IF NEW.payer_id IS NOT NULL THEN
+                    INSERT INTO ledger VALUES ('transfers', NEW.id, 'transfer_out', NEW.payer_id, 'debit',
+                        NEW.amount, -NEW.amount, NEW.payee_id, NEW.transaction_date, NEW.status,
+                        NEW.description, NEW.medium);
+                END IF;
+                IF NEW.payee_id IS NOT NULL THEN
+                    INSERT INTO ledger VALUES ('transfers', NEW.id, 'transfer_in', NEW.payee_id, 'credit',
+                        NEW.amount, NEW.amount, NEW.payer_id, NEW.transaction_date, NEW.status,
+                        NEW.description, NEW.medium);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS deposits_ledger_sync ON deposits",
+        """CREATE TRIGGER deposits_ledger_sync AFTER INSERT OR UPDATE OR DELETE ON deposits
+           FOR EACH ROW EXECUTE FUNCTION ledger_sync_deposit()""",
+        "DROP TRIGGER IF EXISTS withdrawals_ledger_sync ON withdrawals",
+        """CREATE TRIGGER withdrawals_ledger_sync AFTER INSERT OR UPDATE OR DELETE ON withdrawals
+           FOR EACH ROW EXECUTE FUNCTION ledger_sync_withdrawal()""",
+        "DROP TRIGGER IF EXISTS transfers_ledger_sync ON transfers",
+        """CREATE TRIGGER transfers_ledger_sync AFTER INSERT OR UPDATE OR DELETE ON transfers
+           FOR EACH ROW EXECUTE FUNCTION ledger_sync_transfer()""",
+
+        # Backfill rows ingested before the ledger existed
+        """INSERT INTO ledger
+           SELECT 'deposits', id, 'deposit', account_id, 'credit', amount, amount, payee_id,
+                  transaction_date, status, description, medium
+           FROM deposits WHERE account_id IS NOT NULL
+           ON CONFLICT DO NOTHING""",
+        """INSERT INTO ledger
+           SELECT 'withdrawals', id, 'withdrawal', COALESCE(account_id, payer_id), 'debit', amount, -amount,
+                  payer_id, transaction_date, status, description, medium
+           FROM withdrawals WHERE COALESCE(account_id, payer_id) IS NOT NULL
+           ON CONFLICT DO NOTHING""",
+        """INSERT INTO ledger
+           SELECT 'transfers', id, 'transfer_out', payer_id, 'debit', amount, -amount, payee_id,
+                  transaction_date, status, description, medium
+           FROM transfers WHERE payer_id IS NOT NULL
+           ON CONFLICT DO NOTHING""",
+        """INSERT INTO ledger
+           SELECT 'transfers', id, 'transfer_in', payee_id, 'credit', amount, amount, payer_id,
+                  transaction_date, status, description, medium
+           FROM transfers WHERE payee_id IS NOT NULL
+           ON CONFLICT DO NOTHING""",
+
+        # History page / keyset seek: read backwards this is
+        # (transaction_date DESC NULLS LAST, entry_type DESC, source_id DESC)
+        """CREATE INDEX IF NOT EXISTS idx_ledger_account_history
+           ON ledger (account_id, transaction_date NULLS FIRST, entry_type, source_id)""",
+        # Settled entries: recent activity, summaries, balance forecasts
+        """CREATE INDEX IF NOT EXISTS idx_ledger_account_settled
+           ON ledger (account_id, transaction_date DESC) INCLUDE (signed_amount, entry_type)
+           WHERE status IN ('completed', 'executed')""",
+        # Bank-wide daily deposits (aggregate forecast)
+        """CREATE INDEX IF NOT EXISTS idx_ledger_executed_deposits
+           ON ledger (transaction_date) INCLUDE (amount)
+           WHERE entry_type = 'deposit' AND status = 'executed'""",
+    ]),
+
+    (3, "account_totals", [
+        # Running per-account totals over settled ledger entries. Maintained
+        # incrementally by statement-level triggers on ledger; rebuild or
+        # verify with: python3 -m app.database.account_totals --repair/--check
+        """CREATE TABLE IF NOT EXISTS account_totals (
+            account_id TEXT PRIMARY KEY,
+            total_deposits NUMERIC NOT NULL DEFAULT 0,
+            total_withdrawals NUMERIC NOT NULL DEFAULT 0,
+            total_transfers_in NUMERIC NOT NULL DEFAULT 0,
+            total_transfers_out NUMERIC NOT NULL DEFAULT 0,
+            calculated_balance NUMERIC NOT NULL DEFAULT 0,
+            transaction_count BIGINT NOT NULL DEFAULT 0,
+            last_transaction_at TIMESTAMP,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )""",
+
+        # Block ledger writes until the backfill and triggers are in place
+        "LOCK TABLE ledger IN SHARE ROW EXCLUSIVE MODE",
+
+        # last_transaction_at only moves forward; deletes leave it as is
+        """CREATE OR REPLACE FUNCTION account_totals_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO account_totals AS t (account_id, total_deposits, total_withdrawals,
+                    total_transfers_in, total_transfers_out, calculated_balance,
+                    transaction_count, last_transaction_at)
+                SELECT account_id,
+                       COALESCE(SUM(amount) FILTER (WHERE entry_type = 'deposit'), 0),
+                       COALESCE(SUM(amount) FILTER (WHERE entry_type = 'withdrawal'), 0),
+                       COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_in'), 0),
+                       COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_out'), 0),
+                       COALESCE(SUM(signed_amount), 0),
+                       COUNT(*),
+                       MAX(transaction_date)
+                FROM new_rows
+                WHERE status IN ('completed', 'executed')
+                GROUP BY account_id
+                ON CONFLICT (account_id) DO UPDATE SET
+                    total_deposits = t.total_deposits + EXCLUDED.total_deposits,
+                    total_withdrawals = t.total_withdrawals + EXCLUDED.total_withdrawals,
+                    total_transfers_in = t.total_transfers_in + EXCLUDED.total_transfers_in,
+                    total_transfers_out = t.total_transfers_out + EXCLUDED.total_transfers_out,
+                    calculated_balance = t.calculated_balance + EXCLUDED.calculated_balance,
+                    transaction_count = t.transaction_count + EXCLUDED.transaction_count,
+                    last_transaction_at = GREATEST(t.last_transaction_at, EXCLUDED.last_transaction_at),
+                    updated_at = now();
+            END IF;
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                INSERT INTO account_totals AS t (account_id, total_deposits, total_withdrawals,
+                    total_transfers_in, total_transfers_out, calculated_balance,
+                    transaction_count, last_transaction_at)
+                SELECT account_id,
+                       -COALESCE(SUM(amount) FILTER (WHERE entry_type = 'deposit'), 0),
+                       -COALESCE(SUM(amount) FILTER (WHERE entry_type = 'withdrawal'), 0),
+                       -COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_in'), 0),
+                       -COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_out'), 0),
+                       -COALESCE(SUM(signed_amount), 0),
+                       -COUNT(*),
+                       NULL::timestamp
+                FROM old_rows
+                WHERE status IN ('completed', 'executed')
+                GROUP BY account_id
+                ON CONFLICT (account_id) DO UPDATE SET
+                    total_deposits = t.total_deposits + EXCLUDED.total_deposits,
+                    total_withdrawals = t.total_withdrawals + EXCLUDED.total_withdrawals,
+                    total_transfers_in = t.total_transfers_in + EXCLUDED.total_transfers_in,
+                    total_transfers_out = t.total_transfers_out + EXCLUDED.total_transfers_out,
+                    calculated_balance = t.calculated_balance + EXCLUDED.calculated_balance,
+                    transaction_count = t.transaction_count + EXCLUDED.transaction_count,
+                    last_transaction_at = GREATEST(t.last_transaction_at, EXCLUDED.last_transaction_at),
+                    updated_at = now();
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS ledger_totals_insert ON ledger",
+        """CREATE TRIGGER ledger_totals_insert AFTER INSERT ON ledger
+           REFERENCING NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION account_totals_apply()""",
+        "DROP TRIGGER IF EXISTS ledger_totals_update ON ledger",
+        """CREATE TRIGGER ledger_totals_update AFTER UPDATE ON ledger
+           REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION account_totals_apply()""",
+        "DROP TRIGGER IF EXISTS ledger_totals_delete ON ledger",
+        """CREATE TRIGGER ledger_totals_delete AFTER DELETE ON ledger
+           REFERENCING OLD TABLE AS old_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION account_totals_apply()""",
+
+        # Backfill from the existing ledger
+        """INSERT INTO account_totals (account_id, total_deposits, total_withdrawals,
+               total_transfers_in, total_transfers_out, calculated_balance,
+               transaction_count, last_transaction_at)
+           SELECT account_id,
+                  COALESCE(SUM(amount) FILTER (WHERE entry_type = 'deposit'), 0),
+                  COALESCE(SUM(amount) FILTER (WHERE entry_type = 'withdrawal'), 0),
+                  COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_in'), 0),
+                  COALESCE(SUM(amount) FILTER (WHERE entry_type = 'transfer_out'), 0),
+                  COALESCE(SUM(signed_amount), 0),
+                  COUNT(*),
+                  MAX(transaction_date)
+           FROM ledger
+           WHERE status IN ('completed', 'executed')
+           GROUP BY account_id
+           ON CONFLICT (account_id) DO NOTHING""",
+    ]),
+
+    (4, "transfer_change_tracking", [
+        # Change feed for the in-memory transfer graph (app/transfer_graph):
+        # modified_at marks inserts/updates, transfer_tombstones records deletes
+        "ALTER TABLE transfers ADD COLUMN IF NOT EXISTS modified_at TIMESTAMPTZ NOT NULL DEFAULT now()",
+        """CREATE TABLE IF NOT EXISTS transfer_tombstones (
+            id TEXT PRIMARY KEY,
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+        )""",
+        """CREATE OR REPLACE FUNCTION transfers_track_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO transfer_tombstones (id) VALUES (OLD.id)
+                ON CONFLICT (id) DO UPDATE SET deleted_at = clock_timestamp();
+                RETURN OLD;
+            END IF;
+            NEW.modified_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS transfers_track_change ON transfers",
+        """CREATE TRIGGER transfers_track_change BEFORE INSERT OR UPDATE OR DELETE ON transfers
+           FOR EACH ROW EXECUTE FUNCTION transfers_track_change()""",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_modified_at ON transfers (modified_at)",
+        "CREATE INDEX IF NOT EXISTS idx_transfer_tombstones_deleted_at ON transfer_tombstones (deleted_at)",
+    ]),
+
+    (5, "fraud_alerts", [
+        # Circular chains found by the incremental detector, one row per cycle.
+        # cycle_key is the cycle's transfer ids rotated to start at the smallest,
+        # so the same ring is stored once however it was reached
+        """CREATE TABLE IF NOT EXISTS fraud_alerts (
+            id BIGSERIAL PRIMARY KEY,
+            cycle_key TEXT NOT NULL UNIQUE,
+            trigger_transfer_id TEXT NOT NULL,
+            chain_length INTEGER NOT NULL,
+            account_path TEXT[] NOT NULL,
+            transfer_ids TEXT[] NOT NULL,
+            amounts NUMERIC[] NOT NULL,
+            total_amount NUMERIC NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            detected_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_fraud_alerts_status_detected ON fraud_alerts (status, detected_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_fraud_alerts_account_path ON fraud_alerts USING GIN (account_path)",
+    ]),
+
+    (6, "account_change_tracking", [
+        # Same change feed as 004 for accounts, read by the incremental Neo4j
+        # sync (app/database_to_neo4j) together with the transfer one
+        "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS modified_at TIMESTAMPTZ NOT NULL DEFAULT now()",
+        """CREATE TABLE IF NOT EXISTS account_tombstones (
+            id TEXT PRIMARY KEY,
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+        )""",
+        """CREATE OR REPLACE FUNCTION accounts_track_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO account_tombstones (id) VALUES (OLD.id)
+                ON CONFLICT (id) DO UPDATE SET deleted_at = clock_timestamp();
+                RETURN OLD;
+            END IF;
+            NEW.modified_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS accounts_track_change ON accounts",
+        """CREATE TRIGGER accounts_track_change BEFORE INSERT OR UPDATE OR DELETE ON accounts
+           FOR EACH ROW EXECUTE FUNCTION accounts_track_change()""",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_modified_at ON accounts (modified_at)",
+        "CREATE INDEX IF NOT EXISTS idx_account_tombstones_deleted_at ON account_tombstones (deleted_at)",
+    ]),
+
+    (7, "ingest_rejects", [
+        # Nessie records the bulk loader (app/database/bulk_load.py) could not
+        # load, with why; record is the raw payload, or the normalized row
+        # for foreign key misses found in staging
+        """CREATE TABLE IF NOT EXISTS ingest_rejects (
+            id BIGSERIAL PRIMARY KEY,
+            entity TEXT NOT NULL,
+            record_id TEXT,
+            reason TEXT NOT NULL,
+            record JSONB,
+            rejected_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_ingest_rejects_entity_rejected ON ingest_rejects (entity, rejected_at DESC)",
+    ]),
+
+    (8, "statement_level_ledger_sync", [
+        # The 002 row triggers ran two single-row ledger inserts per transfer,
+        # each firing the account_totals statement trigger on its own, so a
+        # bulk merge paid one totals upsert per ledger entry. These do the
+        # same per statement from transition tables: one ledger write and one
+        # totals upsert for a whole INSERT ... SELECT
+        "LOCK TABLE deposits, withdrawals, transfers IN SHARE ROW EXCLUSIVE MODE",
+        """CREATE OR REPLACE FUNCTION ledger_sync_deposits() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger l USING old_rows o
+                WHERE l.source_table = 'deposits' AND l.source_id = o.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO ledger
+                SELECT 'deposits', id, 'deposit', account_id, 'credit', amount, amount, payee_id,
+                       transaction_date, status, description, medium
+                FROM new_rows WHERE account_id IS NOT NULL;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION ledger_sync_withdrawals() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger l USING old_rows o
+                WHERE l.source_table = 'withdrawals' AND l.source_id = o.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO ledger
+                SELECT 'withdrawals', id, 'withdrawal', COALESCE(account_id, payer_id), 'debit',
+                       amount, -amount, payer_id, transaction_date, status, description, medium
+                FROM new_rows WHERE COALESCE(account_id, payer_id) IS NOT NULL;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION ledger_sync_transfers() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger l USING old_rows o
+                WHERE l.source_table = 'transfers' AND l.source_id = o.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO ledger
+                SELECT 'transfers', id, 'transfer_out', payer_id, 'debit', amount, -amount, payee_id,
+                       transaction_date, status, description, medium
+                FROM new_rows WHERE payer_id IS NOT NULL
+                UNION ALL
+                SELECT 'transfers', id, 'transfer_in', payee_id, 'credit', amount, amount, payer_id,
+                       transaction_date, status, description, medium
+                FROM new_rows WHERE payee_id IS NOT NULL;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS deposits_ledger_sync ON deposits",
+        "DROP TRIGGER IF EXISTS withdrawals_ledger_sync ON withdrawals",
+        "DROP TRIGGER IF EXISTS transfers_ledger_sync ON transfers",
+        "DROP FUNCTION IF EXISTS ledger_sync_deposit()",
+        "DROP FUNCTION IF EXISTS ledger_sync_withdrawal()",
+        "DROP FUNCTION IF EXISTS ledger_sync_transfer()",
+    ] + [
+        # Transition tables allow one event per trigger
+        statement
+        for table in ("deposits", "withdrawals", "transfers")
+        for event, referencing in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        )
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {table}_ledger_{event.lower()} ON {table}",
+            f"""CREATE TRIGGER {table}_ledger_{event.lower()} AFTER {event} ON {table}
+           REFERENCING {referencing}
+           FOR EACH STATEMENT EXECUTE FUNCTION ledger_sync_{table}()""",
+        )
+    ]),
+
+    (9, "ingest_checkpoints", [
+        # Where the Nessie ingest (app/database/nessie_ingest.py) got to in
+        # each entity, saved in the same transaction as every batch it
+        # commits. page_url is NULL for the first page; a row with no
+        # finished_at belongs to an interrupted run, which the next run
+        # resumes from page_url, skipping page_offset records
+        """CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+            entity TEXT PRIMARY KEY,
+            run_started_at TIMESTAMPTZ NOT NULL,
+            page_url TEXT,
+            page_offset INTEGER NOT NULL DEFAULT 0,
+            last_id TEXT,
+            loaded BIGINT NOT NULL DEFAULT 0,
+            updated BIGINT NOT NULL DEFAULT 0,
+            existing BIGINT NOT NULL DEFAULT 0,
+            rejected BIGINT NOT NULL DEFAULT 0,
+            finished_at TIMESTAMPTZ,
+            checkpointed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )""",
+    ]),
+
+    (10, "deposit_ledger_by_payee", [
+        # Nessie deposits name the credited account in payee_id and leave
+        # account_id empty, so posting only deposits with an account_id kept
+        # every ingested deposit out of the ledger. Key them like withdrawals
+        # (COALESCE(account_id, payer_id)). The 002 row trigger is gone since
+        # 008; this replaces the statement-level function
+        "LOCK TABLE deposits IN SHARE ROW EXCLUSIVE MODE",
+        """CREATE OR REPLACE FUNCTION ledger_sync_deposits() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM ledger l USING old_rows o
+                WHERE l.source_table = 'deposits' AND l.source_id = o.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO ledger
+                SELECT 'deposits', id, 'deposit', COALESCE(account_id, payee_id), 'credit', amount, amount,
+                       payee_id, transaction_date, status, description, medium
+                FROM new_rows WHERE COALESCE(account_id, payee_id) IS NOT NULL;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql""",
+        # Post the deposits left out so far; the ledger triggers carry them
+        # into account_totals
+        """INSERT INTO ledger
+           SELECT 'deposits', id, 'deposit', COALESCE(account_id, payee_id), 'credit', amount, amount,
+                  payee_id, transaction_date, status, description, medium
+           FROM deposits WHERE COALESCE(account_id, payee_id) IS NOT NULL
+           ON CONFLICT DO NOTHING""",
+    ]),
+
+    (11, "drop_unused_source_indexes", [
+        # Account history, summaries and forecasts read the ledger since 002
+        # and fraud chains walk the in-memory graph, so these 001 indexes on
+        # the source tables only slowed every write. Kept: transfers by payer
+        # and payee (graph lookups, ingest cycle check), bills and accounts
+        "DROP INDEX IF EXISTS idx_deposits_account_date",
+        "DROP INDEX IF EXISTS idx_withdrawals_account_date",
+        "DROP INDEX IF EXISTS idx_withdrawals_payer_date",
+        "DROP INDEX IF EXISTS idx_transfers_account_date",
+        "DROP INDEX IF EXISTS idx_deposits_account_date_settled",
+        "DROP INDEX IF EXISTS idx_withdrawals_account_date_settled",
+        "DROP INDEX IF EXISTS idx_transfers_payer_date_settled",
+        "DROP INDEX IF EXISTS idx_transfers_payee_date_settled",
+        "DROP INDEX IF EXISTS idx_transfers_account_date_settled",
+        "DROP INDEX IF EXISTS idx_deposits_executed_date",
+        "DROP INDEX IF EXISTS idx_transfers_completed_account",
+        # account_id still references accounts; deleting an account looks its
+        # rows up by it. Partial, so the columns ingest leaves NULL
+        # (withdrawals, transfers) cost nothing to maintain
+        """CREATE INDEX IF NOT EXISTS idx_deposits_account_id
+           ON deposits (account_id) WHERE account_id IS NOT NULL""",
+        """CREATE INDEX IF NOT EXISTS idx_withdrawals_account_id
+           ON withdrawals (account_id) WHERE account_id IS NOT NULL""",
+        """CREATE INDEX IF NOT EXISTS idx_transfers_account_id
+           ON transfers (account_id) WHERE account_id IS NOT NULL""",
+    ]),
+]
+
+
+def ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+
+
+def applied_versions(cur):
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def apply_migrations(conn):
+    """Apply pending migrations in order, one transaction each. Returns the versions applied."""
+    cur = conn.cursor()
+    ensure_migrations_table(cur)
+    conn.commit()
+
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        if version in applied_versions(cur):
+            conn.commit()
+            continue
+
+        try:
+            for statement in statements:
+                cur.execute(statement)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        print(f"✅ Applied migration {version:03d} {name}")
+
+    return applied
+
+
+if __name__ == "__main__":
+    import psycopg2
+    from app.database.db_init import DB_CONFIG
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        applied = apply_migrations(conn)
+        if not applied:
+            print("Schema is up to date")
+    finally:
+        conn.close()
@@ -0,0 +1,235 @@
+"""
+Concurrent, paginated fetcher for the Nessie API.
+
+One httpx.AsyncClient, with pooled keep-alive connections, runs on an event
+loop in a background thread. stream(endpoint) starts following that
+endpoint's pagination (paging.next) at once and returns a plain iterator
+over its records. The synchronous loaders in nessie_ingest can then
+consume pages as they arrive while other endpoints download alongside.
+The iterator's `position` (page url, records of it taken) can be handed
+back to stream() later to carry on from the same place.
+
+Response bodies are never parsed whole: each page is read in chunks through
+json_stream.RecordParser, and its records are spooled in batches of
+`batch_records` to a temporary file (kept in memory while small) until the
+consumer reads them back. An endpoint that returns everything in a single
+huge page therefore costs disk, not memory, and a slow consumer never
+holds a connection open.
+
+Requests from all endpoints share one concurrency limit. Each endpoint
+keeps at most `prefetch_pages` pages ahead of its consumer. Connection
+errors, 429s and 5xx responses are retried with exponential backoff and
+jitter, honouring Retry-After.
+
+NESSIE_BASE_URL points the fetcher at another server, e.g. a local stub
+(see benchmarks/nessie_fetch.py).
+"""
+import asyncio
+import logging
+import os
+import pickle
+import random
+import tempfile
+import threading
+from urllib.parse import urljoin
+
+import httpx
+
+from app.database.json_stream import RecordParser
+
+logger = logging.getLogger(__name__)
+
+NESSIE_BASE_URL = os.getenv("NESSIE_BASE_URL", "http://api.nessieisreal.com/enterprise")
+NESSIE_API_KEY = os.getenv("NESSIE_API_KEY", "cb0c3712fd83d081cfbf31de4c25fb33")
+MAX_CONCURRENCY = int(os.getenv("NESSIE_MAX_CONCURRENCY", "4"))
+# Pages fetched ahead of the loader, per endpoint
+PREFETCH_PAGES = 4
+# Records per spooled batch, and how much of a page's spool stays in memory
+BATCH_RECORDS = 500
+SPOOL_MEMORY_BYTES = 1 << 20
+READ_CHUNK_CHARS = 1 << 16
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_DONE = object()
+
+
+def backoff_seconds(attempt):
+    """Full-jitter exponential backoff before retry `attempt` (1-based)."""
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def _retry_after(response):
+    try:
+        return min(RETRY_MAX_SECONDS, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def page_records(data):
+    """(records, next page link or None) from one Nessie response body."""
+    if isinstance(data, list):
+        return data, None
+    if isinstance(data, dict):
+        return data.get("results") or [], (data.get("paging") or {}).get("next")
+    return [], None
+
+
+class NessieFetcher:
+    """Use as a context manager; stream() iterators are only valid inside it."""
+
+    def __init__(self, base_url=NESSIE_BASE_URL, api_key=NESSIE_API_KEY,
+                 max_concurrency=MAX_CONCURRENCY, prefetch_pages=PREFETCH_PAGES, batch_records=BATCH_RECORDS):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.prefetch_pages = prefetch_pages
+        self.batch_records = batch_records
+        self.requests = 0
+        self.retries = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="nessie-fetch", daemon=True)
+        self._thread.start()
+        self._tasks = []
+        self._client, self._semaphore = self._call(self._open())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _open(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        client = httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT_SECONDS)
+        return client, asyncio.Semaphore(self.max_concurrency)
+
+    async def _read_page(self, response):
+        """Spool the records of one response body in batches; returns (spool, next page link)."""
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        try:
+            parser = RecordParser()
+            batch = []
+            async for chunk in response.aiter_text(READ_CHUNK_CHARS):
+                batch.extend(parser.feed(chunk))
+                if len(batch) >= self.batch_records:
+                    pickle.dump(batch, spool, pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            batch.extend(parser.close())
+            if batch:
+                pickle.dump(batch, spool, pickle.HIGHEST_PROTOCOL)
+            spool.seek(0)
+            return spool, parser.next_page
+        except BaseException:
+            spool.close()
+            raise
+
+    async def _get(self, url):
+        # params= would replace the query string of paging.next links
+        url = httpx.URL(url).copy_merge_params({"key": self.api_key})
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    async with self._client.stream("GET", url) as r:
+                        if r.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS:
+                            r.raise_for_status()
+                            return await self._read_page(r)
+                delay = _retry_after(r) or backoff_seconds(attempt)
+                reason = f"HTTP {r.status_code}"
+            except httpx.TransportError as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = backoff_seconds(attempt)
+                reason = repr(e)
+            self.retries += 1
+            logger.warning(f"Nessie GET {url}: {reason}, retry {attempt}/{MAX_ATTEMPTS - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _pages(self, url, queue):
+        seen = set()
+        try:
+            while url and url not in seen:
+                seen.add(url)
+                spool, next_page = await self._get(url)
+                await queue.put((url, spool))
+                url = urljoin(url, next_page) if next_page else None
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    async def _start(self, url):
+        queue = asyncio.Queue(maxsize=self.prefetch_pages)
+        self._tasks.append(asyncio.ensure_future(self._pages(url, queue)))
+        return queue
+
+    def stream(self, endpoint, position=None):
+        """
+        Start fetching every page of `endpoint`; returns a RecordStream over
+        its records. From a `position` taken off an earlier stream, fetching
+        starts at that page and skips the records already taken from it.
+        """
+        url, skip = position or (f"{self.base_url}/{endpoint}", 0)
+        queue = self._call(self._start(url))
+        return RecordStream(self, queue, url, skip)
+
+    async def _close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._client.aclose()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._call(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class RecordStream:
+    """
+    Iterator over one endpoint's records. `position` is (page url, records
+    of that page taken so far) as of the last record returned.
+    """
+
+    def __init__(self, fetcher, queue, url, skip):
+        self.position = (url, skip)
+        self._records = self._read(fetcher, queue, skip)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._records)
+
+    def _read(self, fetcher, queue, skip):
+        while True:
+            item = fetcher._call(queue.get())
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            url, spool = item
+            taken = 0
+            with spool:
+                while True:
+                    try:
+                        batch = pickle.load(spool)
+                    except EOFError:
+                        break
+                    for record in batch:
+                        taken += 1
+                        if taken > skip:
+                            self.position = (url, taken)
+                            yield record
+            skip = 0
@@ -1,20 +1,19 @@
 import os
-import requests
-import psycopg2
-from app.database.db_init import init_schema, get_db_connection, DB_CONFIG
+import argparse
+from datetime import datetime, timezone
+from itertools import islice
 
-# === CONFIG ===
-API_KEY = "cb0c3712fd83d081cfbf31de4c25fb33"
-BASE = "http://api.nessieisreal.com/enterprise"
+from app.database.db_init import init_schema, get_db_connection, DB_CONFIG
+from app.database.bulk_load import bulk_load, record_id, text, number, timestamp
+from app.database.nessie_fetch import NessieFetcher
+from app.transfer_graph.incremental import check_loaded_transfers
 
-def fetch(endpoint):
-    url = f"{BASE}/{endpoint}?key={API_KEY}"
-    r = requests.get(url)
-    r.raise_for_status()
-    data = r.json()
-    if isinstance(data, dict) and "results" in data:
-        data = data["results"]
-    return data
+# Records per bulk_load; each batch is committed as it lands, so memory stays
+# flat however many records an endpoint returns
+INGEST_BATCH_RECORDS = int(os.getenv("NESSIE_INGEST_BATCH_RECORDS", "10000"))
+COUNTS = ("loaded", "updated", "existing", "rejected")
+# Unknown parent ids printed per foreign key
+ORPHAN_SAMPLE_IDS = 5
 
 def safe_coord(val):
     try:
@@ -26,298 +25,338 @@ def safe_coord(val):
     except (TypeError, ValueError):
         return None
 
-def table_has_data(conn, table_name):
-    """Check if a table has any rows"""
-    cur = conn.cursor()
-    cur.execute(f"SELECT COUNT(*) FROM {table_name}")
-    count = cur.fetchone()[0]
-    return count > 0
-# === INGEST FUNCTIONS ===
-
-def ingest_customers(conn):
-    if table_has_data(conn, "customers"):
-        print("⏭️  customers table already has data, skipping")
-        return
-
-    print("→ pulling customers")
-    data = fetch("customers")
-    if isinstance(data, dict) and "results" in data:
-        data = data["results"]
-    cur = conn.cursor()
-    for c in data:
-        addr = c.get("address", {})
-        cur.execute("""
-            INSERT INTO customers
-            (id, first_name, last_name, street_name, street_number, city, state, zip)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (id) DO NOTHING
-        """, (
-            c["_id"],
-            c.get("first_name"),
-            c.get("last_name"),
-            addr.get("street_name"),
-            addr.get("street_number"),
-            addr.get("city"),
-            addr.get("state"),
-            addr.get("zip")
-        ))
-    conn.commit()
-    print(f"✅ loaded {len(data)} customers")
-
-
-def ingest_accounts(conn):
-    if table_has_data(conn, "accounts"):
-        print("⏭️  accounts table already has data, skipping")
-        return
-
-    print("→ pulling accounts")
-    data = fetch("accounts")
-    cur = conn.cursor()
-    loaded = 0
-    skipped = 0
-    for a in data:
-        try:
-            cur.execute("""
-                INSERT INTO accounts
-                (id, customer_id, type, nickname, balance, rewards)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                a["_id"],
-                a.get("customer_id"),
-                a.get("type"),
-                a.get("nickname"),
-                a.get("balance"),
-                a.get("rewards")
-            ))
-            loaded += 1
-        except (psycopg2.Error, ValueError):
-            skipped += 1
-            conn.rollback()
-    conn.commit()
-    print(f"✅ loaded {loaded} accounts (skipped {skipped})")
+# === ROW NORMALIZERS ===
+# Each turns one API record into a row for bulk_load, or raises Reject
+
+def fix_transaction_date(raw_date):
+    # Fix malformed timestamps like "2025-010-4"
+    if isinstance(raw_date, str):
+        raw_date = raw_date.replace("-010-", "-10-")
+        parts = raw_date.split("-")
+        if len(parts) == 3 and len(parts[2]) == 1:
+            raw_date = f"{parts[0]}-{parts[1]}-0{parts[2]}"
+    return raw_date
+
+
+def customer_row(c):
+    addr = c.get("address") or {}
+    return (
+        record_id(c),
+        text(c, "first_name"),
+        text(c, "last_name"),
+        text(addr, "street_name"),
+        text(addr, "street_number"),
+        text(addr, "city"),
+        text(addr, "state"),
+        text(addr, "zip"),
+    )
+
+
+def account_row(a):
+    return (
+        record_id(a),
+        text(a, "customer_id"),
+        text(a, "type"),
+        text(a, "nickname"),
+        number(a, "balance"),
+        number(a, "rewards"),
+    )
+
+
+def merchant_row(m):
+    addr = m.get("address") or {}
+    geo = m.get("geocode") or {}
+    return (
+        record_id(m),
+        text(m, "name"),
+        text(addr, "street_name"),
+        text(addr, "street_number"),
+        text(addr, "city"),
+        text(addr, "state"),
+        text(addr, "zip"),
+        safe_coord(geo.get("lat")),
+        safe_coord(geo.get("lng")),
+    )
+
+
+def bill_row(b):
+    return (
+        record_id(b),
+        text(b, "account_id"),
+        timestamp(b, "creation_date"),
+        timestamp(b, "payment_date"),
+        number(b, "payment_amount"),
+        number(b, "recurring_date"),
+        text(b, "payee"),
+        text(b, "status"),
+    )
+
+
+def deposit_row(d):
+    return (
+        record_id(d),
+        # Nessie names the deposit's account as its payee; older records also carry account_id
+        text(d, "account_id") or text(d, "payee_id"),
+        text(d, "type"),
+        number(d, "amount"),
+        text(d, "payee_id"),
+        text(d, "description"),
+        text(d, "medium"),
+        timestamp(d, "transaction_date"),
+        text(d, "status"),
+    )
+
+
+def withdrawal_row(w):
+    return (
+        record_id(w),
+        text(w, "type"),
+        number(w, "amount"),
+        text(w, "payer_id"),
+        text(w, "description"),
+        text(w, "medium"),
+        timestamp(w, "transaction_date"),
+        text(w, "status"),
+    )
+
+
+def transfer_row(t):
+    return (
+        record_id(t),
+        text(t, "type"),
+        number(t, "amount"),
+        text(t, "payer_id"),
+        text(t, "payee_id"),
+        text(t, "description"),
+        text(t, "medium"),
+        timestamp(t, "transaction_date", fix=fix_transaction_date),
+        text(t, "status"),
+    )
 
 
-def ingest_merchants(conn):
-    if table_has_data(conn, "merchants"):
-        print("⏭️  merchants table already has data, skipping")
-        return
-
-    print("→ pulling merchants")
-    data = fetch("merchants")
-    cur = conn.cursor()
-    inserted, skipped = 0, 0
-
-    for m in data:
-        addr = m.get("address", {})
-        geo = m.get("geocode", {})
-        lat = safe_coord(geo.get("lat"))
-        lng = safe_coord(geo.get("lng"))
-
-        try:
-            cur.execute("""
-                INSERT INTO merchants
-                (id, name, street_name, street_number, city, state, zip, lat, lng)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                m["_id"],
-                m.get("name"),
-                addr.get("street_name"),
-                addr.get("street_number"),
-                addr.get("city"),
-                addr.get("state"),
-                addr.get("zip"),
-                lat,
-                lng
-            ))
-            inserted += 1
-        except Exception as e:
-            conn.rollback()
-            skipped += 1
-
-    conn.commit()
-    print(f"✅ loaded {inserted} merchants (skipped {skipped})")
-
-
-def ingest_bills(conn):
-    if table_has_data(conn, "bills"):
-        print("⏭️  bills table already has data, skipping")
-        return
+# === INGEST FUNCTIONS ===
 
-    print("→ pulling bills")
-    data = fetch("bills")
+def load_batches(conn, table, columns, records, normalize, checkpoint=None, before_commit=None, **options):
+    """
+    bulk_load() `records` INGEST_BATCH_RECORDS at a time, new ids inserted
+    and changed ones updated. Each batch is committed together with
+    before_commit(result) and checkpoint(cur, batch, result), so a batch
+    whose follow-up work fails is neither kept nor skipped on resume.
+    Returns the summed counts, and the foreign key misses of every batch
+    as {(column, parent): [rows, set of missing parent ids]}.
+    """
+    totals = dict.fromkeys(COUNTS, 0)
+    totals["orphans"] = {}
+    records = iter(records)
+    while True:
+        batch = list(islice(records, INGEST_BATCH_RECORDS))
+        if not batch:
+            return totals
+        result = bulk_load(conn, table, columns, batch, normalize, update=True, **options)
+        if before_commit is not None:
+            before_commit(result)
+        if checkpoint is not None:
+            checkpoint(conn.cursor(), batch, result)
+        conn.commit()
+        for key in COUNTS:
+            totals[key] += result[key]
+        for column, parent, rows, missing in result["orphans"]:
+            orphans = totals["orphans"].setdefault((column, parent), [0, set()])
+            orphans[0] += rows
+            orphans[1].update(missing)
+
+
+def report(entity, result):
+    print(f"✅ loaded {result['loaded']} new {entity} ({result['updated']} updated, "
+          f"{result['existing']} unchanged, {result['rejected']} rejected)")
+    for (column, parent), (rows, missing) in result["orphans"].items():
+        sample = ", ".join(sorted(missing)[:ORPHAN_SAMPLE_IDS])
+        more = ", ..." if len(missing) > ORPHAN_SAMPLE_IDS else ""
+        print(f"⚠️  {rows} {entity} rejected for {column} not in {parent}: "
+              f"{len(missing)} ids missing from {parent} ({sample}{more})")
+
+
+def ingest_customers(conn, records, checkpoint=None):
+    result = load_batches(conn, "customers",
+                          ["id", "first_name", "last_name", "street_name", "street_number", "city", "state", "zip"],
+                          records, customer_row, checkpoint=checkpoint)
+    report("customers", result)
+
+
+def ingest_accounts(conn, records, checkpoint=None):
+    result = load_batches(conn, "accounts",
+                          ["id", "customer_id", "type", "nickname", "balance", "rewards"],
+                          records, account_row,
+                          foreign_keys=[("customer_id", "customers")], checkpoint=checkpoint)
+    report("accounts", result)
+
+
+def ingest_merchants(conn, records, checkpoint=None):
+    result = load_batches(conn, "merchants",
+                          ["id", "name", "street_name", "street_number", "city", "state", "zip", "lat", "lng"],
+                          records, merchant_row, checkpoint=checkpoint)
+    report("merchants", result)
+
+
+def ingest_bills(conn, records, checkpoint=None):
+    result = load_batches(conn, "bills",
+                          ["id", "account_id", "creation_date", "payment_date", "payment_amount",
+                           "recurring_date", "payee", "status"],
+                          records, bill_row,
+                          foreign_keys=[("account_id", "accounts")], checkpoint=checkpoint)
+    report("bills", result)
+
+
+def ingest_deposits(conn, records, checkpoint=None):
+    result = load_batches(conn, "deposits",
+                          ["id", "account_id", "type", "amount", "payee_id", "description", "medium",
+                           "transaction_date", "status"],
+                          records, deposit_row,
+                          foreign_keys=[("account_id", "accounts"), ("payee_id", "accounts")],
+                          checkpoint=checkpoint)
+    report("deposits", result)
+
+
+def ingest_withdrawals(conn, records, checkpoint=None):
+    result = load_batches(conn, "withdrawals",
+                          ["id", "type", "amount", "payer_id", "description", "medium",
+                           "transaction_date", "status"],
+                          records, withdrawal_row,
+                          foreign_keys=[("payer_id", "accounts")], checkpoint=checkpoint)
+    report("withdrawals", result)
+
+
+def ingest_transfers(conn, records, checkpoint=None):
+    alerts = []
+
+    def detect_cycles(result):
+        # The rows each batch inserted or changed feed cycle detection
+        alerts.extend(check_loaded_transfers(conn, result["rows"]))
+
+    result = load_batches(conn, "transfers",
+                          ["id", "type", "amount", "payer_id", "payee_id", "description", "medium",
+                           "transaction_date", "status"],
+                          records, transfer_row,
+                          foreign_keys=[("payer_id", "accounts"), ("payee_id", "accounts")],
+                          returning="id, payer_id, payee_id, amount, transaction_date, status",
+                          checkpoint=checkpoint, before_commit=detect_cycles)
+    report("transfers", result)
+    if alerts:
+        print(f"🚨 {len(alerts)} new circular-transfer alerts")
+
+
+# === CHECKPOINTS ===
+# One ingest_checkpoints row per entity (migration 009). Each batch commits
+# together with the stream position after it, so a run that dies mid-table
+# is picked up again right after its last committed batch
+
+def load_checkpoints(conn):
+    """entity -> (run_started_at, page_url, page_offset, finished_at)"""
     cur = conn.cursor()
-    inserted, skipped = 0, 0
-
-    for b in data:
-        # check if account exists
-        cur.execute("SELECT 1 FROM accounts WHERE id = %s", (b.get("customer_id"),))
-        if not cur.fetchone():
-            skipped += 1
-            continue
-        try:
-            cur.execute("""
-                INSERT INTO bills
-                (id, customer_id, creation_date, payment_date, payment_amount)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                b.get("_id"),
-                b.get("customer_id"),
-                b.get("creation_date"),
-                b.get("payment_date"),
-                b.get("payment_amount")
-            ))
-            inserted += 1
-        except Exception as e:
-            conn.rollback()
-            skipped += 1
-
+    cur.execute("SELECT entity, run_started_at, page_url, page_offset, finished_at FROM ingest_checkpoints")
+    checkpoints = {row[0]: row[1:] for row in cur.fetchall()}
     conn.commit()
-    print(f"✅ loaded {inserted} bills (skipped {skipped})")
+    return checkpoints
 
 
-def ingest_deposits(conn):
-    if table_has_data(conn, "deposits"):
-        print("⏭️  deposits table already has data, skipping")
-        return
-
-    print("→ pulling deposits")
-    data = fetch("deposits")
+def start_checkpoint(conn, entity, run_started_at):
     cur = conn.cursor()
-    loaded = 0
-    skipped = 0
-
-    for d in data:
-        try:
-            cur.execute("""
-                INSERT INTO deposits
-                (id, account_id, type, amount, payee_id, description,
-                 medium, transaction_date, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                d["_id"],
-                d.get("account_id"),
-                d.get("type"),
-                d.get("amount"),
-                d.get("payee_id"),
-                d.get("description"),
-                d.get("medium"),
-                d.get("transaction_date"),
-                d.get("status"),
-            ))
-            loaded += 1
-        except (psycopg2.Error, ValueError) as e:
-            skipped += 1
-            conn.rollback()
-
+    cur.execute("""
+        INSERT INTO ingest_checkpoints (entity, run_started_at) VALUES (%s, %s)
+        ON CONFLICT (entity) DO UPDATE SET
+            run_started_at = EXCLUDED.run_started_at, page_url = NULL, page_offset = 0, last_id = NULL,
+            loaded = 0, updated = 0, existing = 0, rejected = 0, finished_at = NULL, checkpointed_at = now()
+    """, (entity, run_started_at))
     conn.commit()
-    print(f"✅ loaded {loaded} deposits (skipped {skipped})")
 
 
-def ingest_withdrawals(conn):
-    if table_has_data(conn, "withdrawals"):
-        print("⏭️  withdrawals table already has data, skipping")
-        return
-
-    print("→ pulling withdrawals")
-    data = fetch("withdrawals")
-    cur = conn.cursor()
-    loaded = 0
-    skipped = 0
-    for w in data:
-        try:
-            cur.execute("""
-                INSERT INTO withdrawals
-                (id, type, amount, payer_id,
-                 description, medium, transaction_date, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                w["_id"],
-                w.get("type"),
-                w.get("amount"),
-                w.get("payer_id"),
-                w.get("description"),
-                w.get("medium"),
-                w.get("transaction_date"),
-                w.get("status")
-            ))
-            loaded += 1
-        except (psycopg2.Error, ValueError):
-            skipped += 1
-            conn.rollback()
-    conn.commit()
-    print(f"✅ loaded {loaded} withdrawals (skipped {skipped})")
-
+def checkpointer(entity, stream):
+    """load_batches checkpoint callback recording how far `stream` has got."""
+    def checkpoint(cur, batch, result):
+        page_url, page_offset = stream.position
+        last = batch[-1]
+        last_id = last.get("_id") if isinstance(last, dict) else None
+        cur.execute("""
+            UPDATE ingest_checkpoints
+            SET page_url = %s, page_offset = %s, last_id = %s,
+                loaded = loaded + %s, updated = updated + %s, existing = existing + %s,
+                rejected = rejected + %s, checkpointed_at = now()
+            WHERE entity = %s
+        """, (page_url, page_offset, None if last_id is None else str(last_id),
+              *(result[key] for key in COUNTS), entity))
+    return checkpoint
 
-def ingest_transfers(conn):
-    if table_has_data(conn, "transfers"):
-        print("⏭️  transfers table already has data, skipping")
-        return
 
-    print("→ pulling transfers")
-    data = fetch("transfers")
+def finish_checkpoint(conn, entity):
     cur = conn.cursor()
-    loaded = 0
-    skipped = 0
-
-    for t in data:
-        raw_date = t.get("transaction_date")
-
-        # Fix malformed timestamps like "2025-010-4"
-        if isinstance(raw_date, str):
-            raw_date = raw_date.replace("-010-", "-10-")
-            parts = raw_date.split("-")
-            if len(parts) == 3 and len(parts[2]) == 1:
-                raw_date = f"{parts[0]}-{parts[1]}-0{parts[2]}"
-
-        try:
-            cur.execute("""
-                INSERT INTO transfers
-                (id, type, amount, payer_id, payee_id,
-                description, medium, transaction_date, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                t["_id"],
-                t.get("type"),
-                t.get("amount"),
-                t.get("payer_id"),
-                t.get("payee_id"),
-                t.get("description"),
-                t.get("medium"),
-                t.get("transaction_date"),
-                t.get("status"),
-            ))
-            loaded += 1
-        except (psycopg2.Error, ValueError) as e:
-            skipped += 1
-            conn.rollback()
-
+    cur.execute("UPDATE ingest_checkpoints SET finished_at = now(), checkpointed_at = now() WHERE entity = %s",
+                (entity,))
     conn.commit()
-    print(f"✅ loaded {loaded} transfers (skipped {skipped})")
 
 
 # === MAIN ===
-def ingest_all():
+# Load order: each entity's foreign keys point at ones loaded before it
+INGESTERS = [
+    ("customers", ingest_customers),
+    ("accounts", ingest_accounts),
+    ("merchants", ingest_merchants),
+    ("bills", ingest_bills),
+    ("deposits", ingest_deposits),
+    ("withdrawals", ingest_withdrawals),
+    ("transfers", ingest_transfers),
+]
+
+
+def ingest_all(restart=False):
+    """
+    Pull every entity and upsert what is new or changed. A run that was
+    interrupted is resumed: entities it finished are skipped and the rest
+    carry on from their checkpoints, unless `restart`.
+    """
     print("Starting Nessie data ingestion to PostgreSQL...")
     init_schema()
 
-    with get_db_connection() as conn:
-        ingest_customers(conn)
-        ingest_accounts(conn)
-        ingest_merchants(conn)
-        ingest_bills(conn)
-        ingest_deposits(conn)
-        print("✅ Finished deposits, moving to withdrawals")
-        ingest_withdrawals(conn)
-        print("✅ Finished withdrawals, moving to transfers")
-        ingest_transfers(conn)
+    with get_db_connection() as conn, NessieFetcher() as fetcher:
+        checkpoints = load_checkpoints(conn)
+        interrupted = {run for run, _, _, finished_at in checkpoints.values() if finished_at is None}
+        if interrupted and not restart:
+            run_started_at = max(interrupted)
+            print(f"↩️  resuming the ingest run started {run_started_at:%Y-%m-%d %H:%M:%S %Z}")
+        else:
+            run_started_at = datetime.now(timezone.utc)
+
+        # Every endpoint starts downloading now; each is loaded in order as
+        # its pages arrive
+        streams = []
+        for entity, ingest in INGESTERS:
+            position = None
+            if entity in checkpoints and checkpoints[entity][0] == run_started_at:
+                _, page_url, page_offset, finished_at = checkpoints[entity]
+                if finished_at is not None:
+                    print(f"⏭️  {entity} already ingested in this run, skipping")
+                    continue
+                if page_url is not None:
+                    position = (page_url, page_offset)
+            else:
+                start_checkpoint(conn, entity, run_started_at)
+            streams.append((entity, ingest, position, fetcher.stream(entity, position)))
+
+        for entity, ingest, position, records in streams:
+            if position is None:
+                print(f"→ pulling {entity}")
+            else:
+                print(f"→ pulling {entity} from {position[0]}, after its first {position[1]} records")
+            ingest(conn, records, checkpoint=checkpointer(entity, records))
+            finish_checkpoint(conn, entity)
+
+        print(f"✅ {fetcher.requests} Nessie requests ({fetcher.retries} retried)")
 
     print("All Nessie data pulled and stored in PostgreSQL")
 
+
 if __name__ == "__main__":
-    ingest_all()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pull Nessie data into PostgreSQL")
+    parser.add_argument("--restart", action="store_true",
+                        help="Start a fresh run instead of resuming an interrupted one")
+    args = parser.parse_args()
+    ingest_all(restart=args.restart)
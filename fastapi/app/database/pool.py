@@ -0,0 +1,234 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    - Keeps between min_size and max_size open connections.
+    - Health-checks connections on checkout (SELECT 1 once they have been idle
+      longer than check_idle seconds, a cheap closed-flag check otherwise).
+    - Retires connections older than max_lifetime seconds.
+    - Tracks checkout wait times and in-use counts (see stats()).
+    """
+
+    def __init__(self, db_config, min_size=2, max_size=20, max_lifetime=1800.0,
+                 timeout=10.0, check_idle=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_idle = check_idle
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # (conn, created_at, last_used_at)
+        self._created_at = {}     # id(conn) -> created_at, for checked-out conns
+        self._size = 0
+        self._closed = True
+
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._connections_created = 0
+        self._connections_closed = 0
+        self._failed_health_checks = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # --- lifecycle ---
+
+    def open(self):
+        """Open the pool and pre-create min_size connections."""
+        with self._cond:
+            self._closed = False
+
+        for _ in range(self.min_size):
+            try:
+                conn = self._connect()
+            except psycopg2.Error as e:
+                # The pool fills up on demand once the database is reachable
+                logger.warning(f"Could not pre-open pool connection: {e}")
+                break
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic(), time.monotonic()))
+
+        logger.info(f"Connection pool opened (min={self.min_size}, max={self.max_size})")
+
+    def close(self):
+        """Close all idle connections; checked-out ones are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+        logger.info("Connection pool closed")
+
+    @property
+    def closed(self):
+        return self._closed
+
+    # --- checkout / checkin ---
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection and return it to the pool afterwards."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("Connection pool is closed")
+                    if self._idle:
+                        conn, created_at, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Reserve the slot, connect outside the lock
+                        self._size += 1
+                        conn = None
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"({self._size} in use)"
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+                created_at = time.monotonic()
+            elif not self._is_usable(conn, created_at, last_used):
+                self._discard(conn)
+                self._release_slot()
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._created_at[id(conn)] = created_at
+            return conn
+
+    def putconn(self, conn):
+        with self._cond:
+            created_at = self._created_at.pop(id(conn), time.monotonic())
+            closed = self._closed
+
+        expired = time.monotonic() - created_at > self.max_lifetime
+        if closed or expired or not self._reset(conn):
+            self._discard(conn)
+            self._release_slot()
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    # --- metrics ---
+
+    def stats(self):
+        """Snapshot of pool usage counters."""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "connections_created": self._connections_created,
+                "connections_closed": self._connections_closed,
+                "failed_health_checks": self._failed_health_checks,
+                "avg_wait_ms": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+    # --- internals ---
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        with self._cond:
+            self._connections_created += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._connections_closed += 1
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _is_usable(self, conn, created_at, last_used):
+        now = time.monotonic()
+        if conn.closed or now - created_at > self.max_lifetime:
+            return False
+        if now - last_used < self.check_idle:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._cond:
+                self._failed_health_checks += 1
+            return False
+
+    def _reset(self, conn):
+        """Roll back whatever the borrower left open. Returns False if the connection is broken."""
+        if conn.closed:
+            return False
+        try:
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return conn.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE
+        except psycopg2.Error:
+            return False
@@ -1,6 +1,14 @@
 import os
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
 import psycopg2
 from neo4j import GraphDatabase
+from neo4j.exceptions import TransientError
 
 # --- PostgreSQL config ---
 DB_CONFIG = {
@@ -26,144 +34,442 @@ def clear_neo4j_database():
     neo_driver.close()
     print("✅ Neo4j database cleared")
 
-def create_account_nodes():
-    # Connect to Postgres
+# Rows per UNWIND batch / Neo4j transaction
+BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "10000"))
+# Seconds to wait for new indexes to finish populating
+INDEX_WAIT_SECONDS = int(os.getenv("NEO4J_INDEX_WAIT_SECONDS", "600"))
+# Incremental syncs re-read changes this far behind the high-water mark, for
+# rows whose modified_at was stamped before a concurrent commit finished
+SYNC_OVERLAP_SECONDS = float(os.getenv("NEO4J_SYNC_OVERLAP_SECONDS", "60"))
+SYNC_STATE_ID = "postgres"
+# Concurrent sessions for the full edge load, each owning one payer-hash partition
+LOAD_WORKERS = int(os.getenv("NEO4J_LOAD_WORKERS", "4"))
+# Tries per batch when a transient error (deadlock, lock timeout) outlasts the driver's own retries
+BATCH_ATTEMPTS = 5
+
+# Every MATCH/MERGE on an Account or TRANSFERRED_TO looks up by id; without
+# these each lookup scans every node or relationship of that type
+SCHEMA = [
+    ("account_id_unique",
+     "CREATE CONSTRAINT account_id_unique IF NOT EXISTS FOR (a:Account) REQUIRE a.id IS UNIQUE"),
+    ("transferred_to_id",
+     "CREATE INDEX transferred_to_id IF NOT EXISTS FOR ()-[t:TRANSFERRED_TO]-() ON (t.id)"),
+    ("transferred_to_date",
+     "CREATE INDEX transferred_to_date IF NOT EXISTS FOR ()-[t:TRANSFERRED_TO]-() ON (t.transaction_date)"),
+]
+
+ACCOUNT_NODES_CYPHER = """
+    UNWIND $rows AS r
+    MERGE (a:Account {id: r.id})
+    SET a.type = r.type,
+        a.nickname = r.nickname,
+        a.balance = r.balance,
+        a.rewards = r.rewards
+"""
+
+TRANSFER_ACCOUNT_NODES_CYPHER = """
+    UNWIND $rows AS r
+    MERGE (a:Account {id: r.id})
+    ON CREATE SET a.type = 'transfer_account',
+                  a.nickname = r.id
+"""
+
+TRANSFER_EDGE_MERGE = """
+    MATCH (from:Account {id: r.payer_id})
+    MATCH (to:Account {id: r.payee_id})
+    MERGE (from)-[t:TRANSFERRED_TO {id: r.transfer_id}]->(to)
+    SET t.amount = r.amount,
+        t.transaction_date = r.transaction_date,
+        t.status = r.status,
+        t.description = r.description,
+        t.medium = r.medium,
+        t.type = r.type,
+        t.label = r.label
+"""
+
+TRANSFER_EDGES_CYPHER = "UNWIND $rows AS r" + TRANSFER_EDGE_MERGE
+
+# An updated transfer may have moved to other accounts; drop its old edge first
+CHANGED_TRANSFER_EDGES_CYPHER = """
+    UNWIND $rows AS r
+    CALL {
+        WITH r
+        MATCH (x:Account)-[old:TRANSFERRED_TO {id: r.transfer_id}]->(y:Account)
+        WHERE x.id <> r.payer_id OR y.id <> r.payee_id
+        DELETE old
+    }
+    WITH r""" + TRANSFER_EDGE_MERGE
+
+DELETE_TRANSFER_EDGES_CYPHER = """
+    UNWIND $rows AS r
+    MATCH ()-[t:TRANSFERRED_TO {id: r.id}]->()
+    DELETE t
+"""
+
+DELETE_ACCOUNT_NODES_CYPHER = """
+    UNWIND $rows AS r
+    MATCH (a:Account {id: r.id})
+    DETACH DELETE a
+"""
+
+ACCOUNTS_QUERY = """
+    SELECT a.id, a.type, a.nickname, a.balance, a.rewards
+    FROM accounts a
+    WHERE a.customer_id IS NOT NULL
+"""
+
+TRANSFER_ACCOUNTS_QUERY = """
+    SELECT payer_id FROM transfers WHERE payer_id IS NOT NULL
+    UNION
+    SELECT payee_id FROM transfers WHERE payee_id IS NOT NULL
+"""
+
+# Transfers that become an edge; others (no payer/payee, self-transfers) are left out
+EDGE_TRANSFER = "payer_id IS NOT NULL AND payee_id IS NOT NULL AND payer_id != payee_id"
+
+TRANSFERS_QUERY = f"""
+    SELECT id, payer_id, payee_id, amount, transaction_date,
+           status, description, medium, type
+    FROM transfers
+    WHERE {EDGE_TRANSFER}
+"""
+
+# Change feeds (migrations 004 and 006)
+WATERMARK_QUERY = """
+    SELECT GREATEST(
+        (SELECT MAX(modified_at) FROM transfers),
+        (SELECT MAX(deleted_at) FROM transfer_tombstones),
+        (SELECT MAX(modified_at) FROM accounts),
+        (SELECT MAX(deleted_at) FROM account_tombstones)
+    )
+"""
+CHANGED_ACCOUNTS_QUERY = ACCOUNTS_QUERY + " AND a.modified_at > %s"
+CHANGED_TRANSFER_ACCOUNTS_QUERY = """
+    SELECT payer_id FROM transfers WHERE payer_id IS NOT NULL AND modified_at > %s
+    UNION
+    SELECT payee_id FROM transfers WHERE payee_id IS NOT NULL AND modified_at > %s
+"""
+CHANGED_TRANSFERS_QUERY = TRANSFERS_QUERY + " AND modified_at > %s"
+# One payer-hash partition of TRANSFERS_QUERY: (partition count, partition)
+PARTITION_TRANSFERS_QUERY = TRANSFERS_QUERY + " AND mod(hashtext(payer_id) & 2147483647, %s) = %s"
+# Changed into something that is no longer an edge
+DROPPED_TRANSFERS_QUERY = f"SELECT id FROM transfers WHERE modified_at > %s AND NOT ({EDGE_TRANSFER})"
+DELETED_TRANSFERS_QUERY = "SELECT id FROM transfer_tombstones WHERE deleted_at > %s"
+DELETED_ACCOUNTS_QUERY = "SELECT id FROM account_tombstones WHERE deleted_at > %s"
+
+
+def ensure_schema(neo_driver, wait_seconds=INDEX_WAIT_SECONDS):
+    """
+    Create the constraint and indexes in SCHEMA if missing and wait until
+    they are ONLINE. Raises RuntimeError if any is not (failed, or still
+    populating after wait_seconds).
+    """
+    print("🔑 Checking Neo4j constraints and indexes...")
+    start = time.perf_counter()
+    names = [name for name, _ in SCHEMA]
+    with neo_driver.session() as session:
+        for _, statement in SCHEMA:
+            session.run(statement).consume()
+        session.run("CALL db.awaitIndexes($seconds)", seconds=wait_seconds).consume()
+
+        # The constraint is backed by an index of the same name
+        states = {
+            record["name"]: record["state"]
+            for record in session.run("SHOW INDEXES YIELD name, state WHERE name IN $names", names=names)
+        }
+
+    not_online = {name: states.get(name, "MISSING") for name in names if states.get(name) != "ONLINE"}
+    if not_online:
+        raise RuntimeError(f"Neo4j schema not ready: {not_online}")
+    print(f"✅ {len(names)} constraints/indexes online ({time.perf_counter() - start:.1f}s)")
+
+
+def drop_schema(neo_driver):
+    """Drop everything ensure_schema creates (for load timing comparisons)."""
+    with neo_driver.session() as session:
+        for name, statement in SCHEMA:
+            kind = "CONSTRAINT" if statement.startswith("CREATE CONSTRAINT") else "INDEX"
+            session.run(f"DROP {kind} {name} IF EXISTS").consume()
+
+
+def stream_rows(pg_conn, query, batch_size, params=None, name="neo4j_sync"):
+    """Yield lists of up to batch_size rows from a server-side cursor, so the result set is never held in memory."""
+    with pg_conn.cursor(name=name) as cur:
+        cur.itersize = batch_size
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+def write_batches(neo_driver, cypher, batches, to_param, what):
+    """
+    Run `cypher` once per batch inside an explicit write transaction, with
+    the batch as $rows (to_param maps a Postgres row to a parameter map).
+    Prints progress and throughput; returns the number of rows written.
+    """
+    written = 0
+    start = time.perf_counter()
+    with neo_driver.session() as session:
+        for batch in batches:
+            rows = [to_param(row) for row in batch]
+            session.execute_write(lambda tx: tx.run(cypher, rows=rows).consume())
+            written += len(rows)
+            elapsed = time.perf_counter() - start
+            print(f"  Progress: {written} {what} ({written / elapsed:,.0f}/s)")
+
+    if written:
+        elapsed = time.perf_counter() - start
+        print(f"  {written} {what} in {elapsed:.1f}s ({written / elapsed:,.0f}/s)")
+    return written
+
+
+def load_edges_partitioned(neo_driver, batch_size=BATCH_SIZE, workers=LOAD_WORKERS):
+    """
+    Full edge load split by payer-id hash over `workers` threads, each with
+    its own Postgres cursor and Neo4j session. A payer's edges all go
+    through one worker, so workers never contend for the same start node;
+    contention on end nodes can still deadlock, and those batches are
+    retried with backoff (MERGE makes a replay harmless).
+
+    Prints combined progress; returns the number of edges written. Raises
+    RuntimeError naming the partitions that failed, after the rest finish.
+    """
+    lock = threading.Lock()
+    totals = {"written": 0, "retries": 0, "done": 0}
+    start = time.perf_counter()
+
+    def write_batch(session, rows):
+        for attempt in range(1, BATCH_ATTEMPTS + 1):
+            try:
+                session.execute_write(lambda tx: tx.run(TRANSFER_EDGES_CYPHER, rows=rows).consume())
+                return
+            except TransientError:
+                if attempt == BATCH_ATTEMPTS:
+                    raise
+                with lock:
+                    totals["retries"] += 1
+                time.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+
+    def load_partition(partition):
+        pg_conn = psycopg2.connect(**DB_CONFIG)
+        written = 0
+        try:
+            with neo_driver.session() as session:
+                for batch in stream_rows(pg_conn, PARTITION_TRANSFERS_QUERY, batch_size,
+                                         (workers, partition), name=f"neo4j_sync_{partition}"):
+                    write_batch(session, [transfer_param(row) for row in batch])
+                    written += len(batch)
+                    with lock:
+                        totals["written"] += len(batch)
+                        elapsed = time.perf_counter() - start
+                        print(f"  Progress: {totals['written']} edges ({totals['written'] / elapsed:,.0f}/s), "
+                              f"{totals['done']}/{workers} partitions done, {totals['retries']} retries")
+        finally:
+            pg_conn.close()
+        with lock:
+            totals["done"] += 1
+        return written
+
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(load_partition, partition): partition for partition in range(workers)}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed[futures[future]] = e
+                print(f"❌ Partition {futures[future]} failed: {e}")
+
+    elapsed = time.perf_counter() - start
+    print(f"  {totals['written']} edges in {elapsed:.1f}s ({totals['written'] / elapsed:,.0f}/s) "
+          f"over {workers} partitions, {totals['retries']} retries")
+    if failed:
+        raise RuntimeError(f"Edge load failed for partitions {sorted(failed)}")
+    return totals["written"]
+
+
+def id_param(row):
+    return {"id": row[0]}
+
+
+def account_param(row):
+    acc_id, acc_type, nickname, balance, rewards = row
+    return {
+        "id": acc_id,
+        "type": acc_type,
+        # Use account ID as fallback if nickname is None
+        "nickname": nickname if nickname else acc_id,
+        "balance": float(balance) if balance is not None else None,
+        "rewards": float(rewards) if rewards is not None else None
+    }
+
+
+def transfer_param(row):
+    transfer_id, payer_id, payee_id, amount, transaction_date, status, description, medium, transfer_type = row
+
+    # Create a display label combining amount and date
+    amount_str = f"${amount}" if amount else "$0"
+    date_str = str(transaction_date) if transaction_date else "N/A"
+
+    return {
+        "transfer_id": transfer_id,
+        "payer_id": payer_id,
+        "payee_id": payee_id,
+        "amount": float(amount) if amount is not None else None,
+        "transaction_date": transaction_date,
+        "status": status,
+        "description": description,
+        "medium": medium,
+        "type": transfer_type,
+        "label": f"{amount_str} on {date_str}"
+    }
+
+
+def create_account_nodes(batch_size=BATCH_SIZE):
     pg_conn = psycopg2.connect(**DB_CONFIG)
-    pg_cur = pg_conn.cursor()
-    pg_cur.execute("""
-        SELECT a.id, a.type, a.nickname, a.balance, a.rewards
-        FROM accounts a
-        WHERE a.customer_id IS NOT NULL;
-    """)
-    accounts = pg_cur.fetchall()
-
-    print(f"Found {len(accounts)} accounts with customer data")
-    
-    # Debug: Check if we have nicknames
-    nicknames_count = sum(1 for _, _, nickname, _, _ in accounts if nickname)
-    print(f"Accounts with nicknames: {nicknames_count}/{len(accounts)}")
-
-    # Connect to Neo4j
     neo_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with neo_driver.session() as session:
-        for acc_id, acc_type, nickname, balance, rewards in accounts:
-            # Use account ID as fallback if nickname is None
-            display_name = nickname if nickname else acc_id
-            
-            session.run("""
-                MERGE (a:Account {id: $id})
-                SET a.type = $type,
-                    a.nickname = $nickname,
-                    a.balance = $balance,
-                    a.rewards = $rewards
-            """, {
-                "id": acc_id,
-                "type": acc_type,
-                "nickname": display_name,
-                "balance": float(balance) if balance is not None else None,
-                "rewards": float(rewards) if rewards is not None else None
-            })
+
+    print("Creating account nodes from accounts table...")
+    created = write_batches(neo_driver, ACCOUNT_NODES_CYPHER, stream_rows(pg_conn, ACCOUNTS_QUERY, batch_size),
+                            account_param, "accounts")
 
     pg_conn.close()
     neo_driver.close()
-    print(f"✅ Created {len(accounts)} account nodes from accounts table")
+    print(f"✅ Created {created} account nodes from accounts table")
+
 
-def create_transfer_network():
+def create_transfer_network(batch_size=BATCH_SIZE, workers=LOAD_WORKERS):
     """Create account nodes from transfer data and create transfer edges"""
-    # Connect to Postgres
     pg_conn = psycopg2.connect(**DB_CONFIG)
-    pg_cur = pg_conn.cursor()
-    
-    # Check what data we have
-    pg_cur.execute("SELECT COUNT(*) FROM transfers")
-    total_transfers = pg_cur.fetchone()[0]
-    print(f"📊 Total transfers in database: {total_transfers}")
-    
-    # Get all unique account IDs from transfers
-    pg_cur.execute("""
-        SELECT DISTINCT account_id FROM (
-            SELECT DISTINCT payer_id as account_id FROM transfers WHERE payer_id IS NOT NULL
-            UNION
-            SELECT DISTINCT payee_id FROM transfers WHERE payee_id IS NOT NULL
-        ) subq
-    """)
-    transfer_account_ids = [row[0] for row in pg_cur.fetchall()]
-    print(f"📊 Found {len(transfer_account_ids)} unique accounts in transfer data")
-    
-    # Connect to Neo4j
     neo_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    
+
     # Create Account nodes for all accounts involved in transfers
     print("Creating account nodes from transfer data...")
+    created = write_batches(neo_driver, TRANSFER_ACCOUNT_NODES_CYPHER,
+                            stream_rows(pg_conn, TRANSFER_ACCOUNTS_QUERY, batch_size), id_param, "accounts")
+    print(f"✅ Created {created} account nodes")
+
+    print("Creating transfer edges...")
+    if workers > 1:
+        created = load_edges_partitioned(neo_driver, batch_size, workers)
+    else:
+        created = write_batches(neo_driver, TRANSFER_EDGES_CYPHER, stream_rows(pg_conn, TRANSFERS_QUERY, batch_size),
+                                transfer_param, "edges")
+
+    pg_conn.close()
+    neo_driver.close()
+    print(f"Created {created} TRANSFERRED_TO edges between accounts")
+
+
+def postgres_watermark(pg_conn):
+    """Latest change time in Postgres (None if nothing was ever written)."""
+    with pg_conn.cursor() as cur:
+        cur.execute(WATERMARK_QUERY)
+        return cur.fetchone()[0]
+
+
+def read_sync_state(neo_driver):
+    """High-water mark of the changes the graph holds, or None if it was never synced."""
     with neo_driver.session() as session:
-        for i, acc_id in enumerate(transfer_account_ids):
-            session.run("""
-                MERGE (a:Account {id: $id})
-                ON CREATE SET a.type = 'transfer_account',
-                              a.nickname = $id
-            """, {"id": acc_id})
-            
-            if (i + 1) % 1000 == 0:
-                print(f"  Progress: {i+1}/{len(transfer_account_ids)} accounts...")
-    
-    print(f"✅ Created {len(transfer_account_ids)} account nodes")
-    
-    # Now get all transfers with both payer_id and payee_id
-    pg_cur.execute("""
-        SELECT id, payer_id, payee_id, amount, transaction_date, 
-               status, description, medium, type
-        FROM transfers
-        WHERE payer_id IS NOT NULL 
-          AND payee_id IS NOT NULL
-          AND payer_id != payee_id
-    """)
-    transfers = pg_cur.fetchall()
-    
-    print(f"📊 Creating {len(transfers)} transfer edges...")
-    
-    # Create transfer edges
+        record = session.run("MATCH (s:SyncState {id: $id}) RETURN s.watermark AS watermark",
+                             id=SYNC_STATE_ID).single()
+    if record is None or record["watermark"] is None:
+        return None
+    return record["watermark"].to_native()
+
+
+def write_sync_state(neo_driver, watermark):
     with neo_driver.session() as session:
-        for i, (transfer_id, payer_id, payee_id, amount, transaction_date, status, description, medium, transfer_type) in enumerate(transfers):
-      
-       
-            # Create a display label combining amount and date
-            amount_str = f"${amount}" if amount else "$0"
-            date_str = str(transaction_date) if transaction_date else "N/A"
-            display_label = f"{amount_str} on {date_str}"
-            
-            session.run("""
-                MATCH (from:Account {id: $payer_id})
-                MATCH (to:Account {id: $payee_id})
-                MERGE (from)-[t:TRANSFERRED_TO {id: $transfer_id}]->(to)
-                SET t.amount = $amount,
-                    t.transaction_date = $transaction_date,
-                    t.status = $status,
-                    t.description = $description,
-                    t.medium = $medium,
-                    t.type = $type,
-                    t.label = $label
-            """, {
-                "transfer_id": transfer_id,
-                "payer_id": payer_id,
-                "payee_id": payee_id,
-                "amount": float(amount) if amount is not None else None,
-                "transaction_date": transaction_date,
-                "status": status,
-                "description": description,
-                "medium": medium,
-                "type": transfer_type,
-                "label": display_label
-            })
-            
-            # Progress indicator
-            if (i + 1) % 1000 == 0:
-                print(f"  Progress: {i+1}/{len(transfers)} edges...")
+        session.run("""
+            MERGE (s:SyncState {id: $id})
+            SET s.watermark = $watermark, s.synced_at = datetime()
+        """, id=SYNC_STATE_ID, watermark=watermark).consume()
+
 
+def rebuild(batch_size=BATCH_SIZE, workers=LOAD_WORKERS):
+    """Clear Neo4j and load everything from Postgres, then record the high-water mark."""
+    pg_conn = psycopg2.connect(**DB_CONFIG)
+    # Taken before loading: whatever changes during the load is re-read by the next sync
+    watermark = postgres_watermark(pg_conn)
     pg_conn.close()
+
+    clear_neo4j_database()
+    neo_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    ensure_schema(neo_driver)
+    create_account_nodes(batch_size)
+    create_transfer_network(batch_size, workers)
+    if watermark is not None:
+        write_sync_state(neo_driver, watermark)
     neo_driver.close()
-    print(f"Created {len(transfers)} TRANSFERRED_TO edges between accounts")
+
+
+def sync_changes(pg_conn, neo_driver, batch_size=BATCH_SIZE):
+    """
+    Push accounts and transfers changed or deleted since the graph's
+    high-water mark (everything, on a graph never synced) and advance it.
+
+    All reads come from one REPEATABLE READ snapshot. Deletes are applied
+    before upserts, so an id deleted and re-created since the last sync
+    ends up present. Returns the number of rows written to Neo4j.
+    """
+    synced = read_sync_state(neo_driver)
+    since = (synced - timedelta(seconds=SYNC_OVERLAP_SECONDS) if synced is not None
+             else datetime(1970, 1, 1, tzinfo=timezone.utc))
+
+    pg_conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    try:
+        watermark = postgres_watermark(pg_conn)
+        steps = [
+            (DELETE_TRANSFER_EDGES_CYPHER, DELETED_TRANSFERS_QUERY, (since,), id_param, "deleted transfers"),
+            (DELETE_TRANSFER_EDGES_CYPHER, DROPPED_TRANSFERS_QUERY, (since,), id_param, "dropped transfers"),
+            (DELETE_ACCOUNT_NODES_CYPHER, DELETED_ACCOUNTS_QUERY, (since,), id_param, "deleted accounts"),
+            (ACCOUNT_NODES_CYPHER, CHANGED_ACCOUNTS_QUERY, (since,), account_param, "accounts"),
+            (TRANSFER_ACCOUNT_NODES_CYPHER, CHANGED_TRANSFER_ACCOUNTS_QUERY, (since, since), id_param,
+             "transfer accounts"),
+            (CHANGED_TRANSFER_EDGES_CYPHER, CHANGED_TRANSFERS_QUERY, (since,), transfer_param, "edges"),
+        ]
+        written = 0
+        for cypher, query, params, to_param, what in steps:
+            written += write_batches(neo_driver, cypher, stream_rows(pg_conn, query, batch_size, params),
+                                     to_param, what)
+    finally:
+        pg_conn.rollback()
+
+    if watermark is not None and (synced is None or watermark > synced):
+        write_sync_state(neo_driver, watermark)
+    return written
+
 
 if __name__ == "__main__":
-    clear_neo4j_database()
-    create_account_nodes()
-    create_transfer_network()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync the Neo4j account graph from Postgres")
+    parser.add_argument("--full", action="store_true", help="Clear Neo4j and rebuild the whole graph")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Keep running, syncing changes every SECONDS")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per UNWIND transaction")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS,
+                        help="Concurrent sessions for the --full edge load")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.full:
+        rebuild(args.batch_size, args.workers)
+        print(f"⏱️  Rebuild finished in {time.perf_counter() - start:.1f}s")
+
+    if not args.full or args.watch:
+        pg_conn = psycopg2.connect(**DB_CONFIG)
+        neo_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        ensure_schema(neo_driver)
+        try:
+            while True:
+                start = time.perf_counter()
+                written = sync_changes(pg_conn, neo_driver, args.batch_size)
+                print(f"⏱️  Synced {written} changes in {time.perf_counter() - start:.1f}s")
+                if not args.watch:
+                    break
+                time.sleep(args.watch)
+        finally:
+            pg_conn.close()
+            neo_driver.close()
@@ -0,0 +1,254 @@
+"""
+Columnar binary encoding for graph responses.
+
+A graph payload ({"nodes": [...], "edges": [...], ...}) is sent as one
+string dictionary plus one packed array per column instead of repeating
+every key, id and number as JSON text. Node ids fill the start of the
+dictionary in node order, so an edge's source/target index is also its
+row in the nodes table. Everything is little-endian:
+
+    b"GRPH" | u8 version | u8 table count | u32 meta length | meta (UTF-8 JSON)
+    u32 string count | u32 offsets[count + 1] | UTF-8 string bytes
+    per table:  u16 name length | name | u32 rows | u8 column count
+      per column:  u16 name length | name | u8 type | padding to 8 bytes | rows * width bytes
+
+Column types, nulls in brackets:
+    s  i32 string dictionary index (-1)
+    j  i32 dictionary index of a JSON-encoded value, for lists/objects (-1)
+    f  f64 (NaN)
+    q  i64, integers without nulls
+    t  i64 epoch milliseconds, naive datetimes as UTC (i64 min)
+    b  i8 0/1 (-1)
+
+Columns start on 8-byte boundaries so a browser can wrap them in typed
+arrays without copying. Top-level values that are not lists of objects
+(query, summary, ...) travel in meta.
+"""
+import json
+import struct
+from itertools import chain
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from fastapi.responses import Response
+
+GRAPH_BINARY_MEDIA_TYPE = "application/x-graph-columnar"
+
+MAGIC = b"GRPH"
+VERSION = 1
+NULL_INDEX = -1
+NULL_TIME = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+
+_DTYPES = {
+    "s": np.dtype("<i4"),
+    "j": np.dtype("<i4"),
+    "f": np.dtype("<f8"),
+    "q": np.dtype("<i8"),
+    "t": np.dtype("<i8"),
+    "b": np.dtype("<i1"),
+}
+
+# Columns holding node ids, resolved against the nodes' dictionary slots
+NODE_ID_COLUMNS = {("nodes", "id"), ("edges", "source"), ("edges", "target")}
+
+
+def _is_temporal_type(kind):
+    # Neo4j temporal values convert with to_native()
+    return issubclass(kind, date) or hasattr(kind, "to_native")
+
+
+def _naive_utc(value):
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _column_type(values):
+    types = set(map(type, values))
+    nullable = type(None) in types
+    types.discard(type(None))
+    if not types:
+        return "s"
+    if types == {bool}:
+        return "b"
+    if types == {int}:
+        return "f" if nullable else "q"
+    if types <= {int, float}:
+        return "f"
+    if types == {str}:
+        return "s"
+    if all(_is_temporal_type(kind) for kind in types):
+        return "t"
+    return "j"
+
+
+class _Strings:
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def add(self, value):
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def pack(self):
+        blobs = [v.encode("utf-8") for v in self.values]
+        offsets = np.zeros(len(blobs) + 1, dtype="<u4")
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        return struct.pack("<I", len(blobs)) + offsets.tobytes() + b"".join(blobs)
+
+
+def _pack_column(kind, values, strings):
+    if kind in ("s", "j"):
+        if kind == "j":
+            values = [None if v is None else json.dumps(v, default=str) for v in values]
+        ids = {v: NULL_INDEX if v is None else strings.add(v) for v in dict.fromkeys(values)}
+        data = [ids[v] for v in values]
+    elif kind == "f":
+        data = [np.nan if v is None else v for v in values]
+    elif kind == "t":
+        # Integer arithmetic on timedeltas is several times faster than
+        # letting NumPy convert datetime objects
+        data = [
+            NULL_TIME if v is None
+            else ((v if type(v) is datetime and v.tzinfo is None else _naive_utc(v)) - _EPOCH) // _MILLISECOND
+            for v in values
+        ]
+    elif kind == "b":
+        data = [-1 if v is None else int(v) for v in values]
+    else:
+        data = values
+    return np.asarray(data, dtype=_DTYPES[kind]).tobytes()
+
+
+def _name(value):
+    raw = value.encode("utf-8")
+    return struct.pack("<H", len(raw)) + raw
+
+
+def encode_graph(payload):
+    """Encode a graph response dict in the layout above."""
+    tables = {k: v for k, v in payload.items() if isinstance(v, list) and all(isinstance(r, dict) for r in v)}
+    meta = {k: v for k, v in payload.items() if k not in tables}
+
+    strings = _Strings()
+    for node in tables.get("nodes", []):
+        strings.add(node.get("id"))
+
+    parts = [MAGIC, struct.pack("<BB", VERSION, len(tables))]
+    meta_bytes = json.dumps(meta, default=str).encode("utf-8")
+    parts.append(struct.pack("<I", len(meta_bytes)) + meta_bytes)
+
+    # Columns are packed first so the dictionary is complete before it is
+    # written; (bytes, aligned) pieces, aligned ones start on 8 bytes
+    body = []
+    for table, rows in tables.items():
+        columns = list(dict.fromkeys(chain.from_iterable(rows)))
+        body.append((_name(table) + struct.pack("<IB", len(rows), len(columns)), False))
+        for column in columns:
+            values = [row.get(column) for row in rows]
+            kind = _column_type(values)
+            body.append((_name(column) + kind.encode("ascii"), False))
+            body.append((_pack_column(kind, values, strings), True))
+
+    parts.append(strings.pack())
+    out = bytearray(b"".join(parts))
+    for piece, aligned in body:
+        if aligned:
+            out += b"\0" * (-len(out) % 8)
+        out += piece
+    return bytes(out)
+
+
+def decode_graph(data, records=False):
+    """
+    Decode encode_graph output. Columns come back as NumPy arrays, except
+    string columns, which become lists of str/None; the node id columns
+    stay arrays of indices into payload["strings"]. With records=True each
+    table is turned back into a list of dicts like the JSON response,
+    times as epoch milliseconds.
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) != MAGIC:
+        raise ValueError("Not a columnar graph payload")
+    version, n_tables = struct.unpack_from("<BB", view, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported columnar graph version {version}")
+    (meta_len,) = struct.unpack_from("<I", view, 6)
+    pos = 10
+    payload = json.loads(bytes(view[pos:pos + meta_len]))
+    pos += meta_len
+
+    (n_strings,) = struct.unpack_from("<I", view, pos)
+    pos += 4
+    offsets = np.frombuffer(view, dtype="<u4", count=n_strings + 1, offset=pos)
+    pos += 4 * (n_strings + 1)
+    blob = bytes(view[pos:pos + int(offsets[-1])])
+    bounds = offsets.tolist()
+    text = blob.decode("utf-8")
+    # Byte offsets are character offsets when everything is ASCII
+    source = text if len(text) == len(blob) else None
+    strings = [
+        source[a:b] if source is not None else blob[a:b].decode("utf-8")
+        for a, b in zip(bounds, bounds[1:])
+    ]
+    pos += int(offsets[-1])
+
+    def name():
+        nonlocal pos
+        (length,) = struct.unpack_from("<H", view, pos)
+        value = bytes(view[pos + 2:pos + 2 + length]).decode("utf-8")
+        pos += 2 + length
+        return value
+
+    for _ in range(n_tables):
+        table = name()
+        n_rows, n_columns = struct.unpack_from("<IB", view, pos)
+        pos += 5
+        columns = {}
+        for _ in range(n_columns):
+            column = name()
+            kind = chr(view[pos])
+            pos += 1
+            pos += -pos % 8
+            dtype = _DTYPES[kind]
+            values = np.frombuffer(view, dtype=dtype, count=n_rows, offset=pos)
+            pos += n_rows * dtype.itemsize
+            if kind in ("s", "j") and (records or (table, column) not in NODE_ID_COLUMNS):
+                values = [None if i < 0 else strings[i] for i in values.tolist()]
+                if kind == "j":
+                    values = [None if v is None else json.loads(v) for v in values]
+            columns[column] = values
+        payload[table] = _to_records(columns, n_rows) if records else columns
+
+    if not records:
+        payload["strings"] = strings
+    return payload
+
+
+def _to_records(columns, n_rows):
+    lists = {}
+    for column, values in columns.items():
+        if isinstance(values, np.ndarray):
+            if values.dtype.kind == "f":
+                values = [None if v != v else v for v in values.tolist()]
+            elif values.dtype == _DTYPES["b"]:
+                values = [None if v < 0 else bool(v) for v in values.tolist()]
+            else:
+                values = [None if v == NULL_TIME else v for v in values.tolist()]
+        lists[column] = values
+    return [{column: values[i] for column, values in lists.items()} for i in range(n_rows)]
+
+
+def graph_response(payload):
+    return Response(content=encode_graph(payload), media_type=GRAPH_BINARY_MEDIA_TYPE)
@@ -1,8 +1,35 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import health, auth, fraud, accounts, forecasting, graph
+from app.routers import health, auth, fraud, accounts, forecasting, graph, account_graph, neighborhood
 from app.middleware_layer import add_middleware
+from app.database.db_init import open_pool, close_pool
+from app.transfer_graph.store import start_refresher, stop_refresher
+from app.transfer_graph.parallel import shutdown_scan_pool
 
-app = FastAPI(title="OAuth Test App", version="1.0.0")
+# "sync" serves /accounts from threadpool handlers on the psycopg2 pool,
+# "async" from coroutine handlers on the psycopg 3 async pool
+DB_ACCESS_MODE = os.getenv("DB_ACCESS_MODE", "sync").lower()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared Postgres connection pool for all routers
+    open_pool()
+    if DB_ACCESS_MODE == "async":
+        from app.database.async_db import open_async_pool, close_async_pool
+        await open_async_pool()
+    # In-memory transfer graph for /fraud, loaded and kept fresh in the background
+    start_refresher()
+    yield
+    stop_refresher()
+    shutdown_scan_pool()
+    if DB_ACCESS_MODE == "async":
+        await close_async_pool()
+    close_pool()
+
+
+app = FastAPI(title="OAuth Test App", version="1.0.0", lifespan=lifespan)
 
 # Add middleware (CORS and Session)
 add_middleware(app)
@@ -11,9 +38,15 @@ add_middleware(app)
 app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(fraud.router)
-app.include_router(accounts.router)
+if DB_ACCESS_MODE == "async":
+    from app.routers import accounts_async
+    app.include_router(accounts_async.router)
+else:
+    app.include_router(accounts.router)
 app.include_router(forecasting.router)
 app.include_router(graph.router)
+app.include_router(account_graph.router)
+app.include_router(neighborhood.router)
 
 
 @app.get("/health")
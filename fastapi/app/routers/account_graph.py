@@ -0,0 +1,219 @@
+from fastapi import APIRouter, HTTPException, Query, Header
+from typing import Optional
+import sys
+import os
+
+# Ensure parent path is accessible (optional depending on project structure)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.database.db_init import get_db_connection  # Uses env vars
+from app.transfer_graph.graph import from_epoch
+from app.transfer_graph.store import get_transfer_graph
+from app.transfer_graph.paths import find_paths
+from app.graph_binary import GRAPH_BINARY_MEDIA_TYPE, graph_response
+from app.routers.graph import wants
+
+# Routes the frontend calls under /api (frontend/src/hooks/useAccountGraph.ts);
+# responses follow GraphData in frontend/src/types/graph.ts
+router = APIRouter(prefix="/api/accounts/graph", tags=["graph"])
+
+MAX_PATH_DEPTH = 8
+# Transfers that moved money, as in account_totals
+SETTLED_STATUSES = ("completed", "executed")
+CURRENCY = "USD"
+# A cycle that brings back at least this share of what left the account is flagged
+SUSPICIOUS_RETURN_RATIO = 0.9
+
+
+def edge_id(source, target):
+    return f"{source}->{target}"
+
+
+def fetch_accounts(account_ids):
+    """account id -> (type, nickname, balance, customer_id, transaction_count, transfers out, transfers in)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT a.id, a.type, a.nickname, a.balance, a.customer_id,
+                       COALESCE(t.transaction_count, 0),
+                       COALESCE(t.total_transfers_out, 0),
+                       COALESCE(t.total_transfers_in, 0)
+                FROM accounts a
+                LEFT JOIN account_totals t ON t.account_id = a.id
+                WHERE a.id = ANY(%s)
+            """, (list(account_ids),))
+            return {row[0]: row[1:] for row in cur.fetchall()}
+
+
+def fetch_descriptions(transfer_ids):
+    if not transfer_ids:
+        return {}
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, description FROM transfers WHERE id = ANY(%s)", (list(transfer_ids),))
+            return dict(cur.fetchall())
+
+
+def build_edges(graph, adj, pairs):
+    """GraphEdge dicts for (payer node, payee node) pairs, from the transfers in `adj`."""
+    transfers = {}
+    for u, v in pairs:
+        transfers[(u, v)] = [
+            k for k in range(adj.out_ptr[u], adj.out_ptr[u + 1]) if adj.out_nbr[k] == v
+        ]
+    descriptions = fetch_descriptions({
+        graph.transfer_ids[adj.out_edge[k]] for ks in transfers.values() for k in ks
+    })
+
+    edges = {}
+    for (u, v), ks in transfers.items():
+        amounts = [adj.out_amount[k] for k in ks]
+        dates = [from_epoch(adj.out_date[k]) for k in ks]
+        known_dates = [d for d in dates if d is not None]
+        source, target = graph.account_ids[u], graph.account_ids[v]
+        total = sum(amounts)
+        edges[(u, v)] = {
+            "id": edge_id(source, target),
+            "source": source,
+            "target": target,
+            "total_amount": total,
+            "transaction_count": len(ks),
+            "average_amount": total / len(ks),
+            "min_amount": min(amounts),
+            "max_amount": max(amounts),
+            "first_transaction_date": str(min(known_dates)) if known_dates else None,
+            "last_transaction_date": str(max(known_dates)) if known_dates else None,
+            "transactions": [
+                {
+                    "id": graph.transfer_ids[adj.out_edge[k]],
+                    "amount": adj.out_amount[k],
+                    "date": str(date) if date else None,
+                    "description": descriptions.get(graph.transfer_ids[adj.out_edge[k]]),
+                }
+                for k, date in zip(ks, dates)
+            ],
+        }
+    return edges
+
+
+def build_nodes(graph, node_ids):
+    accounts = fetch_accounts(graph.account_ids[v] for v in node_ids)
+    nodes = []
+    for v in node_ids:
+        account_id = graph.account_ids[v]
+        acc_type, nickname, balance, customer_id, count, outgoing, incoming = accounts.get(
+            account_id, (None, None, None, None, 0, 0, 0)
+        )
+        nodes.append({
+            "id": account_id,
+            "name": nickname or account_id,
+            "type": acc_type or "transfer_account",
+            "balance": float(balance) if balance is not None else 0.0,
+            "currency": CURRENCY,
+            "customer_id": customer_id,
+            "transaction_count": int(count),
+            "total_outgoing": float(outgoing),
+            "total_incoming": float(incoming),
+        })
+    return nodes
+
+
+@router.get("/paths")
+def get_account_paths(
+    start_account_id: str,
+    end_account_id: Optional[str] = None,
+    max_depth: int = Query(default=5, ge=1, le=MAX_PATH_DEPTH),
+    is_cycle: bool = False,
+    min_transaction_amount: float = 0,
+    max_paths: int = Query(default=100, ge=1, le=1000),
+    accept: Optional[str] = Header(default=None)
+):
+    """
+    Money-flow paths from one account to another over settled transfers,
+    shortest first, as GraphData. With is_cycle (or the same account at both
+    ends) the cycles through start_account_id are returned instead.
+
+    Paths are over distinct accounts; each hop is one aggregated edge per
+    payer -> payee pair, with its transfers listed. Sent in the columnar
+    binary layout with `Accept: application/x-graph-columnar`.
+    """
+    is_cycle = is_cycle or not end_account_id or end_account_id == start_account_id
+    target_account_id = start_account_id if is_cycle else end_account_id
+
+    try:
+        graph = get_transfer_graph()
+        start = graph.node_index.get(start_account_id)
+        target = graph.node_index.get(target_account_id)
+
+        found = []
+        if start is not None and target is not None:
+            cadj = graph.collapsed(min_transaction_amount, SETTLED_STATUSES)
+            found = find_paths(cadj, start, target, max_depth, max_paths)
+
+        pairs = list(dict.fromkeys((p[i], p[i + 1]) for p in found for i in range(len(p) - 1)))
+        edges = build_edges(graph, graph.adjacency(min_transaction_amount, SETTLED_STATUSES), pairs)
+        node_ids = list(dict.fromkeys(v for p in found for v in p)) or [
+            v for v in (start, target) if v is not None
+        ]
+        nodes = build_nodes(graph, node_ids)
+
+        paths = []
+        cycles = []
+        for i, p in enumerate(found):
+            path_edges = [edges[(p[j], p[j + 1])] for j in range(len(p) - 1)]
+            total = sum(e["total_amount"] for e in path_edges)
+            paths.append({
+                "path_id": f"{'cycle' if is_cycle else 'path'}_{i}",
+                "nodes": [graph.account_ids[v] for v in p],
+                "edges": [e["id"] for e in path_edges],
+                "total_amount": total,
+                "path_length": len(path_edges),
+                "is_cycle": is_cycle,
+            })
+            if is_cycle:
+                sent = path_edges[0]["total_amount"]
+                returned = path_edges[-1]["total_amount"]
+                suspicious = sent > 0 and returned >= SUSPICIOUS_RETURN_RATIO * sent
+                cycles.append({
+                    "cycle_id": f"cycle_{i}",
+                    "nodes": paths[-1]["nodes"],
+                    "edges": paths[-1]["edges"],
+                    "total_amount": total,
+                    "cycle_length": len(path_edges),
+                    "net_flow": returned - sent,
+                    "is_suspicious": suspicious,
+                    "suspicious_reason": (
+                        f"{returned / sent:.0%} of the amount sent returns to {start_account_id}"
+                        if suspicious else None
+                    ),
+                })
+
+        edge_list = list(edges.values())
+        result = {
+            "query": {
+                "start_account_id": start_account_id,
+                "end_account_id": target_account_id,
+                "max_depth": max_depth,
+                "is_cycle": is_cycle,
+            },
+            "nodes": nodes,
+            "edges": edge_list,
+            "paths": paths,
+            "cycles": cycles,
+            "summary": {
+                "total_nodes": len(nodes),
+                "total_edges": len(edge_list),
+                "total_paths": len(paths),
+                "total_cycles": len(cycles),
+                "total_flow_amount": sum(e["total_amount"] for e in edge_list),
+                "average_path_length": (
+                    sum(p["path_length"] for p in paths) / len(paths) if paths else 0
+                ),
+            },
+        }
+        if wants(accept, GRAPH_BINARY_MEDIA_TYPE):
+            return graph_response(result)
+        return result
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -0,0 +1,231 @@
+"""
+Async variant of the accounts router (DB_ACCESS_MODE=async).
+
+Same routes, parameters and responses as app/routers/accounts.py, but the
+handlers are coroutines backed by the psycopg 3 async pool, so concurrency
+is bounded by the pool size instead of Starlette's worker threadpool.
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from datetime import datetime
+
+from app.database.async_db import get_async_db_connection
+from app.database.account_queries import (
+    ACCOUNT_BY_ID_QUERY,
+    ACCOUNT_TOTALS_QUERY,
+    build_accounts_queries,
+    build_accounts_response,
+    format_account_row,
+    build_transaction_queries,
+    build_transaction_keyset_query,
+    build_keyset_page,
+    decode_cursor,
+    format_transaction_row,
+    build_recent_activity_query,
+    build_transaction_summary_query,
+    build_transaction_summary,
+)
+
+router = APIRouter(prefix="/accounts", tags=["accounts"])
+
+
+@router.get("")
+async def get_accounts(
+    customer_id: Optional[str] = None,
+    account_type: Optional[str] = None,
+    min_balance: Optional[float] = None,
+    max_balance: Optional[float] = None,
+    limit: int = Query(default=100, le=1000),
+    offset: int = Query(default=0, ge=0)
+):
+    """Get accounts with optional filtering (see accounts.get_accounts)."""
+    (count_query, count_params), (query, params) = build_accounts_queries(
+        customer_id, account_type, min_balance, max_balance, limit, offset
+    )
+
+    try:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(count_query, count_params)
+                total_count = (await cur.fetchone())[0]
+
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+
+        return build_accounts_response(rows, total_count, limit, offset, {
+            "customer_id": customer_id,
+            "account_type": account_type,
+            "min_balance": min_balance,
+            "max_balance": max_balance
+        })
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.get("/{account_id}")
+async def get_account(account_id: str):
+    """Get a specific account by ID."""
+    try:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(ACCOUNT_BY_ID_QUERY, (account_id,))
+                row = await cur.fetchone()
+
+        if not row:
+            raise HTTPException(status_code=404, detail="Account not found")
+
+        return format_account_row(row)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.get("/{account_id}/transactions")
+async def get_account_transactions(
+    account_id: str,
+    transactions_after: Optional[str] = Query(None, description="Date in YYYYMMDD format"),
+    transactions_before: Optional[str] = Query(None, description="Date in YYYYMMDD format"),
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    transaction_type: Optional[str] = Query(None, description="deposit, withdrawal, transfer_in, or transfer_out"),
+    status: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    pagination: str = Query(default="offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (implies pagination=cursor)"),
+    include_total: Optional[bool] = Query(None, description="Count all matching rows (default: on for offset, off for cursor)")
+):
+    """Get all transactions for an account with filtering (see accounts.get_account_transactions)."""
+    date_after = None
+    date_before = None
+
+    if transactions_after:
+        try:
+            date_after = datetime.strptime(transactions_after, "%Y%m%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid transactions_after format. Use YYYYMMDD")
+
+    if transactions_before:
+        try:
+            date_before = datetime.strptime(transactions_before, "%Y%m%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid transactions_before format. Use YYYYMMDD")
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    use_cursor = pagination == "cursor" or cursor is not None
+    if include_total is None:
+        include_total = not use_cursor
+
+    queries = build_transaction_queries(
+        account_id, date_after, date_before, min_amount, max_amount, transaction_type, status, limit, offset
+    )
+    if queries is None:
+        raise HTTPException(status_code=400, detail="No valid transaction type specified")
+
+    (count_query, count_params), (combined_query, all_params) = queries
+    if use_cursor:
+        combined_query, all_params = build_transaction_keyset_query(
+            account_id, date_after, date_before, min_amount, max_amount, transaction_type, status, after, limit
+        )
+
+    try:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor() as cur:
+                total_count = None
+                if include_total:
+                    await cur.execute(count_query, count_params)
+                    total_count = (await cur.fetchone())[0]
+
+                await cur.execute(combined_query, all_params)
+                rows = await cur.fetchall()
+
+        if use_cursor:
+            transactions, next_cursor = build_keyset_page(rows, limit)
+            return {
+                "account_id": account_id,
+                "returned": len(transactions),
+                "total": total_count,
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "transactions": transactions
+            }
+
+        transactions = [format_transaction_row(row) for row in rows]
+
+        return {
+            "account_id": account_id,
+            "returned": len(transactions),
+            "total": total_count,
+            "limit": limit,
+            "offset": offset,
+            "transactions": transactions
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.get("/{account_id}/recent-activity")
+async def get_recent_activity(
+    account_id: str,
+    days: int = Query(default=30, ge=1, le=365, description="Number of days to look back")
+):
+    """Get recent transaction activity for an account (see accounts.get_recent_activity)."""
+    query, params = build_recent_activity_query(account_id, days)
+
+    try:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+
+        transactions = [format_transaction_row(row) for row in rows]
+
+        return {
+            "account_id": account_id,
+            "days": days,
+            "activity_count": len(transactions),
+            "transactions": transactions
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.get("/{account_id}/transaction-summary")
+async def get_transaction_summary(
+    account_id: str,
+    include_transactions: bool = Query(default=False, description="Also list every settled transaction")
+):
+    """Get summary statistics for an account (see accounts.get_transaction_summary)."""
+    try:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(ACCOUNT_TOTALS_QUERY, (account_id,))
+                totals_row = await cur.fetchone()
+
+                if not totals_row:
+                    raise HTTPException(status_code=404, detail="Account not found")
+
+                rows = None
+                if include_transactions:
+                    query, params = build_transaction_summary_query(account_id)
+                    await cur.execute(query, params)
+                    rows = await cur.fetchall()
+
+        return build_transaction_summary(totals_row, rows)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
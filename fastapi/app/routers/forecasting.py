@@ -15,6 +15,34 @@ from app.database.db_init import get_db_connection
 
 router = APIRouter(prefix="/forecasting", tags=["forecasting"])
 
+# Daily net cash flow for one account (credits positive, debits negative)
+BALANCE_HISTORY_QUERY = """
+SELECT
+    DATE(transaction_date) as date,
+    SUM(signed_amount) as daily_net
+FROM ledger
+WHERE account_id = %s
+    AND status = 'executed'
+    AND transaction_date IS NOT NULL
+    AND amount IS NOT NULL
+GROUP BY DATE(transaction_date)
+ORDER BY date ASC;
+"""
+
+# Daily total deposits across all accounts
+AGGREGATE_DEPOSITS_QUERY = """
+SELECT
+    DATE(transaction_date) as date,
+    SUM(amount) as total_deposits
+FROM ledger
+WHERE entry_type = 'deposit'
+    AND status = 'executed'
+    AND transaction_date IS NOT NULL
+    AND amount IS NOT NULL
+GROUP BY DATE(transaction_date)
+ORDER BY date ASC;
+"""
+
 # Check Prophet availability at module load
 PROPHET_AVAILABLE = False
 try:
@@ -82,52 +110,8 @@ async def forecast_account_balance(
             logger.info(f"Current balance: {current_balance}")
 
             # Get daily net cash flow
-            query = """
-            WITH daily_flows AS (
-                SELECT
-                    DATE(transaction_date) as date,
-                    SUM(amount) as net_flow
-                FROM deposits
-                WHERE account_id = %s
-                    AND status = 'executed'
-                    AND transaction_date IS NOT NULL
-                    AND amount IS NOT NULL
-                GROUP BY DATE(transaction_date)
-
-                UNION ALL
-
-                SELECT
-                    DATE(transaction_date) as date,
-                    -SUM(amount) as net_flow
-                FROM withdrawals
-                WHERE account_id = %s
-                    AND status = 'executed'
-                    AND transaction_date IS NOT NULL
-                    AND amount IS NOT NULL
-                GROUP BY DATE(transaction_date)
-
-                UNION ALL
-
-                SELECT
-                    DATE(transaction_date) as date,
-                    -SUM(amount) as net_flow
-                FROM transfers
-                WHERE account_id = %s
-                    AND status = 'executed'
-                    AND transaction_date IS NOT NULL
-                    AND amount IS NOT NULL
-                GROUP BY DATE(transaction_date)
-            )
-            SELECT
-                date,
-                SUM(net_flow) as daily_net
-            FROM daily_flows
-            GROUP BY date
-            ORDER BY date ASC;
-            """
-
             logger.info("Executing transaction history query...")
-            cur.execute(query, (account_id, account_id, account_id))
+            cur.execute(BALANCE_HISTORY_QUERY, (account_id,))
             rows = cur.fetchall()
             logger.info(f"Found {len(rows)} historical data points")
 
@@ -267,20 +251,8 @@ async def forecast_total_deposits(
             cur = conn.cursor()
 
             # Get daily total deposits across all accounts
-            query = """
-            SELECT
-                DATE(transaction_date) as date,
-                SUM(amount) as total_deposits
-            FROM deposits
-            WHERE status = 'executed'
-                AND transaction_date IS NOT NULL
-                AND amount IS NOT NULL
-            GROUP BY DATE(transaction_date)
-            ORDER BY date ASC;
-            """
-
             logger.info("Executing aggregate query...")
-            cur.execute(query)
+            cur.execute(AGGREGATE_DEPOSITS_QUERY)
             rows = cur.fetchall()
             logger.info(f"Found {len(rows)} historical data points")
 
@@ -1,195 +1,262 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 import sys
 import os
+import numpy as np
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 
 # Ensure parent path is accessible (optional depending on project structure)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from app.database.db_init import get_db_connection  # Uses env vars
+from app.transfer_graph.graph import from_epoch
+from app.transfer_graph.store import get_transfer_graph, add_pending_transfers
+from app.transfer_graph.cycles import top_cycles_from, scan_cycles, scan_cycles_johnson, scan_temporal_cycles
+from app.transfer_graph.parallel import SCAN_WORKERS
+from app.transfer_graph.incremental import check_new_transfers
 
 router = APIRouter(prefix="/fraud", tags=["fraud"])
 
+# Chains are walked payer -> payee over completed transfers in the in-memory
+# transfer graph (app/transfer_graph), not with recursive SQL
+MAX_SEARCH_DEPTH = 10
+SECONDS_PER_DAY = 86400
+
+
+class TransferIn(BaseModel):
+    id: str
+    payer_id: str
+    payee_id: str
+    amount: float
+    transaction_date: Optional[datetime] = None
+    status: str = "completed"
+    type: Optional[str] = None
+    description: Optional[str] = None
+    medium: Optional[str] = None
+
+
+def fetch_descriptions(transfer_ids):
+    """transfer id -> description; the graph doesn't keep free text."""
+    transfer_ids = list(transfer_ids)
+    if not transfer_ids:
+        return {}
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, description FROM transfers WHERE id = ANY(%s)", (transfer_ids,))
+            return dict(cur.fetchall())
+
 
 @router.get("/circular-transfers/{account_id}")
-def detect_circular_transfers(account_id: str, max_depth: int = 5, min_amount: float = 0):
+def detect_circular_transfers(
+    account_id: str,
+    max_depth: int = Query(default=5, ge=1, le=MAX_SEARCH_DEPTH),
+    min_amount: float = 0,
+    temporal: bool = Query(default=False, description="Only chains whose transfers happen in date order"),
+    window_days: float = Query(default=30, gt=0, description="Temporal mode: max days from first to last transfer")
+):
     """
     Detect circular money flows starting from a given account using graph traversal.
-    """
-    query = """
-    WITH RECURSIVE transfer_chain AS (
-        SELECT
-            t.id,
-            t.account_id,
-            t.payer_id,
-            t.amount,
-            t.transaction_date,
-            t.description,
-            t.status,
-            1 as depth,
-            ARRAY[t.account_id] as path,
-            ARRAY[t.id] as transfer_path,
-            t.amount as running_total
-        FROM transfers t
-        WHERE t.account_id = %s
-            AND t.amount >= %s
-            AND t.status = 'completed'
-
-        UNION ALL
-
-        SELECT
-            t.id,
-            t.account_id,
-            t.payer_id,
-            t.amount,
-            t.transaction_date,
-            t.description,
-            t.status,
-            tc.depth + 1,
-            tc.path || t.account_id,
-            tc.transfer_path || t.id,
-            tc.running_total + t.amount
-        FROM transfers t
-        INNER JOIN transfer_chain tc ON t.account_id = tc.payer_id
-        WHERE
-            tc.depth < %s
-            AND NOT (t.account_id = ANY(tc.path))
-            AND t.amount >= %s
-            AND t.status = 'completed'
-    )
-    SELECT
-        path || payer_id as full_path,
-        transfer_path,
-        depth,
-        array_agg(amount) as amounts,
-        array_agg(transaction_date) as dates,
-        array_agg(description) as descriptions,
-        MAX(running_total) as total_amount
-    FROM transfer_chain
-    WHERE payer_id = %s
-    GROUP BY path, payer_id, transfer_path, depth
-    ORDER BY total_amount DESC, depth
-    LIMIT 100;
-    """
 
+    In temporal mode each transfer must be dated no earlier than the one
+    before it, and the chain must close within window_days of its first
+    transfer out of the account.
+    """
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(query, (account_id, min_amount, max_depth, min_amount, account_id))
-                rows = cur.fetchall()
+        graph = get_transfer_graph()
+        origin = graph.node_index.get(account_id)
+        window = window_days * SECONDS_PER_DAY if temporal else None
+
+        cycles = []
+        if origin is not None:
+            adj = graph.adjacency(min_amount)
+            cycles = top_cycles_from(adj, origin, max_depth, limit=100, window=window)
+
+        if not cycles:
+            return {
+                "account_id": account_id,
+                "circular_flows_detected": False,
+                "count": 0,
+                "chains": []
+            }
+
+        edge_ids = {adj.out_edge[k] for _, path_edges, _ in cycles for k in path_edges}
+        descriptions = fetch_descriptions(graph.transfer_ids[e] for e in edge_ids)
+
+        chains = []
+        for path_nodes, path_edges, total_amount in cycles:
+            transfer_ids = [graph.transfer_ids[adj.out_edge[k]] for k in path_edges]
+            dates = [from_epoch(adj.out_date[k]) for k in path_edges]
+            chains.append({
+                "chain_length": len(path_edges),
+                "account_path": [graph.account_ids[v] for v in path_nodes] + [account_id],
+                "transfer_ids": transfer_ids,
+                "amounts": [adj.out_amount[k] for k in path_edges],
+                "dates": [str(d) if d else None for d in dates],
+                "descriptions": [descriptions.get(t) for t in transfer_ids],
+                "total_amount": float(total_amount)
+            })
 
-                if not rows:
-                    return {
-                        "account_id": account_id,
-                        "circular_flows_detected": False,
-                        "count": 0,
-                        "chains": []
-                    }
-
-                chains = []
-                for row in rows:
-                    full_path, transfer_path, depth, amounts, dates, descriptions, total_amount = row
-                    chains.append({
-                        "chain_length": depth,
-                        "account_path": full_path,
-                        "transfer_ids": transfer_path,
-                        "amounts": [float(a or 0.0) for a in amounts],
-                        "dates": [str(d) if d else None for d in dates],
-                        "descriptions": descriptions,
-                        "total_amount": float(total_amount or 0.0)
-                    })
-
-                return {
-                    "account_id": account_id,
-                    "circular_flows_detected": True,
-                    "count": len(chains),
-                    "chains": chains,
-                    "risk_level": "HIGH" if len(chains) > 0 else "LOW"
-                }
+        return {
+            "account_id": account_id,
+            "circular_flows_detected": True,
+            "count": len(chains),
+            "chains": chains,
+            "risk_level": "HIGH" if len(chains) > 0 else "LOW"
+        }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
 @router.get("/scan-all")
-def scan_all_accounts(max_depth: int = 5, min_amount: float = 0, limit: int = 100):
+def scan_all_accounts(
+    max_depth: int = Query(default=5, ge=1, le=MAX_SEARCH_DEPTH),
+    min_amount: float = 0,
+    limit: int = 100,
+    mode: str = Query(default="johnson", pattern="^(johnson|dfs)$",
+                      description="johnson: SCC-pruned Johnson enumeration; dfs: pruned search from every account"),
+    temporal: bool = Query(default=False, description="Only chains whose transfers happen in date order"),
+    window_days: float = Query(default=30, gt=0, description="Temporal mode: max days from first to last transfer")
+):
     """
     Scan all accounts for circular transfer fraud.
+
+    Each account on a cycle is reported as an origin, with the number of
+    cycles through it, their summed totals and the longest one. Temporal
+    mode (see /circular-transfers) always uses the date-ordered search and
+    ignores `mode`.
+    """
+    try:
+        graph = get_transfer_graph()
+        if temporal:
+            counts, totals, max_lengths = scan_temporal_cycles(graph.adjacency(min_amount), max_depth,
+                                                               window_days * SECONDS_PER_DAY)
+        elif mode == "johnson":
+            counts, totals, max_lengths = scan_cycles_johnson(graph.collapsed(min_amount), max_depth,
+                                                              workers=SCAN_WORKERS)
+        else:
+            counts, totals, max_lengths = scan_cycles(graph.adjacency(min_amount), max_depth)
+
+        flagged = np.flatnonzero(counts)
+        # count DESC, total DESC
+        order = np.lexsort((-totals[flagged], -counts[flagged]))[:max(limit, 0)]
+
+        fraudulent_accounts = []
+        for v in flagged[order].tolist():
+            count = int(counts[v])
+            fraudulent_accounts.append({
+                "account_id": graph.account_ids[v],
+                "circular_flow_count": count,
+                "total_circular_amount": float(totals[v]),
+                "max_chain_length": int(max_lengths[v]),
+                "risk_level": "HIGH" if count > 2 else "MEDIUM"
+            })
+
+        return {
+            "scanned": True,
+            "fraudulent_accounts_found": len(fraudulent_accounts),
+            "accounts": fraudulent_accounts
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.post("/transfers")
+def ingest_transfers(
+    transfers: List[TransferIn],
+    max_depth: int = Query(default=5, ge=1, le=MAX_SEARCH_DEPTH),
+    min_amount: float = 0
+):
     """
-    query = """
-    WITH RECURSIVE transfer_chain AS (
-        SELECT
-            t.id,
-            t.account_id,
-            t.payer_id,
-            t.amount,
-            t.transaction_date,
-            1 as depth,
-            ARRAY[t.account_id] as path,
-            ARRAY[t.id] as transfer_path,
-            t.amount as running_total,
-            t.account_id as origin_account
-        FROM transfers t
-        WHERE t.amount >= %s
-            AND t.status = 'completed'
-
-        UNION ALL
-
-        SELECT
-            t.id,
-            t.account_id,
-            t.payer_id,
-            t.amount,
-            t.transaction_date,
-            tc.depth + 1,
-            tc.path || t.account_id,
-            tc.transfer_path || t.id,
-            tc.running_total + t.amount,
-            tc.origin_account
-        FROM transfers t
-        INNER JOIN transfer_chain tc ON t.account_id = tc.payer_id
-        WHERE
-            tc.depth < %s
-            AND NOT (t.account_id = ANY(tc.path))
-            AND t.amount >= %s
-            AND t.status = 'completed'
-    )
-    SELECT
-        origin_account,
-        COUNT(DISTINCT transfer_path) as circular_count,
-        SUM(running_total) as total_circular_amount,
-        MAX(depth) as max_chain_length
-    FROM transfer_chain
-    WHERE payer_id = origin_account
-    GROUP BY origin_account
-    ORDER BY circular_count DESC, total_circular_amount DESC
-    LIMIT %s;
+    Store a batch of transfers and check them for new circular flows.
+
+    Only cycles through the newly inserted transfers are searched (ids that
+    already exist are ignored); rings not seen before are recorded in
+    fraud_alerts and returned.
     """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                inserted = execute_values(cur, """
+                    INSERT INTO transfers
+                    (id, type, amount, payer_id, payee_id, description, medium, transaction_date, status)
+                    VALUES %s
+                    ON CONFLICT (id) DO NOTHING
+                    RETURNING id, payer_id, payee_id, amount, transaction_date, status
+                """, [
+                    (t.id, t.type, t.amount, t.payer_id, t.payee_id, t.description, t.medium,
+                     t.transaction_date, t.status)
+                    for t in transfers
+                ], fetch=True)
+
+            # One transaction: if detection fails nothing is stored, so a retry checks the batch again
+            alerts = check_new_transfers(conn, inserted, max_depth, min_amount)
+            conn.commit()
+        add_pending_transfers(inserted)
+
+        return {
+            "received": len(transfers),
+            "inserted": len(inserted),
+            "alerts_created": len(alerts),
+            "alerts": alerts
+        }
+
+    except psycopg2.errors.ForeignKeyViolation as e:
+        raise HTTPException(status_code=400, detail=f"Unknown account: {e.diag.message_detail}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.get("/alerts")
+def get_alerts(
+    status: Optional[str] = Query(default="open", description="open, dismissed, ... or omit for all"),
+    account_id: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000)
+):
+    """Circular-transfer alerts raised by the incremental detector, newest first."""
+    conditions = []
+    params = []
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    if account_id:
+        conditions.append("account_path @> ARRAY[%s]")
+        params.append(account_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(query, (min_amount, max_depth, min_amount, limit))
+                cur.execute(f"""
+                    SELECT id, trigger_transfer_id, chain_length, account_path, transfer_ids,
+                           amounts, total_amount, status, detected_at
+                    FROM fraud_alerts
+                    {where}
+                    ORDER BY detected_at DESC, id DESC
+                    LIMIT %s
+                """, params + [limit])
                 rows = cur.fetchall()
 
-                fraudulent_accounts = []
-                for row in rows:
-                    account_id, count, total_amount, chain_length = row
-                    fraudulent_accounts.append({
-                        "account_id": account_id,
-                        "circular_flow_count": count,
-                        "total_circular_amount": float(total_amount or 0.0),
-                        "max_chain_length": chain_length,
-                        "risk_level": "HIGH" if count > 2 else "MEDIUM"
-                    })
-
-                return {
-                    "scanned": True,
-                    "fraudulent_accounts_found": len(fraudulent_accounts),
-                    "accounts": fraudulent_accounts
-                }
+        alerts = []
+        for row in rows:
+            alert_id, trigger, length, path, transfer_ids, amounts, total, alert_status, detected_at = row
+            alerts.append({
+                "id": alert_id,
+                "trigger_transfer_id": trigger,
+                "chain_length": length,
+                "account_path": path,
+                "transfer_ids": transfer_ids,
+                "amounts": [float(a) for a in amounts],
+                "total_amount": float(total),
+                "status": alert_status,
+                "detected_at": str(detected_at)
+            })
+
+        return {"count": len(alerts), "alerts": alerts}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Header
+from fastapi.responses import StreamingResponse
 from neo4j import GraphDatabase
+from typing import Optional
+import json
 import os
 
+from app.graph_binary import GRAPH_BINARY_MEDIA_TYPE, graph_response
+
 router = APIRouter(prefix="/graph", tags=["graph"])
 
 # Neo4j config
@@ -11,37 +16,132 @@ NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "testpassword")
 
 neo_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Records pulled from Neo4j per round trip while streaming
+STREAM_FETCH_SIZE = 2000
+# Bytes of NDJSON buffered before a chunk is sent
+STREAM_CHUNK_BYTES = 64 * 1024
+
+NODES_QUERY = """
+    MATCH (n:Account)
+    RETURN n.id AS id, n.type AS type, n.nickname AS nickname,
+           n.balance AS balance, n.rewards AS rewards
+"""
+
+EDGES_QUERY = """
+    MATCH (from:Account)-[t:TRANSFERRED_TO]->(to:Account)
+    RETURN from.id AS source, to.id AS target,
+           t.amount AS amount, t.transaction_date AS transaction_date,
+           t.status AS status, t.label AS label
+"""
+
+
+# One edge per (payer, payee) pair, shaped like the frontend's GraphEdge
+# (frontend/src/types/graph.ts). {transactions} is the per-transfer list
+# when requested, an empty list otherwise.
+AGGREGATED_EDGES_QUERY = """
+    MATCH (from:Account)-[t:TRANSFERRED_TO]->(to:Account)
+    WHERE $min_amount <= 0 OR t.amount >= $min_amount
+    WITH from.id AS source, to.id AS target, t
+    RETURN source + '->' + target AS id, source, target,
+           sum(t.amount) AS total_amount,
+           count(t) AS transaction_count,
+           avg(t.amount) AS average_amount,
+           min(t.amount) AS min_amount,
+           max(t.amount) AS max_amount,
+           toString(min(t.transaction_date)) AS first_transaction_date,
+           toString(max(t.transaction_date)) AS last_transaction_date,
+           {transactions} AS transactions
+"""
+
+EDGE_TRANSACTIONS = """collect({
+               id: t.id, amount: t.amount,
+               date: toString(t.transaction_date), description: t.description
+           })"""
+
+
+def aggregated_edges_query(include_transactions):
+    return AGGREGATED_EDGES_QUERY.format(transactions=EDGE_TRANSACTIONS if include_transactions else "[]")
+
+
+def wants(accept, media_type):
+    return accept is not None and media_type in accept
+
+
+def stream_ndjson(queries, params=None):
+    """
+    Run each (kind, query) in turn and yield its records as NDJSON lines,
+    {"kind": kind, ...record}, straight off the Neo4j cursor. Only one
+    fetch of records and one chunk of text are held at a time.
+    """
+    with neo_driver.session(fetch_size=STREAM_FETCH_SIZE) as session:
+        chunk = []
+        size = 0
+        for kind, query in queries:
+            for record in session.run(query, params or {}):
+                # default=str covers Neo4j temporal values
+                line = json.dumps({"kind": kind, **record.data()}, default=str) + "\n"
+                chunk.append(line)
+                size += len(line)
+                if size >= STREAM_CHUNK_BYTES:
+                    yield "".join(chunk)
+                    chunk = []
+                    size = 0
+        if chunk:
+            yield "".join(chunk)
+
 
 @router.get("/graph")
-def get_graph():
+def get_graph(accept: Optional[str] = Header(default=None)):
     """
     Fetch nodes and relationships from Neo4j.
-    Optional limit to reduce payload size.
+
+    With `Accept: application/x-ndjson` the graph is streamed as one JSON
+    object per line, all nodes ({"kind": "node", ...}) then all edges
+    ({"kind": "edge", ...}), so memory stays flat however large it is.
+    With `Accept: application/x-graph-columnar` it is sent in the columnar
+    binary layout from app/graph_binary.py.
     """
+    if wants(accept, NDJSON_MEDIA_TYPE):
+        return StreamingResponse(stream_ndjson([("node", NODES_QUERY), ("edge", EDGES_QUERY)]),
+                                 media_type=NDJSON_MEDIA_TYPE)
 
     with neo_driver.session() as session:
         # Fetch nodes
-        node_result = session.run(
-            """
-            MATCH (n:Account)
-            RETURN n.id AS id, n.type AS type, n.nickname AS nickname,
-                   n.balance AS balance, n.rewards AS rewards
-            """
-        )
-
-        nodes = [record.data() for record in node_result]
+        nodes = [record.data() for record in session.run(NODES_QUERY)]
 
         # Fetch edges
-        edge_result = session.run(
-            """
-            MATCH (from:Account)-[t:TRANSFERRED_TO]->(to:Account)
-            RETURN from.id AS source, to.id AS target,
-                   t.amount AS amount, t.transaction_date AS transaction_date,
-                   t.status AS status, t.label AS label
-        
-            """
-        )
-
-        edges = [record.data() for record in edge_result]
+        edges = [record.data() for record in session.run(EDGES_QUERY)]
+
+    if wants(accept, GRAPH_BINARY_MEDIA_TYPE):
+        return graph_response({"nodes": nodes, "edges": edges})
+    return {"nodes": nodes, "edges": edges}
+
+
+@router.get("/aggregated")
+def get_aggregated_graph(
+    min_transaction_amount: float = 0,
+    include_transactions: bool = Query(default=False, description="List each edge's transfers as well"),
+    accept: Optional[str] = Header(default=None)
+):
+    """
+    Nodes plus one aggregated edge per account pair (count, total, average,
+    min/max amount, first/last date), grouped in Neo4j rather than in the
+    browser. Raw transfers are only listed with include_transactions.
+    Accepts application/x-ndjson and application/x-graph-columnar like
+    /graph/graph.
+    """
+    params = {"min_amount": min_transaction_amount}
+    edges_query = aggregated_edges_query(include_transactions)
+
+    if wants(accept, NDJSON_MEDIA_TYPE):
+        return StreamingResponse(stream_ndjson([("node", NODES_QUERY), ("edge", edges_query)], params),
+                                 media_type=NDJSON_MEDIA_TYPE)
+
+    with neo_driver.session() as session:
+        nodes = [record.data() for record in session.run(NODES_QUERY)]
+        edges = [record.data() for record in session.run(edges_query, params)]
 
+    if wants(accept, GRAPH_BINARY_MEDIA_TYPE):
+        return graph_response({"nodes": nodes, "edges": edges})
     return {"nodes": nodes, "edges": edges}
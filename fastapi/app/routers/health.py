@@ -1,7 +1,30 @@
 from fastapi import APIRouter
+from app.database.db_init import get_pool
+from app.transfer_graph.store import graph_stats
 
 router = APIRouter()
 
 @router.get("/health")
 async def get_health():
     return {"message": "Healthy"}
+
+
+@router.get("/health/db-pool")
+async def get_db_pool_stats():
+    """Connection pool size, in-use count and checkout wait times."""
+    pool = get_pool()
+    stats = {"pool_open": False} if pool is None else {"pool_open": not pool.closed, **pool.stats()}
+
+    # Only present when running with DB_ACCESS_MODE=async
+    from app.database.async_db import get_async_pool
+    async_pool = get_async_pool()
+    if async_pool is not None:
+        stats["async_pool"] = async_pool.get_stats()
+
+    return stats
+
+
+@router.get("/health/transfer-graph")
+async def get_transfer_graph_stats():
+    """Size and freshness of the in-memory transfer graph behind /fraud."""
+    return graph_stats()
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException, Query, Header
+from typing import Literal, Optional
+import sys
+import os
+
+# Ensure parent path is accessible (optional depending on project structure)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.routers.account_graph import SETTLED_STATUSES, build_nodes, edge_id
+from app.transfer_graph.store import get_transfer_graph
+from app.transfer_graph.neighborhood import neighborhood
+from app.graph_binary import GRAPH_BINARY_MEDIA_TYPE, graph_response
+from app.routers.graph import wants
+
+# Served from the in-memory transfer graph, next to the Neo4j routes in graph.py
+router = APIRouter(prefix="/graph", tags=["graph"])
+
+MAX_HOPS = 4
+MAX_NODE_BUDGET = 5000
+MAX_EDGE_BUDGET = 20000
+
+
+@router.get("/neighborhood/{account_id}")
+def get_neighborhood(
+    account_id: str,
+    hops: int = Query(default=1, ge=1, le=MAX_HOPS),
+    max_nodes: int = Query(default=200, ge=1, le=MAX_NODE_BUDGET),
+    max_edges: int = Query(default=1000, ge=0, le=MAX_EDGE_BUDGET),
+    rank_by: Literal["amount", "count"] = Query(
+        default="amount", description="Which neighbors to keep once a budget is hit: most money moved or most transfers"
+    ),
+    min_transaction_amount: float = 0,
+    accept: Optional[str] = Header(default=None)
+):
+    """
+    The accounts within `hops` transfers of account_id (either direction)
+    and the aggregated edges between them, for account detail views.
+
+    At most max_nodes accounts and max_edges edges are returned; past a
+    budget the neighbors and edges ranked highest by rank_by are kept, and
+    `truncated` says which budget cut something off. Sent in the columnar
+    binary layout with `Accept: application/x-graph-columnar`.
+    """
+    try:
+        graph = get_transfer_graph()
+        center = graph.node_index.get(account_id)
+        if center is None:
+            raise HTTPException(status_code=404, detail=f"No transfers found for account {account_id}")
+
+        nadj = graph.neighbors(min_transaction_amount, SETTLED_STATUSES)
+        hop_of, found, truncated = neighborhood(nadj, center, hops, max_nodes, max_edges, rank_by)
+
+        nodes = build_nodes(graph, list(hop_of))
+        for node, hop in zip(nodes, hop_of.values()):
+            node["hop"] = hop
+
+        edges = []
+        for payer, payee, count, amount in found:
+            source, target = graph.account_ids[payer], graph.account_ids[payee]
+            edges.append({
+                "id": edge_id(source, target),
+                "source": source,
+                "target": target,
+                "total_amount": amount,
+                "transaction_count": count,
+                "average_amount": amount / count,
+            })
+
+        result = {
+            "query": {
+                "account_id": account_id,
+                "hops": hops,
+                "max_nodes": max_nodes,
+                "max_edges": max_edges,
+                "rank_by": rank_by,
+            },
+            "nodes": nodes,
+            "edges": edges,
+            "truncated": truncated,
+            "summary": {
+                "total_nodes": len(nodes),
+                "total_edges": len(edges),
+                "total_flow_amount": sum(e["total_amount"] for e in edges),
+            },
+        }
+        if wants(accept, GRAPH_BINARY_MEDIA_TYPE):
+            return graph_response(result)
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
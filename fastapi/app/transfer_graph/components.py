@@ -0,0 +1,73 @@
+"""
+Strongly connected components of a transfer graph.
+
+Every cycle lies inside one strongly connected component, so cycle scans
+only need to look at components with more than one account.
+"""
+
+
+def strongly_connected_components(ptr, nbr, num_nodes):
+    """
+    Tarjan's algorithm over CSR lists (iterative, so deep graphs don't hit
+    the recursion limit).
+
+    Returns (component, sizes): the component id of every node and the
+    number of nodes in each component.
+    """
+    index = [-1] * num_nodes
+    low = [0] * num_nodes
+    on_stack = [False] * num_nodes
+    component = [-1] * num_nodes
+    sizes = []
+    stack = []
+    counter = 0
+
+    for root in range(num_nodes):
+        if index[root] != -1:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, ptr[root])]
+
+        while work:
+            v, k = work[-1]
+            end = ptr[v + 1]
+            descended = False
+            while k < end:
+                w = nbr[k]
+                k += 1
+                if index[w] == -1:
+                    work[-1] = (v, k)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, ptr[w]))
+                    descended = True
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            if descended:
+                continue
+
+            work.pop()
+            if low[v] == index[v]:
+                c = len(sizes)
+                size = 0
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = c
+                    size += 1
+                    if w == v:
+                        break
+                sizes.append(size)
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+
+    return component, sizes
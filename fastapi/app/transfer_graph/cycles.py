@@ -0,0 +1,400 @@
+"""
+Bounded-depth cycle search on a transfer graph Adjacency.
+
+A cycle is an elementary chain of transfers (no account visited twice)
+that leaves an account and returns to it in at most max_depth hops. Every
+search first runs a reverse BFS from the origin, so the forward walk only
+steps onto accounts that can still get back to the origin within the
+remaining hop budget.
+
+Temporal cycles additionally need every transfer dated no earlier than the
+one before it, and the whole chain inside a time window from its first
+transfer. Each account's out-edges are sorted by date, so the walk
+binary-searches to the first edge it may take and stops at the window end.
+"""
+import heapq
+from bisect import bisect_left
+
+import numpy as np
+
+from app.transfer_graph.graph import NO_DATE
+
+UNREACHED = 1 << 30
+
+# Below this many start accounts a process pool costs more than it saves
+PARALLEL_MIN_STARTS = 2000
+
+
+def _search(adj, origin, max_depth, dist, on_path, on_cycle, floor=-1):
+    """
+    Call on_cycle(path_nodes, path_edges, total) for every cycle through
+    `origin`, where path_edges are positions in adj.out_*. Only accounts
+    with node id > floor are visited besides the origin.
+
+    `dist` and `on_path` are per-node scratch lists (UNREACHED / False)
+    and are restored before returning.
+    """
+    in_ptr, in_nbr = adj.in_ptr, adj.in_nbr
+    out_ptr, out_nbr, out_amount = adj.out_ptr, adj.out_nbr, adj.out_amount
+
+    # Exact hops back to the origin for accounts within `radius`. The walk
+    # steps freely for its first hops and only prunes on these distances
+    # once the remaining budget drops to the radius; meeting in the middle
+    # keeps both halves to about half the depth.
+    radius = min((max_depth + 1) // 2, max_depth - 1)
+    dist[origin] = 0
+    touched = [origin]
+    frontier = [origin]
+    for hops in range(1, radius + 1):
+        reached = []
+        for v in frontier:
+            for k in range(in_ptr[v], in_ptr[v + 1]):
+                u = in_nbr[k]
+                if u <= floor:
+                    break  # in-edges are sorted by descending payer
+                if dist[u] > hops:
+                    dist[u] = hops
+                    touched.append(u)
+                    reached.append(u)
+        if not reached:
+            break
+        frontier = reached
+
+    path_nodes = [origin]
+    path_edges = []
+    on_path[origin] = True
+
+    def extend(u, depth, total):
+        # Hops still available after taking the next edge
+        remaining = max_depth - depth - 1
+        for k in range(out_ptr[u], out_ptr[u + 1]):
+            v = out_nbr[k]
+            if v == origin:
+                path_edges.append(k)
+                on_cycle(path_nodes, path_edges, total + out_amount[k])
+                path_edges.pop()
+            elif (dist[v] <= remaining if remaining <= radius else v > floor) and not on_path[v]:
+                on_path[v] = True
+                path_nodes.append(v)
+                path_edges.append(k)
+                extend(v, depth + 1, total + out_amount[k])
+                path_edges.pop()
+                path_nodes.pop()
+                on_path[v] = False
+
+    if out_ptr[origin] < out_ptr[origin + 1]:
+        extend(origin, 0, 0.0)
+
+    on_path[origin] = False
+    for v in touched:
+        dist[v] = UNREACHED
+
+
+def _temporal_search(adj, origin, max_depth, window, on_path, on_cycle, from_start=False):
+    """
+    Like _search, for temporal cycles: transfers in date order, spanning at
+    most `window` seconds. Undated transfers are never used.
+
+    The cycle's date order may begin anywhere, so the walk from the origin
+    may take one "wrap" edge dated before the previous one (back to the
+    cycle's first transfer, within the window); from there on dates must
+    not pass the origin's first transfer. With from_start, no wrap is
+    allowed, i.e. only cycles whose first transfer leaves the origin, and
+    a cycle dated throughout the same instant only from the rotation that
+    starts at its lowest edge id, so a scan over every origin finds each
+    cycle exactly once.
+
+    There is no reverse BFS here: the window already cuts the walk down to
+    a handful of edges per account, and a hop-count BFS over the whole
+    neighbourhood costs more than it prunes.
+    """
+    out_ptr, out_nbr, out_amount = adj.out_ptr, adj.out_nbr, adj.out_amount
+    out_edge, out_date = adj.out_edge, adj.out_date
+
+    path_nodes = [origin]
+    path_edges = []
+    on_path[origin] = True
+
+    def extend(u, depth, total, ceiling, wrapped, lowest):
+        # `lowest`: smallest edge id on the path while every date equals the
+        # first one, -1 once the dates have moved on
+        prev = out_date[path_edges[-1]]
+        first_date = out_date[path_edges[0]]
+        can_wrap = not (from_start or wrapped)
+        end = out_ptr[u + 1]
+        for k in range(bisect_left(out_date, prev - window if can_wrap else prev, out_ptr[u], end), end):
+            date = out_date[k]
+            if date > ceiling:
+                break  # later edges are later still
+            wrap = date < prev
+            if wrap and date > first_date:
+                continue
+            v = out_nbr[k]
+            flat = lowest >= 0 and date == first_date
+            if v == origin:
+                if from_start and flat and min(lowest, out_edge[k]) < out_edge[path_edges[0]]:
+                    continue
+                path_edges.append(k)
+                on_cycle(path_nodes, path_edges, total + out_amount[k])
+                path_edges.pop()
+            elif depth + 1 < max_depth and not on_path[v]:
+                on_path[v] = True
+                path_nodes.append(v)
+                path_edges.append(k)
+                extend(v, depth + 1, total + out_amount[k], first_date if wrap else ceiling,
+                       wrapped or wrap, min(lowest, out_edge[k]) if flat else -1)
+                path_edges.pop()
+                path_nodes.pop()
+                on_path[v] = False
+
+    end = out_ptr[origin + 1]
+    for k in range(bisect_left(out_date, NO_DATE + 1, out_ptr[origin], end), end):
+        v = out_nbr[k]
+        path_edges.append(k)
+        if v == origin:
+            on_cycle(path_nodes, path_edges, out_amount[k])
+        elif max_depth > 1:
+            on_path[v] = True
+            path_nodes.append(v)
+            extend(v, 1, out_amount[k], out_date[k] + window, False, out_edge[k])
+            path_nodes.pop()
+            on_path[v] = False
+        path_edges.pop()
+
+    on_path[origin] = False
+
+
+def top_cycles_from(adj, origin, max_depth, limit=100, window=None):
+    """
+    Cycles through `origin`, largest total first (shorter first on ties),
+    at most `limit` of them. Each is (path_nodes, path_edges, total) with
+    path_nodes starting at the origin and path_edges as adj.out_* positions.
+
+    With a window (seconds), only temporal cycles (see _temporal_search).
+    """
+    heap = []
+    counter = 0
+
+    def keep(path_nodes, path_edges, total):
+        nonlocal counter
+        counter += 1
+        key = (total, -len(path_edges), -counter)
+        if len(heap) < limit:
+            heapq.heappush(heap, key + (list(path_nodes), list(path_edges)))
+        elif key > heap[0][:3]:
+            heapq.heapreplace(heap, key + (list(path_nodes), list(path_edges)))
+
+    n = adj.num_nodes
+    if window is None:
+        _search(adj, origin, max_depth, [UNREACHED] * n, [False] * n, keep)
+    else:
+        _temporal_search(adj, origin, max_depth, window, [False] * n, keep)
+
+    heap.sort(reverse=True)
+    return [(nodes, edges, total) for total, _, _, nodes, edges in heap]
+
+
+def _cycle_tally(n):
+    """Per-node counts/totals/max_lengths lists and an on_cycle callback crediting every account on a cycle."""
+    counts = [0] * n
+    totals = [0.0] * n
+    max_lengths = [0] * n
+
+    def record(path_nodes, path_edges, total):
+        length = len(path_edges)
+        for v in path_nodes:
+            counts[v] += 1
+            totals[v] += total
+            if length > max_lengths[v]:
+                max_lengths[v] = length
+
+    return counts, totals, max_lengths, record
+
+
+def scan_cycles(adj, max_depth):
+    """
+    Per-account cycle statistics over the whole graph.
+
+    Each cycle is enumerated once, from its lowest node id, and credited to
+    every account on it. Returns (counts, totals, max_lengths) as NumPy
+    arrays indexed by node id, where totals sums the amount of every cycle
+    the account is on.
+    """
+    n = adj.num_nodes
+    counts, totals, max_lengths, record = _cycle_tally(n)
+    dist = [UNREACHED] * n
+    on_path = [False] * n
+
+    out_ptr, in_ptr = adj.out_ptr, adj.in_ptr
+    for origin in range(n):
+        # Accounts that only send or only receive are on no cycle
+        if out_ptr[origin] == out_ptr[origin + 1] or in_ptr[origin] == in_ptr[origin + 1]:
+            continue
+        _search(adj, origin, max_depth, dist, on_path, record, floor=origin)
+
+    return np.array(counts, dtype=np.int64), np.array(totals), np.array(max_lengths, dtype=np.int64)
+
+
+def scan_temporal_cycles(adj, max_depth, window):
+    """
+    scan_cycles for temporal cycles: transfers in date order, spanning at
+    most `window` seconds. Each cycle is enumerated once, from the account
+    that sends its earliest transfer.
+    """
+    n = adj.num_nodes
+    counts, totals, max_lengths, record = _cycle_tally(n)
+    on_path = [False] * n
+
+    out_ptr, in_ptr = adj.out_ptr, adj.in_ptr
+    for origin in range(n):
+        if out_ptr[origin] == out_ptr[origin + 1] or in_ptr[origin] == in_ptr[origin + 1]:
+            continue
+        _temporal_search(adj, origin, max_depth, window, on_path, record, from_start=True)
+
+    return np.array(counts, dtype=np.int64), np.array(totals), np.array(max_lengths, dtype=np.int64)
+
+
+def scan_cycles_johnson(cadj, max_depth, workers=1):
+    """
+    Same statistics as scan_cycles, computed on a CollapsedAdjacency.
+
+    The graph is split into strongly connected components and singleton
+    components are dropped. Elementary cycles of up to max_depth arcs are
+    enumerated inside each remaining component with Johnson's algorithm,
+    using the length-bounded blocking of Gupta & Suzumura ("Finding All
+    Bounded-Length Simple Cycles in a Directed Graph"): a node's lock is the
+    path length at which it stops being worth entering, and it is relaxed
+    once the node is known to reach the start within fewer hops.
+
+    Enumeration is over distinct account pairs; a cycle whose arcs stand
+    for m1, m2, ... transfers counts as m1 * m2 * ... transfer chains, and
+    its total is the summed amount over all of those chains.
+
+    With workers > 1, large scans are spread over a process pool (see
+    app/transfer_graph/parallel.py).
+    """
+    n = cadj.num_nodes
+    counts = [0] * n
+    totals = [0.0] * n
+    max_lengths = [0] * n
+
+    # Self-transfers are cycles of length 1
+    for v in range(n):
+        if cadj.loop_count[v]:
+            counts[v] += cadj.loop_count[v]
+            totals[v] += cadj.loop_amount[v]
+            max_lengths[v] = 1
+
+    counts = np.array(counts, dtype=np.int64)
+    totals = np.array(totals)
+    max_lengths = np.array(max_lengths, dtype=np.int64)
+    if max_depth < 2:
+        return counts, totals, max_lengths
+
+    component, sizes = cadj.components()
+    starts = [v for v in range(n) if sizes[component[v]] > 1]
+
+    if workers > 1 and len(starts) >= PARALLEL_MIN_STARTS:
+        from app.transfer_graph.parallel import scan_starts_parallel
+        nodes, c, t, m = scan_starts_parallel(cadj, component, starts, max_depth, workers)
+    else:
+        nodes, c, t, m = scan_starts(cadj, component, starts, max_depth)
+
+    counts[nodes] += c
+    totals[nodes] += t
+    np.maximum.at(max_lengths, nodes, m)
+    return counts, totals, max_lengths
+
+
+def scan_starts(cadj, component, starts, max_depth):
+    """
+    Run _johnson_from for each of `starts`. Returns the accounts on any
+    cycle found with their counts, totals and max lengths, as NumPy arrays.
+    """
+    n = cadj.num_nodes
+    counts = [0] * n
+    totals = [0.0] * n
+    max_lengths = [0] * n
+    for start in starts:
+        _johnson_from(cadj, start, component, max_depth, counts, totals, max_lengths)
+
+    counts = np.array(counts, dtype=np.int64)
+    nodes = np.flatnonzero(counts)
+    return nodes, counts[nodes], np.array(totals)[nodes], np.array(max_lengths, dtype=np.int64)[nodes]
+
+
+def _johnson_from(cadj, start, component, max_depth, counts, totals, max_lengths):
+    """Credit every cycle whose lowest node is `start`."""
+    ptr, nbr, mult, amount = cadj.ptr, cadj.nbr, cadj.mult, cadj.amount
+    in_ptr, in_nbr = cadj.in_ptr, cadj.in_nbr
+    home = component[start]
+
+    # Seed the locks from a reverse BFS, as in _search: an account `hops`
+    # away from start is only worth entering below max_depth - hops + 1,
+    # and one outside the BFS radius below max_depth - radius.
+    radius = min((max_depth + 1) // 2, max_depth - 1)
+    outside = max_depth - radius
+    lock = {}
+    frontier = [start]
+    for hops in range(1, radius + 1):
+        reached = []
+        for v in frontier:
+            for k in range(in_ptr[v], in_ptr[v + 1]):
+                u = in_nbr[k]
+                if u <= start:
+                    break  # payers are sorted by descending id
+                if u not in lock and component[u] == home:
+                    lock[u] = max_depth - hops + 1
+                    reached.append(u)
+        frontier = reached
+
+    blocked_by = {}
+    path = []
+    on_path = set()
+
+    def relax_locks(u, hops):
+        # u reaches start within `hops`, so it is worth entering below max_depth - hops + 1
+        bound = max_depth - hops + 1
+        if lock.get(u, outside) < bound:
+            lock[u] = bound
+            for w in blocked_by.get(u, ()):
+                if w not in on_path:
+                    relax_locks(w, hops + 1)
+
+    def search(v, depth, chains, total):
+        # Shortest way back to start found from v, in arcs
+        back = UNREACHED
+        lock[v] = depth
+        path.append(v)
+        on_path.add(v)
+
+        if depth < max_depth:
+            for k in range(ptr[v], ptr[v + 1]):
+                w = nbr[k]
+                if w == start:
+                    cycle_chains = chains * mult[k]
+                    cycle_total = total * mult[k] + amount[k] * chains
+                    length = depth + 1
+                    for u in path:
+                        counts[u] += cycle_chains
+                        totals[u] += cycle_total
+                        if length > max_lengths[u]:
+                            max_lengths[u] = length
+                    back = 1
+                elif w > start and component[w] == home and depth + 1 < lock.get(w, outside):
+                    found = search(w, depth + 1, chains * mult[k], total * mult[k] + amount[k] * chains)
+                    if found + 1 < back:
+                        back = found + 1
+
+        if back < UNREACHED:
+            relax_locks(v, back)
+        for k in range(ptr[v], ptr[v + 1]):
+            w = nbr[k]
+            if w > start and component[w] == home:
+                blocked_by.setdefault(w, set()).add(v)
+
+        path.pop()
+        on_path.discard(v)
+        return back
+
+    search(start, 0, 1, 0.0)
@@ -0,0 +1,360 @@
+"""
+Compact in-memory transfer graph.
+
+Accounts are mapped to dense integer node ids and every transfer is an edge
+payer -> payee, stored column-wise in NumPy arrays (endpoints, amount, date
+as epoch seconds, status code). A TransferGraph is an immutable snapshot:
+refreshes build a new one with with_changes() and swap it in, so readers
+never see a half-applied update.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.transfer_graph.components import strongly_connected_components
+
+STATUSES = ["completed", "executed", "pending", "cancelled"]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+OTHER_STATUS = len(STATUSES)
+# Deleted edges stay in place as holes until the next compaction
+REMOVED_STATUS = OTHER_STATUS + 1
+
+# Undated transfers sort before every dated one
+NO_DATE = np.iinfo(np.int64).min
+
+# Compact once this fraction of edges are holes
+COMPACT_RATIO = 0.25
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def status_code(status):
+    return STATUS_CODES.get(status, OTHER_STATUS)
+
+
+def to_epoch(value):
+    """transaction_date -> epoch seconds (naive timestamps are taken as UTC)."""
+    if value is None:
+        return NO_DATE
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((value - _EPOCH).total_seconds())
+
+
+def from_epoch(value):
+    """Inverse of to_epoch; returns a naive datetime or None."""
+    if value == NO_DATE:
+        return None
+    return _EPOCH + timedelta(seconds=int(value))
+
+
+class Adjacency:
+    """
+    Adjacency restricted to one edge filter, as plain lists.
+
+    Cycle search walks these element by element from Python, where list
+    indexing is several times faster than indexing NumPy arrays.
+
+    - out_*: edges grouped by payer, each node's edges in date order
+    - in_*: edges grouped by payee, each node's edges by descending payer
+      id, so a search that only visits nodes above some id can stop early
+    """
+
+    __slots__ = ("num_nodes", "num_edges", "out_ptr", "out_nbr", "out_edge", "out_amount", "out_date",
+                 "in_ptr", "in_nbr")
+
+    def __init__(self, graph, edges):
+        n = graph.num_nodes
+        src = graph.src[edges]
+        dst = graph.dst[edges]
+
+        out_order = np.lexsort((graph.date[edges], src))
+        in_order = np.lexsort((-src, dst))
+
+        self.num_nodes = n
+        self.num_edges = len(edges)
+        self.out_ptr = _row_pointers(src, n).tolist()
+        self.out_nbr = dst[out_order].tolist()
+        self.out_edge = edges[out_order].tolist()
+        self.out_amount = graph.amount[edges][out_order].tolist()
+        self.out_date = graph.date[edges][out_order].tolist()
+        self.in_ptr = _row_pointers(dst, n).tolist()
+        self.in_nbr = src[in_order].tolist()
+
+
+class CollapsedAdjacency:
+    """
+    Adjacency with parallel transfers merged into one arc per (payer, payee).
+
+    Each arc carries the number of transfers it stands for and their summed
+    amount, so cycle enumeration runs over distinct account pairs and
+    multiplies out the transfer-level counts afterwards. Self-transfers are
+    kept apart in loop_count / loop_amount. Arcs are sorted by payee id;
+    in_ptr / in_nbr list each node's payers by descending id.
+    """
+
+    __slots__ = ("num_nodes", "ptr", "nbr", "mult", "amount", "loop_count", "loop_amount",
+                 "in_ptr", "in_nbr", "_components")
+
+    def __init__(self, graph, edges):
+        n = graph.num_nodes
+        src = graph.src[edges].astype(np.int64)
+        dst = graph.dst[edges].astype(np.int64)
+        amount = graph.amount[edges]
+
+        loop = src == dst
+        self.num_nodes = n
+        self.loop_count = np.bincount(src[loop], minlength=n).tolist()
+        self.loop_amount = np.bincount(src[loop], weights=amount[loop], minlength=n).tolist()
+
+        arcs, arc_of_edge, mult = np.unique(src[~loop] * n + dst[~loop], return_inverse=True,
+                                            return_counts=True)
+        self.ptr = _row_pointers(arcs // n, n).tolist()
+        self.nbr = (arcs % n).tolist()
+        self.mult = mult.tolist()
+        self.amount = np.bincount(arc_of_edge, weights=amount[~loop], minlength=len(arcs)).tolist()
+
+        payer, payee = arcs // n, arcs % n
+        in_order = np.lexsort((-payer, payee))
+        self.in_ptr = _row_pointers(payee, n).tolist()
+        self.in_nbr = payer[in_order].tolist()
+        self._components = None
+
+    def components(self):
+        """(component, sizes) from strongly_connected_components, computed once per adjacency."""
+        if self._components is None:
+            self._components = strongly_connected_components(self.ptr, self.nbr, self.num_nodes)
+        return self._components
+
+
+class NeighborAdjacency:
+    """
+    Undirected view for neighborhood queries: one arc per pair of accounts
+    that transferred in either direction, with the transfer count and
+    amount each way. Self-transfers are left out.
+
+    Each node's neighbors are listed twice, once by descending total amount
+    and once by descending transfer count (ranked[rank_by] = (nbr, arc)),
+    so keeping the top neighbors under a budget is just reading a prefix.
+    by_id = (nbr, arc) lists them by neighbor id, for bisecting one pair.
+    """
+
+    RANKINGS = ("amount", "count")
+
+    __slots__ = ("num_nodes", "ptr", "ranked", "by_id", "weight", "lo", "hi",
+                 "fwd_count", "fwd_amount", "back_count", "back_amount")
+
+    def __init__(self, graph, edges):
+        n = graph.num_nodes
+        src = graph.src[edges].astype(np.int64)
+        dst = graph.dst[edges].astype(np.int64)
+        amount = graph.amount[edges]
+
+        keep = src != dst
+        src, dst, amount = src[keep], dst[keep], amount[keep]
+        lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+        forward = src == lo
+
+        pairs, arc_of_edge = np.unique(lo * n + hi, return_inverse=True)
+        arc_of_edge = arc_of_edge.reshape(-1)
+        m = len(pairs)
+        fwd_count = np.bincount(arc_of_edge[forward], minlength=m)
+        back_count = np.bincount(arc_of_edge[~forward], minlength=m)
+        fwd_amount = np.bincount(arc_of_edge[forward], weights=amount[forward], minlength=m)
+        back_amount = np.bincount(arc_of_edge[~forward], weights=amount[~forward], minlength=m)
+
+        # The lo -> hi arc is (lo, hi)
+        arc_lo, arc_hi = pairs // n, pairs % n
+        weights = {"amount": fwd_amount + back_amount, "count": fwd_count + back_count}
+
+        # Each arc listed under both of its ends
+        node = np.concatenate([arc_lo, arc_hi])
+        nbr = np.concatenate([arc_hi, arc_lo])
+        arc = np.concatenate([np.arange(m), np.arange(m)])
+
+        self.num_nodes = n
+        self.ptr = _row_pointers(node, n).tolist()
+        self.ranked = {}
+        for rank_by, weight in weights.items():
+            order = np.lexsort((-np.concatenate([weight, weight]), node))
+            self.ranked[rank_by] = (nbr[order].tolist(), arc[order].tolist())
+        order = np.lexsort((nbr, node))
+        self.by_id = (nbr[order].tolist(), arc[order].tolist())
+        self.weight = {rank_by: weight.tolist() for rank_by, weight in weights.items()}
+        self.lo = arc_lo.tolist()
+        self.hi = arc_hi.tolist()
+        self.fwd_count = fwd_count.tolist()
+        self.fwd_amount = fwd_amount.tolist()
+        self.back_count = back_count.tolist()
+        self.back_amount = back_amount.tolist()
+
+
+def _row_pointers(keys, num_nodes):
+    ptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=num_nodes), out=ptr[1:])
+    return ptr
+
+
+class TransferGraph:
+    """Immutable snapshot of the transfers table as a payer -> payee multigraph."""
+
+    def __init__(self, account_ids, transfer_ids, src, dst, amount, date, status, watermark=None):
+        self.account_ids = account_ids                      # node id -> account id
+        self.node_index = {a: i for i, a in enumerate(account_ids)}
+        self.transfer_ids = transfer_ids                    # edge id -> transfer id
+        self.edge_index = {t: i for i, t in enumerate(transfer_ids)}
+
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.amount = np.asarray(amount, dtype=np.float64)
+        self.date = np.asarray(date, dtype=np.int64)
+        self.status = np.asarray(status, dtype=np.int8)
+
+        # Latest transfers.modified_at / tombstone reflected in this snapshot
+        self.watermark = watermark
+        # Change-feed rows read by the refresh that built this snapshot, so the
+        # next refresh can tell re-read rows from new ones
+        self.recent_changes = {}
+        self.loaded_at = datetime.now(timezone.utc)
+
+        self._adjacency = {}
+        # Request threads share the snapshot; one lookup/eviction at a time
+        self._adjacency_lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows, watermark=None):
+        """Build from (id, payer_id, payee_id, amount, transaction_date, status) rows."""
+        account_ids, node_index = [], {}
+        transfer_ids, src, dst, amount, date, status = [], [], [], [], [], []
+
+        def node(account_id):
+            i = node_index.get(account_id)
+            if i is None:
+                i = node_index[account_id] = len(account_ids)
+                account_ids.append(account_id)
+            return i
+
+        for transfer_id, payer_id, payee_id, amt, transaction_date, st in rows:
+            transfer_ids.append(transfer_id)
+            src.append(node(payer_id))
+            dst.append(node(payee_id))
+            amount.append(float(amt or 0.0))
+            date.append(to_epoch(transaction_date))
+            status.append(status_code(st))
+
+        return cls(account_ids, transfer_ids, src, dst, amount, date, status, watermark)
+
+    @property
+    def num_nodes(self):
+        return len(self.account_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.transfer_ids)
+
+    def with_changes(self, upserts, deleted_ids, watermark):
+        """
+        New snapshot with `deleted_ids` removed and `upserts` rows (same shape
+        as from_rows) inserted or overwritten. Deletes are applied first, so
+        a transfer deleted and re-inserted in the same window survives.
+        """
+        account_ids = list(self.account_ids)
+        node_index = dict(self.node_index)
+        transfer_ids = list(self.transfer_ids)
+        edge_index = self.edge_index
+        src, dst = self.src.copy(), self.dst.copy()
+        amount, date, status = self.amount.copy(), self.date.copy(), self.status.copy()
+
+        for transfer_id in deleted_ids:
+            i = edge_index.get(transfer_id)
+            if i is not None:
+                status[i] = REMOVED_STATUS
+
+        def node(account_id):
+            i = node_index.get(account_id)
+            if i is None:
+                i = node_index[account_id] = len(account_ids)
+                account_ids.append(account_id)
+            return i
+
+        appended = {}
+        new_ids, new_src, new_dst, new_amount, new_date, new_status = [], [], [], [], [], []
+        for transfer_id, payer_id, payee_id, amt, transaction_date, st in upserts:
+            values = (node(payer_id), node(payee_id), float(amt or 0.0),
+                      to_epoch(transaction_date), status_code(st))
+            i = edge_index.get(transfer_id)
+            if i is not None:
+                src[i], dst[i], amount[i], date[i], status[i] = values
+                continue
+            j = appended.get(transfer_id)
+            if j is None:
+                appended[transfer_id] = len(new_ids)
+                new_ids.append(transfer_id)
+                for column, value in zip((new_src, new_dst, new_amount, new_date, new_status), values):
+                    column.append(value)
+            else:
+                new_src[j], new_dst[j], new_amount[j], new_date[j], new_status[j] = values
+
+        if new_ids:
+            transfer_ids.extend(new_ids)
+            src = np.concatenate([src, np.asarray(new_src, dtype=np.int32)])
+            dst = np.concatenate([dst, np.asarray(new_dst, dtype=np.int32)])
+            amount = np.concatenate([amount, np.asarray(new_amount, dtype=np.float64)])
+            date = np.concatenate([date, np.asarray(new_date, dtype=np.int64)])
+            status = np.concatenate([status, np.asarray(new_status, dtype=np.int8)])
+
+        removed = status == REMOVED_STATUS
+        if removed.sum() > COMPACT_RATIO * len(status):
+            keep = ~removed
+            transfer_ids = [t for t, k in zip(transfer_ids, keep.tolist()) if k]
+            src, dst, amount, date, status = src[keep], dst[keep], amount[keep], date[keep], status[keep]
+
+        return TransferGraph(account_ids, transfer_ids, src, dst, amount, date, status, watermark)
+
+    def edge_mask(self, min_amount=0.0, statuses=("completed",)):
+        codes = [STATUS_CODES[s] for s in statuses]
+        return (self.amount >= min_amount) & np.isin(self.status, codes)
+
+    def adjacency(self, min_amount=0.0, statuses=("completed",)):
+        """Adjacency over edges with amount >= min_amount in one of `statuses` (cached per filter)."""
+        return self._filtered(Adjacency, min_amount, statuses)
+
+    def collapsed(self, min_amount=0.0, statuses=("completed",)):
+        """CollapsedAdjacency over the same edges as adjacency() (cached per filter)."""
+        return self._filtered(CollapsedAdjacency, min_amount, statuses)
+
+    def neighbors(self, min_amount=0.0, statuses=("completed",)):
+        """NeighborAdjacency over the same edges as adjacency() (cached per filter)."""
+        return self._filtered(NeighborAdjacency, min_amount, statuses)
+
+    def _filtered(self, kind, min_amount, statuses):
+        key = (kind.__name__, float(min_amount), tuple(statuses))
+        with self._adjacency_lock:
+            adjacency = self._adjacency.get(key)
+        if adjacency is not None:
+            return adjacency
+
+        # Built outside the lock so a slow filter doesn't hold up cached ones;
+        # if another thread built the same one meanwhile, keep theirs
+        edges = np.flatnonzero(self.edge_mask(min_amount, statuses))
+        built = kind(self, edges)
+        with self._adjacency_lock:
+            adjacency = self._adjacency.get(key)
+            if adjacency is None:
+                # Keep the few most recent filters; the endpoints mostly use defaults
+                if len(self._adjacency) >= 8:
+                    self._adjacency.pop(next(iter(self._adjacency)))
+                adjacency = self._adjacency[key] = built
+        return adjacency
+
+    def stats(self):
+        removed = int((self.status == REMOVED_STATUS).sum())
+        return {
+            "accounts": self.num_nodes,
+            "transfers": self.num_edges - removed,
+            "removed_pending_compaction": removed,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "loaded_at": self.loaded_at.isoformat(),
+            "cached_filters": len(self._adjacency),
+        }
@@ -0,0 +1,304 @@
+"""
+Incremental cycle detection for newly arrived transfers.
+
+A new completed transfer payer -> payee closes a cycle exactly when a chain
+payee -> ... -> payer already exists, so a batch is checked by a bounded
+search between the two ends of each new transfer, run from both sides
+like _search in cycles.py. Only the neighbourhoods of the new transfers
+are touched, so a batch costs in proportion to its size, not to the graph.
+
+Transfers written after the current snapshot was built are read from the
+store's pending overlay, so the detector never waits for a refresh.
+A bulk load (nessie_ingest) has no snapshot to refresh and would only grow
+that overlay, so it reads each batch's neighbourhood from Postgres instead
+(check_loaded_transfers). New cycles are recorded in fraud_alerts
+(migration 005), once per ring, in the transaction that wrote the
+transfers.
+"""
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+from app.transfer_graph.store import get_transfer_graph, pending_transfers
+
+DEFAULT_MAX_DEPTH = 5
+# Bound on chains reported per new transfer, so one hub account can't stall a batch
+MAX_CHAINS_PER_TRANSFER = 100
+
+# Edge filter shared by the stored-neighbourhood queries; matches adjacency(min_amount)
+_EDGE_FILTER = """
+    status = 'completed' AND payer_id IS NOT NULL AND payee_id IS NOT NULL
+    AND COALESCE(amount, 0) >= %s
+"""
+
+PAYERS_QUERY = f"""
+    SELECT DISTINCT payee_id, payer_id
+    FROM transfers
+    WHERE payee_id = ANY(%s) AND {_EDGE_FILTER}
+"""
+
+OUT_EDGES_QUERY = f"""
+    SELECT id, payer_id, payee_id, amount
+    FROM transfers
+    WHERE payer_id = ANY(%s) AND {_EDGE_FILTER}
+    ORDER BY payer_id, transaction_date NULLS FIRST, id
+"""
+
+OUT_EDGES_INTO_QUERY = f"""
+    SELECT id, payer_id, payee_id, amount
+    FROM transfers
+    WHERE payer_id = ANY(%s) AND payee_id = ANY(%s) AND {_EDGE_FILTER}
+    ORDER BY payer_id, transaction_date NULLS FIRST, id
+"""
+
+
+class _Neighbourhood:
+    """Completed transfers >= min_amount by account id: the snapshot plus an overlay of newer rows."""
+
+    def __init__(self, graph, min_amount, overlay_rows):
+        self.graph = graph
+        self.adj = graph.adjacency(min_amount)
+        self.out_extra = defaultdict(list)
+        self.in_extra = defaultdict(list)
+        seen = set()
+        for transfer_id, payer_id, payee_id, amount, _, status in overlay_rows:
+            if (transfer_id in graph.edge_index or transfer_id in seen or status != "completed"
+                    or payer_id is None or payee_id is None or float(amount or 0.0) < min_amount):
+                continue
+            seen.add(transfer_id)
+            self.out_extra[payer_id].append((transfer_id, payee_id, float(amount)))
+            self.in_extra[payee_id].append(payer_id)
+
+    def out_edges(self, account_id):
+        """(transfer_id, payee_id, amount) for every transfer out of account_id."""
+        graph, adj = self.graph, self.adj
+        v = graph.node_index.get(account_id)
+        if v is not None:
+            for k in range(adj.out_ptr[v], adj.out_ptr[v + 1]):
+                yield graph.transfer_ids[adj.out_edge[k]], graph.account_ids[adj.out_nbr[k]], adj.out_amount[k]
+        yield from self.out_extra.get(account_id, ())
+
+    def payers(self, account_id):
+        graph, adj = self.graph, self.adj
+        v = graph.node_index.get(account_id)
+        if v is not None:
+            for k in range(adj.in_ptr[v], adj.in_ptr[v + 1]):
+                yield graph.account_ids[adj.in_nbr[k]]
+        yield from self.in_extra.get(account_id, ())
+
+
+class _StoredNeighbourhood:
+    """
+    The same view read from Postgres, for a batch of transfers already
+    written on the cursor's connection: only the edges _chains can reach
+    from their (payer, payee) ends.
+
+    _chains walks back `radius` levels from the payer and forward from the
+    payee; once the hops left drop to the radius it only steps onto
+    accounts within it of the payer. So it needs the payers of the first
+    radius levels behind the payers, every edge out of the first
+    max_hops - radius - 1 levels ahead of the payees, and past those only
+    edges into the backward ball. Each level is one query for the batch.
+    """
+
+    def __init__(self, cur, ends, max_depth, min_amount):
+        max_hops = max_depth - 1
+        radius = (max_hops + 1) // 2
+        self.out = defaultdict(list)
+        self.in_ = defaultdict(list)
+
+        targets = {payer_id for payer_id, _ in ends}
+        ball = set(targets)
+        frontier = targets
+        for _ in range(radius):
+            if not frontier:
+                break
+            cur.execute(PAYERS_QUERY, (list(frontier), min_amount))
+            reached = set()
+            for payee_id, payer_id in cur.fetchall():
+                self.in_[payee_id].append(payer_id)
+                if payer_id not in ball:
+                    reached.add(payer_id)
+            ball |= reached
+            frontier = reached
+
+        expanded = set()
+        frontier = {payee_id for _, payee_id in ends}
+        for _ in range(max_hops - radius - 1):
+            if not frontier:
+                break
+            expanded |= frontier
+            cur.execute(OUT_EDGES_QUERY, (list(frontier), min_amount))
+            reached = set()
+            for transfer_id, payer_id, payee_id, amount in cur.fetchall():
+                self.out[payer_id].append((transfer_id, payee_id, float(amount or 0.0)))
+                if payee_id not in expanded:
+                    reached.add(payee_id)
+            frontier = reached
+
+        restricted = list((frontier | ball) - expanded)
+        if restricted:
+            cur.execute(OUT_EDGES_INTO_QUERY, (restricted, list(ball), min_amount))
+            for transfer_id, payer_id, payee_id, amount in cur.fetchall():
+                self.out[payer_id].append((transfer_id, payee_id, float(amount or 0.0)))
+
+    def out_edges(self, account_id):
+        return self.out.get(account_id, ())
+
+    def payers(self, account_id):
+        return self.in_.get(account_id, ())
+
+
+def _chains(hood, start, target, max_hops, limit):
+    """Up to `limit` elementary chains start -> target of at most max_hops transfers."""
+    # Exact hops to target near it, from a backward BFS; farther accounts are
+    # only stepped onto while the remaining budget exceeds the radius
+    radius = (max_hops + 1) // 2
+    dist = {target: 0}
+    frontier = [target]
+    for hops in range(1, radius + 1):
+        reached = []
+        for v in frontier:
+            for u in hood.payers(v):
+                if u not in dist:
+                    dist[u] = hops
+                    reached.append(u)
+        frontier = reached
+
+    chains = []
+    path = []
+    on_path = {start, target}
+
+    def extend(u, remaining):
+        for edge in hood.out_edges(u):
+            if len(chains) >= limit:
+                return
+            v = edge[1]
+            if v == target:
+                chains.append(path + [edge])
+            elif v not in on_path and remaining > 1:
+                left = remaining - 1
+                if left <= radius and dist.get(v, radius + 1) > left:
+                    continue
+                on_path.add(v)
+                path.append(edge)
+                extend(v, left)
+                path.pop()
+                on_path.discard(v)
+
+    if max_hops >= 1:
+        extend(start, max_hops)
+    return chains
+
+
+def cycle_key(transfer_ids):
+    """Transfer ids rotated to start at the smallest, comma-joined."""
+    i = transfer_ids.index(min(transfer_ids))
+    return ",".join(transfer_ids[i:] + transfer_ids[:i])
+
+
+def detect_cycles(graph, transfers, max_depth=DEFAULT_MAX_DEPTH, min_amount=0.0, overlay=()):
+    """
+    Cycles of up to max_depth transfers through any of `transfers`
+    ((id, payer_id, payee_id, amount, transaction_date, status) rows).
+    `overlay` holds rows written since `graph` was built. Each cycle is
+    returned once, attributed to the first new transfer that closes it.
+    """
+    hood = _Neighbourhood(graph, min_amount, list(overlay) + list(transfers))
+    return _find_cycles(hood, _checked(transfers, min_amount), max_depth)
+
+
+def _checked(transfers, min_amount):
+    """(id, payer_id, payee_id, amount) of the transfers detection looks at."""
+    checked = []
+    for transfer_id, payer_id, payee_id, amount, _, status in transfers:
+        if status != "completed" or payer_id is None or payee_id is None:
+            continue
+        amount = float(amount or 0.0)
+        if amount >= min_amount:
+            checked.append((transfer_id, payer_id, payee_id, amount))
+    return checked
+
+
+def _find_cycles(hood, checked, max_depth):
+    alerts = {}
+    for transfer_id, payer_id, payee_id, amount in checked:
+        if payer_id == payee_id:
+            chains = [[]]  # a self-transfer is a cycle on its own
+        else:
+            chains = _chains(hood, payee_id, payer_id, max_depth - 1, MAX_CHAINS_PER_TRANSFER)
+
+        for chain in chains:
+            edges = [(transfer_id, payee_id, amount)] + chain
+            transfer_ids = [e[0] for e in edges]
+            key = cycle_key(transfer_ids)
+            if key in alerts:
+                continue
+            alerts[key] = {
+                "cycle_key": key,
+                "trigger_transfer_id": transfer_id,
+                "chain_length": len(edges),
+                "account_path": [payer_id] + [e[1] for e in edges],
+                "transfer_ids": transfer_ids,
+                "amounts": [e[2] for e in edges],
+                "total_amount": sum(e[2] for e in edges),
+            }
+    return list(alerts.values())
+
+
+def save_alerts(conn, alerts):
+    """
+    Insert alerts for rings not recorded before. Returns the new ones with
+    id/status/detected_at. The caller commits, together with the transfers
+    that raised them.
+    """
+    if not alerts:
+        return []
+    cur = conn.cursor()
+    stored = execute_values(cur, """
+        INSERT INTO fraud_alerts (cycle_key, trigger_transfer_id, chain_length, account_path,
+                                  transfer_ids, amounts, total_amount)
+        VALUES %s
+        ON CONFLICT (cycle_key) DO NOTHING
+        RETURNING cycle_key, id, status, detected_at
+    """, [
+        (a["cycle_key"], a["trigger_transfer_id"], a["chain_length"], a["account_path"],
+         a["transfer_ids"], a["amounts"], a["total_amount"])
+        for a in alerts
+    ], fetch=True)
+
+    by_key = {a["cycle_key"]: a for a in alerts}
+    return [
+        {"id": alert_id, **by_key[key], "status": status, "detected_at": str(detected_at)}
+        for key, alert_id, status, detected_at in stored
+    ]
+
+
+def check_new_transfers(conn, transfers, max_depth=DEFAULT_MAX_DEPTH, min_amount=0.0):
+    """
+    Run detection for transfers written in conn's open transaction and
+    record new alerts in it; the caller commits both at once, so a failure
+    here leaves the transfers unwritten and a retry checks them again.
+    Once committed, the rows go to add_pending_transfers until a refresh
+    picks them up.
+    """
+    transfers = list(transfers)
+    if not transfers:
+        return []
+    alerts = detect_cycles(get_transfer_graph(), transfers, max_depth, min_amount, overlay=pending_transfers())
+    return save_alerts(conn, alerts)
+
+
+def check_loaded_transfers(conn, transfers, max_depth=DEFAULT_MAX_DEPTH, min_amount=0.0):
+    """
+    check_new_transfers for bulk loads: the neighbourhood of the batch is
+    read from Postgres (uncommitted rows included, as it runs in the same
+    transaction), so neither the snapshot nor the pending overlay is
+    loaded or grown, and memory stays flat over any number of batches.
+    """
+    checked = _checked(transfers, min_amount)
+    if not checked:
+        return []
+    ends = [(payer_id, payee_id) for _, payer_id, payee_id, _ in checked if payer_id != payee_id]
+    hood = _StoredNeighbourhood(conn.cursor(), ends, max_depth, min_amount)
+    return save_alerts(conn, _find_cycles(hood, checked, max_depth))
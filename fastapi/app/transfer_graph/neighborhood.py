@@ -0,0 +1,123 @@
+"""
+k-hop neighborhood of one account on a NeighborAdjacency, under budgets.
+
+Hops are taken breadth first, ignoring transfer direction. Each hop merges
+the frontier's neighbor lists, already sorted by the chosen ranking, and
+keeps new accounts in that order until the node budget is used up. Edges
+are then picked the same way: first the arc that reached each kept
+account, so the result stays connected, then the heaviest remaining arcs
+between kept accounts until the edge budget is used up. Stopping early on
+a sorted list is free, so a hub with a million counterparties costs about
+what its top few hundred do. The edge fill skips the lists of accounts with
+more neighbors than were kept (their arcs to smaller accounts turn up from
+the other end) and bisects for arcs between two such accounts.
+"""
+import heapq
+from bisect import bisect_left
+
+
+def _ranked_arcs(nadj, nodes, rank_by):
+    """Arcs of all `nodes` as (-weight, arc, neighbor, node), heaviest first."""
+    ptr = nadj.ptr
+    nbr, arcs = nadj.ranked[rank_by]
+    weight = nadj.weight[rank_by]
+
+    def arcs_of(u):
+        for k in range(ptr[u], ptr[u + 1]):
+            yield -weight[arcs[k]], arcs[k], nbr[k], u
+
+    return heapq.merge(*(arcs_of(u) for u in nodes))
+
+
+def _arc_between(nadj, u, v):
+    """The arc joining u and v, or None."""
+    nbr, arcs = nadj.by_id
+    k = bisect_left(nbr, v, nadj.ptr[u], nadj.ptr[u + 1])
+    if k < nadj.ptr[u + 1] and nbr[k] == v:
+        return arcs[k]
+    return None
+
+
+def _arcs_within(nadj, kept, rank_by):
+    """Arcs with both ends in `kept`, heaviest first (each may come twice)."""
+    ptr = nadj.ptr
+    weight = nadj.weight[rank_by]
+    big = [u for u in kept if ptr[u + 1] - ptr[u] > len(kept)]
+    small = [u for u in kept if ptr[u + 1] - ptr[u] <= len(kept)]
+
+    between_big = []
+    for i, u in enumerate(big):
+        for v in big[i + 1:]:
+            arc = _arc_between(nadj, u, v)
+            if arc is not None:
+                between_big.append((-weight[arc], arc, v, u))
+    between_big.sort()
+
+    return heapq.merge(_ranked_arcs(nadj, small, rank_by), between_big)
+
+
+def _directed(nadj, arc, rank_by):
+    """(payer, payee, count, amount) for each direction of `arc` that has transfers, heavier first."""
+    lo, hi = nadj.lo[arc], nadj.hi[arc]
+    sides = [
+        (lo, hi, nadj.fwd_count[arc], nadj.fwd_amount[arc]),
+        (hi, lo, nadj.back_count[arc], nadj.back_amount[arc]),
+    ]
+    sides = [side for side in sides if side[2]]
+    sides.sort(key=lambda side: side[2] if rank_by == "count" else side[3], reverse=True)
+    return sides
+
+
+def neighborhood(nadj, center, hops, max_nodes, max_edges, rank_by="amount"):
+    """
+    The accounts within `hops` of center and the transfers between them,
+    trimmed to at most max_nodes accounts and max_edges directed edges.
+
+    Returns (hop_of, edges, truncated): hop_of maps node -> hops from
+    center in discovery order, edges is a list of (payer, payee, count,
+    amount), and truncated says which budgets cut something off.
+    """
+    hop_of = {center: 0}
+    tree_arcs = []
+    truncated = {"nodes": False, "edges": False}
+
+    frontier = [center]
+    for hop in range(1, hops + 1):
+        reached = []
+        for _, arc, v, _ in _ranked_arcs(nadj, frontier, rank_by):
+            if v in hop_of:
+                continue
+            if len(hop_of) >= max_nodes:
+                truncated["nodes"] = True
+                break
+            hop_of[v] = hop
+            tree_arcs.append(arc)
+            reached.append(v)
+        if not reached or truncated["nodes"]:
+            break
+        frontier = reached
+
+    edges = []
+    taken = set()
+
+    def take(arc):
+        # False once the edge budget is spent
+        taken.add(arc)
+        for side in _directed(nadj, arc, rank_by):
+            if len(edges) >= max_edges:
+                truncated["edges"] = True
+                return False
+            edges.append(side)
+        return True
+
+    if all(take(arc) for arc in tree_arcs):
+        for _, arc, v, _ in _arcs_within(nadj, hop_of, rank_by):
+            if arc in taken or v not in hop_of:
+                continue
+            if len(edges) >= max_edges:
+                truncated["edges"] = True
+                break
+            if not take(arc):
+                break
+
+    return hop_of, edges, truncated
@@ -0,0 +1,145 @@
+"""
+Process-pool fan-out for the Johnson scan.
+
+The collapsed CSR arrays and SCC labels are copied once into a
+multiprocessing shared memory block per scan. Workers attach to the block
+by name and read it through typed memoryviews, so no graph data is pickled
+and nothing is copied per worker. The start accounts are dealt round-robin
+into chunks (low ids have the most work, since each start only visits
+accounts above it), and the per-chunk results are summed back together.
+
+Workers come from a forkserver context so they don't inherit the API
+process's threads and sockets.
+"""
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.transfer_graph.cycles import scan_starts
+
+logger = logging.getLogger(__name__)
+
+SCAN_WORKERS = int(os.getenv("TRANSFER_GRAPH_SCAN_WORKERS", str(os.cpu_count() or 1)))
+# Chunks per worker; more evens out uneven starts at a little IPC cost
+CHUNKS_PER_WORKER = 8
+
+# (name, memoryview format, NumPy dtype) of every array a worker reads
+SHARED_ARRAYS = [
+    ("ptr", "q", np.int64),
+    ("nbr", "i", np.int32),
+    ("mult", "q", np.int64),
+    ("amount", "d", np.float64),
+    ("in_ptr", "q", np.int64),
+    ("in_nbr", "i", np.int32),
+    ("component", "i", np.int32),
+]
+
+_executor = None
+_executor_workers = 0
+
+# Worker side: the block attached for the current scan
+_attached = None
+
+
+def _get_executor(workers):
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("forkserver"))
+        _executor_workers = workers
+        logger.info(f"Cycle scan pool started with {workers} workers")
+    return _executor
+
+
+def shutdown_scan_pool():
+    """Stop the worker processes (called at FastAPI shutdown)."""
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        _executor_workers = 0
+
+
+def share_graph(cadj, component):
+    """Copy the arrays workers need into a new shared memory block. Returns (block, layout)."""
+    arrays = {
+        "ptr": cadj.ptr, "nbr": cadj.nbr, "mult": cadj.mult, "amount": cadj.amount,
+        "in_ptr": cadj.in_ptr, "in_nbr": cadj.in_nbr, "component": component,
+    }
+    layout = {}
+    offset = 0
+    for name, fmt, dtype in SHARED_ARRAYS:
+        length = len(arrays[name])
+        layout[name] = (fmt, offset, length)
+        # Keep every array 8-byte aligned
+        offset += -(-length * np.dtype(dtype).itemsize // 8) * 8
+
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, fmt, dtype in SHARED_ARRAYS:
+        _, start, length = layout[name]
+        view = np.ndarray((length,), dtype=dtype, buffer=block.buf, offset=start)
+        view[:] = arrays[name]
+        del view
+    return block, layout
+
+
+def _attach(name, layout):
+    """Worker side: memoryviews over the scan's shared block, cached per block."""
+    global _attached
+    if _attached is not None and _attached[0] == name:
+        return _attached[3]
+
+    if _attached is not None:
+        _, block, views, _ = _attached
+        for view in views.values():
+            view.release()
+        block.close()
+
+    block = shared_memory.SharedMemory(name=name)
+    views = {}
+    for key, fmt, dtype in SHARED_ARRAYS:
+        _, offset, length = layout[key]
+        views[key] = block.buf[offset:offset + length * np.dtype(dtype).itemsize].cast(fmt)
+    graph = SimpleNamespace(num_nodes=layout["component"][2], **views)
+    _attached = (name, block, views, graph)
+    return graph
+
+
+def _scan_chunk(name, layout, starts, max_depth):
+    graph = _attach(name, layout)
+    return scan_starts(graph, graph.component, starts, max_depth)
+
+
+def scan_starts_parallel(cadj, component, starts, max_depth, workers=SCAN_WORKERS):
+    """scan_starts over a process pool. Same return shape."""
+    n = cadj.num_nodes
+    block, layout = share_graph(cadj, component)
+    try:
+        executor = _get_executor(workers)
+        chunks = min(len(starts), workers * CHUNKS_PER_WORKER)
+        futures = [
+            executor.submit(_scan_chunk, block.name, layout, starts[i::chunks], max_depth)
+            for i in range(chunks)
+        ]
+
+        counts = np.zeros(n, dtype=np.int64)
+        totals = np.zeros(n)
+        max_lengths = np.zeros(n, dtype=np.int64)
+        for future in futures:
+            nodes, c, t, m = future.result()
+            counts[nodes] += c
+            totals[nodes] += t
+            np.maximum.at(max_lengths, nodes, m)
+    finally:
+        block.close()
+        block.unlink()
+
+    nodes = np.flatnonzero(counts)
+    return nodes, counts[nodes], totals[nodes], max_lengths[nodes]
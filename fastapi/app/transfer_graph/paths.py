@@ -0,0 +1,75 @@
+"""
+Bounded-depth path search between two accounts on a CollapsedAdjacency.
+
+The search runs from both ends: a reverse BFS from the target records exact
+hop counts for accounts within half the depth, and a forward DFS from the
+start only steps onto an account inside that radius if it can still reach
+the target in the hops left. Paths are over distinct accounts (one arc per
+payer -> payee pair), found shortest first and capped at `limit`.
+"""
+from app.transfer_graph.cycles import UNREACHED
+
+
+def _distances_to(cadj, target, radius):
+    """account -> exact hops to target, for accounts at most `radius` hops away."""
+    in_ptr, in_nbr = cadj.in_ptr, cadj.in_nbr
+    dist = {target: 0}
+    frontier = [target]
+    for hops in range(1, radius + 1):
+        reached = []
+        for v in frontier:
+            for k in range(in_ptr[v], in_ptr[v + 1]):
+                u = in_nbr[k]
+                if u not in dist:
+                    dist[u] = hops
+                    reached.append(u)
+        if not reached:
+            break
+        frontier = reached
+    return dist
+
+
+def find_paths(cadj, start, target, max_depth, limit=100):
+    """
+    Up to `limit` elementary paths start -> target of at most max_depth
+    arcs, shorter paths first. Each is the list of nodes from start to
+    target. With start == target these are the cycles through start,
+    including a self-transfer as [start, start].
+    """
+    ptr, nbr = cadj.ptr, cadj.nbr
+    radius = (max_depth + 1) // 2
+    dist = _distances_to(cadj, target, radius)
+
+    paths = []
+    if start == target and cadj.loop_count[start]:
+        paths.append([start, start])
+
+    path = [start]
+    on_path = {start}
+
+    def extend(u, remaining):
+        # Paths of exactly `remaining` more arcs; True once the limit is hit
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            if v == target:
+                if remaining == 1:
+                    paths.append(path + [v])
+                    if len(paths) >= limit:
+                        return True
+                continue
+            left = remaining - 1
+            if left == 0 or v in on_path or (left <= radius and dist.get(v, UNREACHED) > left):
+                continue
+            path.append(v)
+            on_path.add(v)
+            done = extend(v, left)
+            path.pop()
+            on_path.discard(v)
+            if done:
+                return True
+        return False
+
+    for length in range(2 if start == target else 1, max_depth + 1):
+        if len(paths) >= limit or extend(start, length):
+            break
+    return paths[:limit]
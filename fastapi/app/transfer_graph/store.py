@@ -0,0 +1,200 @@
+"""
+Process-wide transfer graph.
+
+Loaded from Postgres when the app starts, then refreshed in a background
+thread from the transfers change feed added in migration 004: rows whose
+modified_at moved past the snapshot's watermark are upserted and ids in
+transfer_tombstones are removed, so a refresh reads only what changed.
+"""
+import os
+import logging
+import threading
+from datetime import timedelta
+
+from app.database.db_init import get_db_connection
+from app.transfer_graph.graph import TransferGraph
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(os.getenv("TRANSFER_GRAPH_REFRESH_SECONDS", "30"))
+# Re-read this far behind the watermark: a transaction that commits late can
+# carry a modified_at older than rows an earlier refresh already saw
+REFRESH_OVERLAP_SECONDS = float(os.getenv("TRANSFER_GRAPH_REFRESH_OVERLAP_SECONDS", "60"))
+LOAD_BATCH_SIZE = 50000
+
+TRANSFER_COLUMNS = "id, payer_id, payee_id, amount, transaction_date, status"
+
+WATERMARK_QUERY = """
+    SELECT GREATEST(
+        (SELECT MAX(modified_at) FROM transfers),
+        (SELECT MAX(deleted_at) FROM transfer_tombstones)
+    )
+"""
+
+LOAD_QUERY = f"""
+    SELECT {TRANSFER_COLUMNS}
+    FROM transfers
+    WHERE payer_id IS NOT NULL AND payee_id IS NOT NULL
+"""
+
+CHANGED_QUERY = f"""
+    SELECT {TRANSFER_COLUMNS}, modified_at
+    FROM transfers
+    WHERE modified_at > %s
+"""
+
+DELETED_QUERY = """
+    SELECT id, deleted_at
+    FROM transfer_tombstones
+    WHERE deleted_at > %s
+"""
+
+_graph = None
+_lock = threading.Lock()  # one load or refresh at a time
+
+# Transfers this process wrote since the snapshot was built, by id; dropped
+# once a refresh has them (see incremental.py)
+_pending = {}
+_pending_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+
+
+def load_transfer_graph(conn):
+    """Full load of every transfer with both endpoints into a new TransferGraph."""
+    cur = conn.cursor()
+    # One snapshot for the watermark and the rows it covers
+    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+    cur.execute(WATERMARK_QUERY)
+    watermark = cur.fetchone()[0]
+
+    rows = conn.cursor(name="transfer_graph_load")
+    rows.itersize = LOAD_BATCH_SIZE
+    rows.execute(LOAD_QUERY)
+    graph = TransferGraph.from_rows(rows, watermark)
+    rows.close()
+    conn.rollback()
+    return graph
+
+
+def refresh_transfer_graph(graph, conn):
+    """
+    Apply transfers changed or deleted since graph.watermark. Returns a new
+    snapshot, or `graph` itself when nothing changed.
+    """
+    if graph.watermark is None:
+        # Loaded from an empty table; anything present now is new
+        return load_transfer_graph(conn)
+
+    since = graph.watermark - timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+    cur = conn.cursor()
+    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+    cur.execute(CHANGED_QUERY, (since,))
+    changed = cur.fetchall()
+    cur.execute(DELETED_QUERY, (since,))
+    deleted = cur.fetchall()
+    conn.rollback()
+
+    # The overlap window re-reads rows an earlier refresh already applied
+    recent = {("row", row[0]): row[-1] for row in changed}
+    recent.update((("tombstone", row[0]), row[1]) for row in deleted)
+    if all(graph.recent_changes.get(key) == ts for key, ts in recent.items()):
+        return graph
+
+    # Deletes go first, so a transfer deleted and re-inserted stays in
+    upserts = [row[:-1] for row in changed if row[1] is not None and row[2] is not None]
+    deleted_ids = [row[0] for row in deleted]
+    # An update that cleared an endpoint takes the edge out of the graph
+    deleted_ids += [row[0] for row in changed if row[1] is None or row[2] is None]
+
+    watermark = max([graph.watermark] + list(recent.values()))
+    refreshed = graph.with_changes(upserts, deleted_ids, watermark)
+    refreshed.recent_changes = recent
+    return refreshed
+
+
+def get_transfer_graph():
+    """The current snapshot, loading it first if the app hasn't yet."""
+    global _graph
+    graph = _graph
+    if graph is None:
+        with _lock:
+            if _graph is None:
+                with get_db_connection() as conn:
+                    _graph = load_transfer_graph(conn)
+                logger.info(f"Transfer graph loaded: {_graph.num_nodes} accounts, {_graph.num_edges} transfers")
+            graph = _graph
+    return graph
+
+
+def refresh():
+    """Bring the process-wide snapshot up to date. Returns it."""
+    global _graph
+    if _graph is None:
+        return get_transfer_graph()
+    with _lock:
+        with get_db_connection() as conn:
+            refreshed = refresh_transfer_graph(_graph, conn)
+        if refreshed is not _graph:
+            logger.info(f"Transfer graph refreshed: {refreshed.num_nodes} accounts, "
+                        f"{refreshed.num_edges} transfers")
+        _graph = refreshed
+    _drop_applied_pending(refreshed)
+    return refreshed
+
+
+def add_pending_transfers(rows):
+    """Remember (id, payer_id, payee_id, amount, transaction_date, status) rows until a refresh has them."""
+    with _pending_lock:
+        for row in rows:
+            _pending[row[0]] = tuple(row)
+
+
+def pending_transfers():
+    with _pending_lock:
+        return list(_pending.values())
+
+
+def _drop_applied_pending(graph):
+    with _pending_lock:
+        applied = [t for t in _pending if t in graph.edge_index or ("tombstone", t) in graph.recent_changes]
+        for transfer_id in applied:
+            del _pending[transfer_id]
+
+
+def _refresh_loop(interval):
+    while not _stop.is_set():
+        try:
+            refresh()
+        except Exception as e:
+            # Keep serving the last snapshot; the next tick retries
+            logger.warning(f"Transfer graph refresh failed: {e}")
+        _stop.wait(interval)
+
+
+def start_refresher(interval=REFRESH_SECONDS):
+    """Load the graph and keep it fresh from a daemon thread (called at FastAPI startup)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_refresh_loop, args=(interval,), name="transfer-graph-refresh",
+                               daemon=True)
+    _thread.start()
+
+
+def stop_refresher():
+    """Stop the refresh thread (called at FastAPI shutdown)."""
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+
+
+def graph_stats():
+    graph = _graph
+    if graph is None:
+        return {"loaded": False}
+    return {"loaded": True, "refresh_seconds": REFRESH_SECONDS, "pending_transfers": len(_pending),
+            **graph.stats()}
@@ -0,0 +1,102 @@
+"""
+Compare /accounts throughput between DB_ACCESS_MODE=sync and DB_ACCESS_MODE=async.
+
+Start one API instance per mode, then point this script at both:
+
+    DB_ACCESS_MODE=sync  uvicorn app.main:app --port 8000
+    DB_ACCESS_MODE=async uvicorn app.main:app --port 8001
+    python3 -m benchmarks.accounts_concurrency \\
+        --sync-url http://localhost:8000 --async-url http://localhost:8001
+
+Each concurrency level runs that many clients in parallel, each issuing
+--requests calls that rotate through the five accounts endpoints.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def endpoint_mix(account_id):
+    return [
+        "/accounts?limit=50",
+        f"/accounts/{account_id}",
+        f"/accounts/{account_id}/transactions?limit=50",
+        f"/accounts/{account_id}/recent-activity?days=30",
+        f"/accounts/{account_id}/transaction-summary",
+    ]
+
+
+async def pick_account_id(base_url):
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        r = await client.get("/accounts", params={"limit": 1})
+        r.raise_for_status()
+        accounts = r.json()["accounts"]
+        if not accounts:
+            raise SystemExit("No accounts in the database; run the Nessie ingest first")
+        return accounts[0]["id"]
+
+
+async def run_level(base_url, account_id, clients, requests_per_client):
+    paths = endpoint_mix(account_id)
+    latencies = []
+    errors = 0
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+
+        async def worker(n):
+            nonlocal errors
+            for i in range(requests_per_client):
+                path = paths[(n + i) % len(paths)]
+                start = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    if r.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync-url", default="http://localhost:8000")
+    parser.add_argument("--async-url", default="http://localhost:8001")
+    parser.add_argument("--account-id", help="Account to query (defaults to the first account)")
+    parser.add_argument("--clients", default="100,500,1000", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.clients.split(",")]
+    account_id = args.account_id or await pick_account_id(args.sync_url)
+
+    print(f"{'mode':<6} {'clients':>7} {'requests':>8} {'errors':>6} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for clients in levels:
+        for mode, url in (("sync", args.sync_url), ("async", args.async_url)):
+            r = await run_level(url, account_id, clients, args.requests)
+            print(f"{mode:<6} {r['clients']:>7} {r['requests']:>8} {r['errors']:>6} {r['rps']:>9.1f} "
+                  f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+"""
+Benchmark /fraud/scan-all engines against the original recursive CTE.
+
+Builds a throwaway schema holding a synthetic transfers table: background
+transfers that only flow "forward" along a random account order (so they
+form no cycles), plus planted rings of 2..max_depth accounts. The same rows
+are scanned three ways and the per-account results compared:
+
+    cte      the WITH RECURSIVE query /fraud/scan-all used to run
+    dfs      pruned search from every account (scan_cycles)
+    johnson  SCC-pruned Johnson enumeration (scan_cycles_johnson)
+    johnson xN  the same over N worker processes (--workers N)
+
+Background transfers are spread over a year and every ring's hops are a
+few days apart in order, so the temporal search (scan_temporal_cycles,
+--window-days) is timed as well. It answers a narrower question, so it is
+reported on its own rather than compared with the others.
+
+    python3 -m benchmarks.fraud_scan [--accounts 5000] [--transfers 50000] [--rings 200] [--workers 32]
+
+The CTE follows chains through transfers.account_id, so the synthetic rows
+set account_id to the payee; on that data it finds the same cycles as the
+payer -> payee graph.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.database.db_init import DB_CONFIG
+from app.transfer_graph.graph import TransferGraph
+from app.transfer_graph.cycles import scan_cycles, scan_cycles_johnson, scan_temporal_cycles
+from app.transfer_graph.parallel import shutdown_scan_pool
+
+BENCH_SCHEMA = "fraud_bench"
+START_DATE = datetime(2025, 1, 1)
+
+# /fraud/scan-all before the in-memory engine, minus the LIMIT
+CTE_SCAN_QUERY = """
+WITH RECURSIVE transfer_chain AS (
+    SELECT
+        t.id,
+        t.account_id,
+        t.payer_id,
+        t.amount,
+        t.transaction_date,
+        1 as depth,
+        ARRAY[t.account_id] as path,
+        ARRAY[t.id] as transfer_path,
+        t.amount as running_total,
+        t.account_id as origin_account
+    FROM transfers t
+    WHERE t.amount >= %s
+        AND t.status = 'completed'
+
+    UNION ALL
+
+    SELECT
+        t.id,
+        t.account_id,
+        t.payer_id,
+        t.amount,
+        t.transaction_date,
+        tc.depth + 1,
+        tc.path || t.account_id,
+        tc.transfer_path || t.id,
+        tc.running_total + t.amount,
+        tc.origin_account
+    FROM transfers t
+    INNER JOIN transfer_chain tc ON t.account_id = tc.payer_id
+    WHERE
+        tc.depth < %s
+        AND NOT (t.account_id = ANY(tc.path))
+        AND t.amount >= %s
+        AND t.status = 'completed'
+)
+SELECT
+    origin_account,
+    COUNT(DISTINCT transfer_path) as circular_count,
+    SUM(running_total) as total_circular_amount,
+    MAX(depth) as max_chain_length
+FROM transfer_chain
+WHERE payer_id = origin_account
+GROUP BY origin_account
+"""
+
+
+def synthetic_transfers(n_accounts, n_transfers, n_rings, max_depth, seed):
+    """(id, payer_id, payee_id, amount, date) rows: acyclic background plus planted rings."""
+    rng = random.Random(seed)
+    accounts = [f"acct_{i}" for i in range(n_accounts)]
+    rank = list(range(n_accounts))
+    rng.shuffle(rank)
+
+    rows = []
+    for i in range(n_transfers):
+        a, b = rng.sample(range(n_accounts), 2)
+        if rank[a] > rank[b]:
+            a, b = b, a
+        date = START_DATE + timedelta(seconds=rng.randrange(365 * 86400))
+        rows.append((f"tr_{i}", accounts[a], accounts[b], round(rng.uniform(1, 1000), 2), date))
+
+    for r in range(n_rings):
+        ring = rng.sample(range(n_accounts), rng.randint(2, max_depth))
+        date = START_DATE + timedelta(seconds=rng.randrange(300 * 86400))
+        for hop, a in enumerate(ring):
+            b = ring[(hop + 1) % len(ring)]
+            date += timedelta(seconds=rng.randrange(3 * 86400))
+            rows.append((f"ring_{r}_{hop}", accounts[a], accounts[b], round(rng.uniform(1, 1000), 2), date))
+
+    return rows
+
+
+def load_schema(cur, rows):
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+    cur.execute("""
+        CREATE TABLE transfers (
+            id TEXT PRIMARY KEY,
+            account_id TEXT,
+            payer_id TEXT,
+            payee_id TEXT,
+            amount NUMERIC,
+            transaction_date TIMESTAMP,
+            status TEXT
+        )
+    """)
+    execute_values(cur, """
+        INSERT INTO transfers (id, account_id, payer_id, payee_id, amount, transaction_date, status)
+        VALUES %s
+    """, [(tid, payee, payer, payee, amount, date, "completed") for tid, payer, payee, amount, date in rows],
+        page_size=10000)
+    cur.execute("""
+        CREATE INDEX ON transfers (account_id) INCLUDE (payer_id, amount)
+        WHERE status = 'completed'
+    """)
+    cur.execute("ANALYZE transfers")
+
+
+def run_cte(cur, max_depth, min_amount, timeout):
+    cur.execute("SET statement_timeout = %s", (int(timeout * 1000),))
+    start = time.perf_counter()
+    try:
+        cur.execute(CTE_SCAN_QUERY, (min_amount, max_depth, min_amount))
+    except psycopg2.errors.QueryCanceled:
+        return None, time.perf_counter() - start
+    results = {account: (count, float(total), depth) for account, count, total, depth in cur.fetchall()}
+    return results, time.perf_counter() - start
+
+
+def run_engine(graph, scan, max_depth):
+    start = time.perf_counter()
+    counts, totals, max_lengths = scan(graph, max_depth)
+    elapsed = time.perf_counter() - start
+    results = {
+        graph.account_ids[v]: (int(counts[v]), float(totals[v]), int(max_lengths[v]))
+        for v in np.flatnonzero(counts).tolist()
+    }
+    return results, elapsed
+
+
+def same_results(a, b):
+    if a.keys() != b.keys():
+        return False
+    return all(
+        a[k][0] == b[k][0] and abs(a[k][1] - b[k][1]) < 0.01 and a[k][2] == b[k][2]
+        for k in a
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare scan-all engines with the recursive CTE")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--transfers", type=int, default=50000, help="Background (acyclic) transfers")
+    parser.add_argument("--rings", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--min-amount", type=float, default=0)
+    parser.add_argument("--cte-timeout", type=float, default=600, help="Seconds before giving up on the CTE")
+    parser.add_argument("--skip-cte", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Also time the Johnson scan on a process pool")
+    parser.add_argument("--window-days", type=float, default=30, help="Window for the temporal scan")
+    args = parser.parse_args()
+
+    rows = synthetic_transfers(args.accounts, args.transfers, args.rings, args.max_depth, args.seed)
+    print(f"→ {len(rows)} transfers across {args.accounts} accounts, {args.rings} planted rings")
+
+    start = time.perf_counter()
+    graph = TransferGraph.from_rows(
+        (tid, payer, payee, amount, date, "completed") for tid, payer, payee, amount, date in rows
+    )
+    print(f"  graph build: {time.perf_counter() - start:.2f}s")
+
+    engines = {
+        "dfs": lambda g, d: scan_cycles(g.adjacency(args.min_amount), d),
+        "johnson": lambda g, d: scan_cycles_johnson(g.collapsed(args.min_amount), d),
+    }
+    if args.workers > 1:
+        # Untimed warm-up run, so worker start-up isn't counted
+        scan_cycles_johnson(graph.collapsed(args.min_amount), args.max_depth, workers=args.workers)
+        engines[f"johnson x{args.workers}"] = lambda g, d: scan_cycles_johnson(
+            g.collapsed(args.min_amount), d, workers=args.workers
+        )
+    results = {}
+    for name, scan in engines.items():
+        results[name], elapsed = run_engine(graph, scan, args.max_depth)
+        print(f"  {name:11s} {elapsed:8.2f}s  {len(results[name])} accounts on cycles")
+
+    temporal, elapsed = run_engine(
+        graph, lambda g, d: scan_temporal_cycles(g.adjacency(args.min_amount), d, args.window_days * 86400),
+        args.max_depth
+    )
+    print(f"  {'temporal':11s} {elapsed:8.2f}s  {len(temporal)} accounts on cycles "
+          f"within {args.window_days:g} days (not compared)")
+
+    if not args.skip_cte:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cur = conn.cursor()
+        try:
+            load_schema(cur, rows)
+            conn.commit()
+            cte_results, elapsed = run_cte(cur, args.max_depth, args.min_amount, args.cte_timeout)
+            if cte_results is None:
+                print(f"  cte         >{args.cte_timeout:.0f}s  (timed out)")
+            else:
+                results["cte"] = cte_results
+                print(f"  {'cte':11s} {elapsed:8.2f}s  {len(cte_results)} accounts on cycles")
+        finally:
+            conn.rollback()
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            conn.commit()
+            conn.close()
+
+    shutdown_scan_pool()
+
+    reference = results.get("cte", results["dfs"])
+    for name, result in results.items():
+        print(f"{'✅' if same_results(result, reference) else '❌'} {name} matches "
+              f"{'cte' if 'cte' in results else 'dfs'}")
@@ -0,0 +1,89 @@
+"""
+Compare the JSON and columnar binary encodings of a graph response.
+
+Builds a synthetic payload shaped like /graph/graph (accounts plus one edge
+per transfer) and times encoding and decoding each way, with payload sizes
+raw and gzipped. JSON is timed with json.dumps directly, which is cheaper
+than FastAPI's own encoding, so the comparison favours JSON.
+
+    python3 -m benchmarks.graph_wire [--accounts 50000] [--transfers 500000] [--repeat 3]
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.graph_binary import encode_graph, decode_graph
+
+START_DATE = datetime(2025, 1, 1)
+TYPES = ["Checking", "Savings", "Credit Card"]
+STATUSES = ["completed", "executed", "pending", "cancelled"]
+
+
+def synthetic_payload(n_accounts, n_transfers, seed):
+    rng = random.Random(seed)
+    nodes = [
+        {
+            "id": f"{rng.getrandbits(96):024x}",
+            "type": rng.choice(TYPES),
+            "nickname": f"Account {i}",
+            "balance": round(rng.uniform(0, 50000), 2),
+            "rewards": rng.randrange(5000),
+        }
+        for i in range(n_accounts)
+    ]
+    edges = []
+    for _ in range(n_transfers):
+        a, b = rng.sample(range(n_accounts), 2)
+        edges.append({
+            "source": nodes[a]["id"],
+            "target": nodes[b]["id"],
+            "amount": round(rng.uniform(1, 1000), 2),
+            "transaction_date": START_DATE + timedelta(seconds=rng.randrange(365 * 86400)),
+            "status": rng.choice(STATUSES),
+            "label": "p2p",
+        })
+    return {"nodes": nodes, "edges": edges}
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare JSON and columnar graph payloads")
+    parser.add_argument("--accounts", type=int, default=50000)
+    parser.add_argument("--transfers", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    payload = synthetic_payload(args.accounts, args.transfers, args.seed)
+
+    json_encode, text = best_of(args.repeat, lambda: json.dumps(payload, default=str).encode("utf-8"))
+    json_decode, _ = best_of(args.repeat, lambda: json.loads(text))
+    binary_encode, data = best_of(args.repeat, lambda: encode_graph(payload))
+    columns_decode, _ = best_of(args.repeat, lambda: decode_graph(data))
+    records_decode, decoded = best_of(args.repeat, lambda: decode_graph(data, records=True))
+
+    assert [e["source"] for e in decoded["edges"]] == [e["source"] for e in payload["edges"]]
+    assert [e["amount"] for e in decoded["edges"]] == [e["amount"] for e in payload["edges"]]
+
+    json_gzip = len(gzip.compress(text, 6))
+    binary_gzip = len(gzip.compress(data, 6))
+
+    print(f"{args.accounts} accounts, {args.transfers} transfers (best of {args.repeat})")
+    print(f"  {'':8s} {'encode':>8s} {'decode':>8s} {'bytes':>12s} {'gzipped':>12s}")
+    print(f"  {'json':8s} {json_encode:7.2f}s {json_decode:7.2f}s {len(text):12,d} {json_gzip:12,d}")
+    print(f"  {'binary':8s} {binary_encode:7.2f}s {columns_decode:7.2f}s {len(data):12,d} {binary_gzip:12,d}")
+    print(f"  binary decoded back to records: {records_decode:.2f}s")
+    print(f"  binary is {len(text) / len(data):.1f}x smaller ({json_gzip / binary_gzip:.1f}x gzipped), "
+          f"encodes {json_encode / binary_encode:.1f}x and decodes {json_decode / columns_decode:.1f}x faster")
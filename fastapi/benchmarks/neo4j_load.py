@@ -0,0 +1,91 @@
+"""
+Time the Neo4j bulk load with and without the Account/TRANSFERRED_TO schema.
+
+Loads the same synthetic accounts and transfers twice through the sync's
+UNWIND batches: once with the constraint and indexes from SCHEMA dropped
+(every MATCH/MERGE by id scans all Account nodes), once after
+ensure_schema. The Neo4j database at NEO4J_URI is cleared before each run
+and left with the schema in place.
+
+    python3 -m benchmarks.neo4j_load [--accounts 5000] [--transfers 50000] [--batch-size 10000]
+
+Without the schema the edge load grows with accounts x transfers, so keep
+the sizes modest.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from neo4j import GraphDatabase
+
+from app.database_to_neo4j.database_to_neo4j import (
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, BATCH_SIZE,
+    TRANSFER_ACCOUNT_NODES_CYPHER, TRANSFER_EDGES_CYPHER,
+    clear_neo4j_database, ensure_schema, drop_schema, write_batches, transfer_param,
+)
+
+START_DATE = datetime(2025, 1, 1)
+
+
+def synthetic_transfers(n_accounts, n_transfers, seed):
+    """Rows shaped like the sync's transfer query."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_transfers):
+        a, b = rng.sample(range(n_accounts), 2)
+        rows.append((
+            f"tr_{i}", f"acct_{a}", f"acct_{b}", round(rng.uniform(1, 1000), 2),
+            START_DATE + timedelta(seconds=rng.randrange(365 * 86400)),
+            "completed", None, "balance", "p2p",
+        ))
+    return rows
+
+
+def batches(rows, batch_size):
+    for i in range(0, len(rows), batch_size):
+        yield rows[i:i + batch_size]
+
+
+def timed_load(neo_driver, n_accounts, rows, batch_size):
+    """(seconds for account nodes, seconds for edges)"""
+    start = time.perf_counter()
+    write_batches(neo_driver, TRANSFER_ACCOUNT_NODES_CYPHER,
+                  batches([(f"acct_{i}",) for i in range(n_accounts)], batch_size),
+                  lambda row: {"id": row[0]}, "accounts")
+    nodes = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_batches(neo_driver, TRANSFER_EDGES_CYPHER, batches(rows, batch_size), transfer_param, "edges")
+    return nodes, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Neo4j load speed with and without the sync schema")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--transfers", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = synthetic_transfers(args.accounts, args.transfers, args.seed)
+    neo_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+    results = {}
+    for name in ("no schema", "schema"):
+        print(f"→ load with {name}")
+        clear_neo4j_database()
+        if name == "schema":
+            ensure_schema(neo_driver)
+        else:
+            drop_schema(neo_driver)
+        results[name] = timed_load(neo_driver, args.accounts, rows, args.batch_size)
+
+    neo_driver.close()
+
+    print(f"\n{args.accounts} accounts, {args.transfers} transfers, batch size {args.batch_size}")
+    print(f"  {'':10s} {'nodes':>9s} {'edges':>9s} {'edges/s':>10s}")
+    for name, (nodes, edges) in results.items():
+        print(f"  {name:10s} {nodes:8.1f}s {edges:8.1f}s {args.transfers / edges if edges else 0:10,.0f}")
+    speedup = results["no schema"][1] / results["schema"][1] if results["schema"][1] else 0
+    print(f"  edge load {speedup:.1f}x faster with the schema")
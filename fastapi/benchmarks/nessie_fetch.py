@@ -0,0 +1,193 @@
+"""
+Local stub of the Nessie API, and a fetch comparison against it.
+
+The stub serves consistent synthetic customers, accounts, merchants,
+bills, deposits, withdrawals and transfers, paginated like Nessie
+({"results": [...], "paging": {"next": ...}}), with a fixed latency per
+request and an optional share of 503 responses.
+
+Compare a plain requests.get loop (one endpoint and page after another, a
+new connection each time) with NessieFetcher:
+
+    python3 -m benchmarks.nessie_fetch [--records 20000] [--page-size 500] [--latency-ms 50] [--fail-ratio 0.05]
+
+Or keep the stub running and point the ingest at it:
+
+    python3 -m benchmarks.nessie_fetch --serve --port 8765
+    NESSIE_BASE_URL=http://localhost:8765/enterprise python3 -m app.database.nessie_ingest
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from app.database.nessie_fetch import NessieFetcher, page_records
+
+ENTITIES = ["customers", "accounts", "merchants", "bills", "deposits", "withdrawals", "transfers"]
+
+
+def synthetic_record(entity, i, n):
+    rng = random.Random(f"{entity}-{i}")
+    account = f"acct_{rng.randrange(n)}"
+    date = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if entity == "customers":
+        return {"_id": f"cust_{i}", "first_name": "Pat", "last_name": f"Doe {i}",
+                "address": {"street_number": str(i), "street_name": "Main St", "city": "Springfield",
+                            "state": "IL", "zip": "62701"}}
+    if entity == "accounts":
+        return {"_id": f"acct_{i}", "customer_id": f"cust_{i}", "type": "Checking",
+                "nickname": f"Account {i}", "balance": rng.randrange(100000), "rewards": rng.randrange(500)}
+    if entity == "merchants":
+        return {"_id": f"merch_{i}", "name": f"Shop {i}", "address": {"city": "Springfield"},
+                "geocode": {"lat": rng.uniform(-90, 90), "lng": rng.uniform(-180, 180)}}
+    if entity == "bills":
+        return {"_id": f"bill_{i}", "account_id": account, "payee": "Utility", "status": "pending",
+                "creation_date": date, "payment_amount": rng.randrange(1, 500)}
+    if entity == "deposits":
+        return {"_id": f"dep_{i}", "type": "deposit", "payee_id": account, "amount": rng.randrange(1, 2000),
+                "medium": "balance", "transaction_date": date, "status": "executed"}
+    if entity == "withdrawals":
+        return {"_id": f"wd_{i}", "type": "withdrawal", "payer_id": account, "amount": rng.randrange(1, 500),
+                "medium": "balance", "transaction_date": date, "status": "executed"}
+    return {"_id": f"tr_{i}", "type": "p2p", "payer_id": account, "payee_id": f"acct_{rng.randrange(n)}",
+            "amount": rng.randrange(1, 1000), "medium": "balance", "transaction_date": date,
+            "status": rng.choice(["completed", "executed", "pending"])}
+
+
+def stub_server(port, records, page_size, latency, fail_ratio, entities=ENTITIES):
+    """Start the stub in a daemon thread; returns the server (call shutdown() to stop)."""
+    fail_rng = random.Random(0)
+    fail_lock = threading.Lock()
+    pages = {}  # (entity, page) -> body, built once so serving costs little
+
+    def page_body(entity, page):
+        body = pages.get((entity, page))
+        if body is None:
+            start = page * page_size
+            body = {"results": [synthetic_record(entity, i, records)
+                                for i in range(start, min(start + page_size, records))],
+                    "paging": {}}
+            if start + page_size < records:
+                body["paging"]["next"] = f"/enterprise/{entity}?page={page + 1}"
+            body = pages[(entity, page)] = json.dumps(body).encode("utf-8")
+        return body
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send(self, status, body, headers=()):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            entity = url.path.rstrip("/").rsplit("/", 1)[-1]
+            page = int(parse_qs(url.query).get("page", ["0"])[0])
+            time.sleep(latency)
+            with fail_lock:
+                fail = fail_rng.random() < fail_ratio
+            if fail:
+                return self.send(503, {"message": "try again"}, [("Retry-After", "0")])
+            if entity not in entities:
+                return self.send(404, {"message": "not found"})
+
+            self.send(200, page_body(entity, page))
+
+    for entity in entities:
+        for page in range(-(-records // page_size)):
+            page_body(entity, page)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch_sequential(base_url):
+    """Every page of every endpoint, one plain requests.get after another."""
+    counts = {}
+    for entity in ENTITIES:
+        url, n = f"{base_url}/{entity}", 0
+        while url:
+            r = requests.get(url, params={"key": "stub"}, timeout=30)
+            r.raise_for_status()
+            records, next_page = page_records(r.json())
+            n += len(records)
+            url = requests.compat.urljoin(url, next_page) if next_page else None
+        counts[entity] = n
+    return counts
+
+
+def fetch_concurrent(base_url, max_concurrency):
+    """Every endpoint through one NessieFetcher, each stream drained by its own thread."""
+    with NessieFetcher(base_url=base_url, api_key="stub", max_concurrency=max_concurrency) as fetcher:
+        counts = {}
+
+        def drain(entity, records):
+            counts[entity] = sum(1 for _ in records)
+
+        threads = [threading.Thread(target=drain, args=(entity, fetcher.stream(entity))) for entity in ENTITIES]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts, fetcher.requests, fetcher.retries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nessie API stub and fetch comparison")
+    parser.add_argument("--records", type=int, default=20000, help="Records per endpoint")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--fail-ratio", type=float, default=0.05, help="Share of requests answered 503")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", action="store_true", help="Only run the stub until interrupted")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}/enterprise"
+    if args.serve:
+        server = stub_server(args.port, args.records, args.page_size, args.latency_ms / 1000, args.fail_ratio)
+        print(f"Nessie stub on {base_url} ({args.records} records per endpoint), Ctrl-C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        raise SystemExit
+
+    # The plain loop has no retries, so it runs without injected failures
+    server = stub_server(args.port, args.records, args.page_size, args.latency_ms / 1000, 0)
+    start = time.perf_counter()
+    sequential = fetch_sequential(base_url)
+    sequential_seconds = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    server = stub_server(args.port, args.records, args.page_size, args.latency_ms / 1000, args.fail_ratio)
+    start = time.perf_counter()
+    concurrent, requests_made, retries = fetch_concurrent(base_url, args.concurrency)
+    concurrent_seconds = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    expected = {entity: args.records for entity in ENTITIES}
+    pages = len(ENTITIES) * -(-args.records // args.page_size)
+    print(f"{len(ENTITIES)} endpoints x {args.records} records, {pages} pages, {args.latency_ms:.0f}ms latency")
+    print(f"  sequential  {sequential_seconds:7.2f}s  complete: {sequential == expected}")
+    print(f"  concurrent  {concurrent_seconds:7.2f}s  complete: {concurrent == expected}  "
+          f"({requests_made} requests, {retries} retried at {args.fail_ratio:.0%} injected 503s)")
+    print(f"  {sequential_seconds / concurrent_seconds:.1f}x faster")
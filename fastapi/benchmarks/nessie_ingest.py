@@ -0,0 +1,130 @@
+"""
+Compare the row-at-a-time transfer insert with the COPY bulk loader.
+
+Loads the same synthetic Nessie transfer records twice into fresh tables in
+a scratch schema: once the way ingest_transfers used to (one INSERT per
+record), once through bulk_load (COPY into staging, foreign key check,
+one merge). A small share of the records are bad (unparseable amount or
+date, unknown payer) to exercise the reject path.
+
+    python3 -m benchmarks.nessie_ingest [--accounts 2000] [--transfers 200000] [--bad-ratio 0.01]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.database.db_init import DB_CONFIG, create_tables
+from app.database.migrations import apply_migrations
+from app.database.bulk_load import bulk_load
+from app.database.nessie_ingest import transfer_row
+
+BENCH_SCHEMA = "ingest_bench"
+START_DATE = datetime(2025, 1, 1)
+TRANSFER_COLUMNS = ["id", "type", "amount", "payer_id", "payee_id", "description", "medium",
+                    "transaction_date", "status"]
+
+
+def synthetic_records(n_accounts, n_transfers, bad_ratio, seed):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_transfers):
+        a, b = rng.sample(range(n_accounts), 2)
+        record = {
+            "_id": f"tr_{i}",
+            "type": "p2p",
+            "amount": round(rng.uniform(1, 1000), 2),
+            "payer_id": f"acct_{a}",
+            "payee_id": f"acct_{b}",
+            "description": f"transfer {i}",
+            "medium": "balance",
+            "transaction_date": (START_DATE + timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d"),
+            "status": "completed",
+        }
+        if rng.random() < bad_ratio:
+            record[rng.choice(["amount", "transaction_date", "payer_id"])] = "garbage"
+        records.append(record)
+    return records
+
+
+def reset_schema(conn, n_accounts):
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+    create_tables(cur)
+    conn.commit()
+    apply_migrations(conn)
+    cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+    execute_values(cur, "INSERT INTO accounts (id) VALUES %s", [(f"acct_{i}",) for i in range(n_accounts)])
+    conn.commit()
+
+
+def row_at_a_time(conn, records):
+    """The old ingest_transfers loop. Returns (loaded, skipped)."""
+    cur = conn.cursor()
+    loaded = skipped = 0
+    for t in records:
+        try:
+            cur.execute("""
+                INSERT INTO transfers
+                (id, type, amount, payer_id, payee_id,
+                description, medium, transaction_date, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (id) DO NOTHING
+            """, tuple(t.get(c if c != "id" else "_id") for c in TRANSFER_COLUMNS))
+            loaded += 1
+        except (psycopg2.Error, ValueError):
+            skipped += 1
+            conn.rollback()
+            cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+    conn.commit()
+    return loaded, skipped
+
+
+def table_rows(conn, table):
+    cur = conn.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    return cur.fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare row-at-a-time and COPY transfer ingest")
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--transfers", type=int, default=200000)
+    parser.add_argument("--bad-ratio", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.accounts, args.transfers, args.bad_ratio, args.seed)
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        reset_schema(conn, args.accounts)
+        start = time.perf_counter()
+        loaded, skipped = row_at_a_time(conn, records)
+        old_seconds = time.perf_counter() - start
+        old_rows = table_rows(conn, "transfers")
+        conn.commit()
+
+        reset_schema(conn, args.accounts)
+        start = time.perf_counter()
+        result = bulk_load(conn, "transfers", TRANSFER_COLUMNS, records, transfer_row,
+                           foreign_keys=[("payer_id", "accounts"), ("payee_id", "accounts")])
+        conn.commit()
+        new_seconds = time.perf_counter() - start
+        new_rows = table_rows(conn, "transfers")
+
+        print(f"{args.transfers} transfers, {args.bad_ratio:.1%} bad")
+        print(f"  row at a time  {old_seconds:7.2f}s {args.transfers / old_seconds:10,.0f} rows/s   "
+              f"reported {loaded} loaded / {skipped} skipped, table has {old_rows}")
+        print(f"  bulk (COPY)    {new_seconds:7.2f}s {args.transfers / new_seconds:10,.0f} rows/s   "
+              f"reported {result['loaded']} loaded / {result['rejected']} rejected, table has {new_rows}")
+        print(f"  {old_seconds / new_seconds:.1f}x faster")
+    finally:
+        conn.rollback()
+        conn.cursor().execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
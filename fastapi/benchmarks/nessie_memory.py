@@ -0,0 +1,124 @@
+"""
+Peak memory of the Nessie ingest path for one very large endpoint.
+
+The stub from benchmarks/nessie_fetch.py serves every transfer in a single
+page, the worst case for memory. Each mode runs in its own process and
+reports its peak RSS:
+
+  whole      the old fetch: r.json() on the body, then normalize in batches
+  streaming  NessieFetcher (incremental parse, spooled batches), same batches
+  load       streaming into the bulk loader and cycle detection, as
+             ingest_transfers runs it, in the ingest_bench scratch schema.
+             Detection reads each batch's neighbourhood from Postgres, so
+             this stays flat too (about +60 MB for 500k transfers)
+
+    python3 -m benchmarks.nessie_memory [--records 500000] [--load]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from itertools import islice
+
+import httpx
+
+from app.database.nessie_fetch import NessieFetcher, page_records
+from app.database.nessie_ingest import INGEST_BATCH_RECORDS, transfer_row
+from benchmarks.nessie_fetch import stub_server
+
+MODES = ["whole", "streaming"]
+
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss would carry the parent's peak (it holds the stub's pages)
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def normalize_batches(records):
+    n = 0
+    records = iter(records)
+    while True:
+        batch = list(islice(records, INGEST_BATCH_RECORDS))
+        if not batch:
+            return n
+        n += sum(1 for record in batch if transfer_row(record))
+
+
+def run_mode(mode, base_url, records):
+    if mode == "whole":
+        r = httpx.get(f"{base_url}/transfers", params={"key": "stub"}, timeout=None)
+        r.raise_for_status()
+        return normalize_batches(page_records(r.json())[0])
+    if mode == "streaming":
+        with NessieFetcher(base_url=base_url, api_key="stub") as fetcher:
+            return normalize_batches(fetcher.stream("transfers"))
+
+    import psycopg2
+    from app.database.db_init import DB_CONFIG
+    from app.database.nessie_ingest import ingest_transfers
+    from benchmarks.nessie_ingest import BENCH_SCHEMA, reset_schema
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        reset_schema(conn, records)
+        with NessieFetcher(base_url=base_url, api_key="stub") as fetcher:
+            ingest_transfers(conn, fetcher.stream("transfers"))
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM transfers")
+        return cur.fetchone()[0]
+    finally:
+        conn.rollback()
+        conn.cursor().execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+def run_child(mode, port, records):
+    env = dict(os.environ)
+    if mode == "load":
+        # Every connection in the child, graph snapshot included, sees the scratch schema
+        from benchmarks.nessie_ingest import BENCH_SCHEMA
+        env["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA}"
+    out = subprocess.run([sys.executable, "-m", "benchmarks.nessie_memory", "--child", mode,
+                          "--port", str(port), "--records", str(records)],
+                         env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of whole-body and streaming Nessie ingest")
+    parser.add_argument("--records", type=int, default=500000, help="Transfers in the single page")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--load", action="store_true", help="Also stream into Postgres (scratch schema)")
+    parser.add_argument("--child", choices=MODES + ["load"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}/enterprise"
+
+    if args.child:
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        n = run_mode(args.child, base_url, args.records)
+        print(json.dumps({"records": n, "seconds": time.perf_counter() - start,
+                          "baseline_mb": baseline, "peak_mb": peak_rss_mb()}))
+        raise SystemExit
+
+    server = stub_server(args.port, args.records, args.records, 0, 0, entities=["transfers"])
+    try:
+        print(f"{args.records} transfers in one page")
+        for mode in MODES + (["load"] if args.load else []):
+            result = run_child(mode, args.port, args.records)
+            print(f"  {mode:10s} {result['seconds']:7.2f}s  peak RSS {result['peak_mb']:7.1f} MB "
+                  f"({result['peak_mb'] - result['baseline_mb']:+.1f} MB over the interpreter and imports), "
+                  f"{result['records']} records")
+    finally:
+        server.shutdown()
+        server.server_close()
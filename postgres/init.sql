@@ -95,6 +95,9 @@ CREATE TABLE IF NOT EXISTS transfers (
     status TEXT
 );
 
+-- Indexes, and any later schema changes, are versioned migrations in
+-- fastapi/app/database/migrations.py, applied by init_schema() on ingest.
+
 -- ===============================================
 -- PERMISSIONS
 -- ===============================================